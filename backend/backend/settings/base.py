@@ -165,12 +165,40 @@ if not os.path.exists(LOGS_DIR):
     os.makedirs(LOGS_DIR)
 
 # Cache configuration for throttling and other features
-# Using local memory cache (default) - for production, consider Redis
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'unique-snowflake',
+# (throttle counts, authenticated users, data versions, availability and list responses).
+# These must be the same in every gunicorn worker, so production uses a tier shared by
+# all processes. CACHE_BACKEND selects it:
+# - locmem: per-process memory (local development, single process)
+# - sqlite: core.cache_backends.SQLiteCache, one SQLite file shared by every process on the host
+# - file: Django's file-based cache (one file per entry)
+# - redis: Django's Redis cache (needs redis-py and a Redis server, CACHE_LOCATION=redis://host:port/db)
+CACHE_DIR = os.path.join(BASE_DIR, 'cache')
+CACHE_BACKENDS = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', 'unique-snowflake'),
+    'sqlite': ('core.cache_backends.SQLiteCache', os.path.join(CACHE_DIR, 'cache.sqlite3')),
+    'file': ('django.core.cache.backends.filebased.FileBasedCache', os.path.join(CACHE_DIR, 'files')),
+    'redis': ('django.core.cache.backends.redis.RedisCache', 'redis://127.0.0.1:6379/1'),
+}
+
+
+def cache_settings(backend, location=None):
+    """CACHES entry for one of CACHE_BACKENDS, with CACHE_MAX_ENTRIES/CACHE_DEFAULT_TIMEOUT applied"""
+    if backend not in CACHE_BACKENDS:
+        raise ValueError(f"CACHE_BACKEND must be one of {', '.join(CACHE_BACKENDS)} (got {backend!r})")
+    backend_path, default_location = CACHE_BACKENDS[backend]
+    config = {
+        'BACKEND': backend_path,
+        'LOCATION': location or default_location,
+        'TIMEOUT': int(os.environ.get('CACHE_DEFAULT_TIMEOUT', '300')),
     }
+    if backend != 'redis':
+        # Redis evicts with its own maxmemory policy
+        config['OPTIONS'] = {'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRIES', '10000'))}
+    return config
+
+
+CACHES = {
+    'default': cache_settings(os.environ.get('CACHE_BACKEND', 'locmem'), os.environ.get('CACHE_LOCATION')),
 }
 
 # REST Framework Configuration
@@ -190,6 +218,50 @@ REST_FRAMEWORK = {
     },
 }
 
+# Keyset pagination for GET /api/bookings/ (opt-in via ?page_size= or ?cursor=)
+BOOKING_PAGE_SIZE = int(os.environ.get('BOOKING_PAGE_SIZE', '100'))
+BOOKING_MAX_PAGE_SIZE = int(os.environ.get('BOOKING_MAX_PAGE_SIZE', '500'))
+
+# Seconds a month availability response stays cached (it is also dropped on any booking/holiday write)
+AVAILABILITY_CACHE_TTL = int(os.environ.get('AVAILABILITY_CACHE_TTL', '300'))
+
+# Seconds a GET /api/bookings/ or /api/holidays/ response stays cached server-side (0 disables).
+# Entries are keyed by the calendar data version, so a write is visible on the next request.
+RESPONSE_CACHE_TTL = int(os.environ.get('RESPONSE_CACHE_TTL', '300'))
+
+# GET /api/changes/ (and /api/events/): log entries per call, and how long an id missing from
+# the log is waited for before the cursor moves past it as rolled back (core.changes.next_cursor).
+# Must be longer than any booking/holiday writer transaction (import batches, reset job chunks,
+# lock waits up to innodb_lock_wait_timeout): a later commit would otherwise be skipped.
+CHANGES_PAGE_SIZE = int(os.environ.get('CHANGES_PAGE_SIZE', '500'))
+CHANGES_SETTLE_SECONDS = int(os.environ.get('CHANGES_SETTLE_SECONDS', '300'))
+
+# Server-Sent Events (GET /api/events/, served by backend.asgi)
+SSE_HEARTBEAT_SECONDS = int(os.environ.get('SSE_HEARTBEAT_SECONDS', '15'))
+SSE_POLL_INTERVAL = float(os.environ.get('SSE_POLL_INTERVAL', '2'))  # change log poll for writes made by other processes
+SSE_QUEUE_SIZE = int(os.environ.get('SSE_QUEUE_SIZE', '100'))  # events buffered per client before it is disconnected
+SSE_RETRY_MS = int(os.environ.get('SSE_RETRY_MS', '3000'))
+SSE_TICKET_LIFETIME = int(os.environ.get('SSE_TICKET_LIFETIME', '60'))  # seconds a stream ticket can open the stream
+
+# Notification email outbox (delivered by `manage.py run_outbox_worker`)
+OUTBOX_MAX_ATTEMPTS = int(os.environ.get('OUTBOX_MAX_ATTEMPTS', '5'))
+OUTBOX_RETRY_BASE_DELAY = int(os.environ.get('OUTBOX_RETRY_BASE_DELAY', '60'))  # seconds
+OUTBOX_RETRY_MAX_DELAY = int(os.environ.get('OUTBOX_RETRY_MAX_DELAY', '3600'))  # seconds
+
+# Seconds the newest archived date (BookingArchive) is cached for routing listings to the archive;
+# `manage.py archive_bookings` drops it, so this only matters with a per-process (locmem) cache
+ARCHIVE_ROUTING_CACHE_TTL = int(os.environ.get('ARCHIVE_ROUTING_CACHE_TTL', '300'))
+
+# Chunked booking resets (run by `manage.py run_reset_jobs`): rows deleted per transaction,
+# and where archive=1 resets write the deleted rows (JSON Lines)
+RESET_BATCH_SIZE = int(os.environ.get('RESET_BATCH_SIZE', '1000'))
+BOOKING_ARCHIVE_DIR = os.environ.get('BOOKING_ARCHIVE_DIR', os.path.join(BASE_DIR, 'archives'))
+
+# Gmail HTTP batch sending for multi-message sends (1 disables batching, Gmail allows up to 100)
+GMAIL_BATCH_SIZE = int(os.environ.get('GMAIL_BATCH_SIZE', '50'))
+GMAIL_BATCH_MAX_RETRIES = int(os.environ.get('GMAIL_BATCH_MAX_RETRIES', '2'))
+GMAIL_BATCH_RETRY_DELAY = float(os.environ.get('GMAIL_BATCH_RETRY_DELAY', '1'))  # seconds, doubled per retry
+
 # JWT Settings
 from datetime import timedelta
 
@@ -202,5 +274,11 @@ SIMPLE_JWT = {
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
 }
 
+# Seconds an authenticated user stays cached (0 disables); saving/deleting the user drops the entry
+JWT_USER_CACHE_TTL = int(os.environ.get('JWT_USER_CACHE_TTL', '60'))
+# Build request.user from the token's role/email claims only (no DB/cache lookup).
+# Role changes and deletions then only apply once the user's token expires.
+JWT_CLAIMS_ONLY_AUTH = os.environ.get('JWT_CLAIMS_ONLY_AUTH', 'False').lower() == 'true'
+
 
 
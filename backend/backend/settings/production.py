@@ -40,6 +40,11 @@ DATABASES = {
     }
 }
 
+# Cache shared by all gunicorn workers (global throttling, one copy of cached users/responses)
+CACHES = {
+    'default': cache_settings(os.environ.get('CACHE_BACKEND', 'sqlite'), os.environ.get('CACHE_LOCATION')),
+}
+
 # CORS - Specific origins in production
 CORS_ALLOW_ALL_ORIGINS = False
 CORS_ALLOWED_ORIGINS = [
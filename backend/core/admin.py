@@ -1,8 +1,43 @@
 from django.contrib import admin
+from django.utils import timezone
 
-from .models import Booking, ContactMessage, Holiday, User
+from .models import Booking, BookingArchive, BookingResetJob, Calendar, ContactMessage, Holiday, OutboxEmail, User
 
 admin.site.register(Booking)
+admin.site.register(BookingArchive)
+admin.site.register(Calendar)
 admin.site.register(ContactMessage)
 admin.site.register(Holiday)
 admin.site.register(User)
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ['id', 'subject', 'to', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at']
+    list_filter = ['status']
+    actions = ['requeue']
+
+    @admin.action(description="Remettre en file d'attente")
+    def requeue(self, request, queryset):
+        updated = queryset.exclude(status=OutboxEmail.STATUS_SENT).update(
+            status=OutboxEmail.STATUS_PENDING,
+            attempts=0,
+            next_attempt_at=timezone.now(),
+        )
+        self.message_user(request, f"{updated} email(s) remis en file d'attente.")
+
+
+@admin.register(BookingResetJob)
+class BookingResetJobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'calendar_id', 'status', 'deleted', 'total', 'batch_size', 'archive', 'created_at', 'finished_at']
+    list_filter = ['status']
+    actions = ['requeue']
+
+    @admin.action(description="Reprendre")
+    def requeue(self, request, queryset):
+        # Resumes after the last committed batch
+        updated = queryset.filter(status=BookingResetJob.STATUS_FAILED).update(
+            status=BookingResetJob.STATUS_PENDING,
+            finished_at=None,
+        )
+        self.message_user(request, f"{updated} suppression(s) remise(s) en file d'attente.")
@@ -0,0 +1,138 @@
+"""
+Archive tier for past bookings.
+
+Booking holds every appointment ever imported or taken, while the capacity checks,
+availability and upcoming listings only look at recent and future dates.
+`manage.py archive_bookings --before DATE` moves the older rows to BookingArchive in
+chunks (archive_batch), so the live table and its indexes stay small as history piles up.
+
+Reads are routed by date range: every archived booking is dated on or before
+get_archived_until(), so a listing starting after that date reads Booking only.
+Otherwise both tables are read and merged in the listing order by BookingRoute.
+"""
+import heapq
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .capacity import lock_occupancy_days, refresh_occupancy
+from .models import Booking, BookingArchive
+from .versions import bump_calendar_version_on_commit
+
+ARCHIVED_UNTIL_KEY = 'booking_archived_until:{calendar_id}'
+MISSING = object()
+
+ARCHIVED_FIELDS = (
+    'calendar_id', 'booking_date', 'booking_time', 'client_name',
+    'client_phone', 'designer_name', 'message', 'created_at',
+)
+
+
+def _archived_until_key(calendar_id):
+    return ARCHIVED_UNTIL_KEY.format(calendar_id=calendar_id or 'all')
+
+
+def get_archived_until(calendar_id=None):
+    """
+    Newest archived booking date (of one calendar), or None when nothing is archived.
+    Cached so routing costs no query on the listings; archive_batch() drops the entries.
+    """
+    key = _archived_until_key(calendar_id)
+    cached = cache.get(key, MISSING)
+    if cached is not MISSING:
+        return cached
+    archived = BookingArchive.objects.all()
+    if calendar_id:
+        archived = archived.filter(calendar_id=calendar_id)
+    until = archived.aggregate(until=Max('booking_date'))['until']
+    cache.set(key, until, timeout=getattr(settings, 'ARCHIVE_ROUTING_CACHE_TTL', 300))
+    return until
+
+
+def clear_archived_until(calendar_ids):
+    cache.delete_many([_archived_until_key(None)] + [_archived_until_key(calendar_id) for calendar_id in calendar_ids])
+
+
+def reaches_archive(calendar_id=None, start_date=None):
+    """Whether a date range starting at start_date (None: unbounded) can include archived bookings"""
+    if isinstance(start_date, str):
+        try:
+            start_date = parse_date(start_date)
+        except ValueError:
+            start_date = None
+    until = get_archived_until(calendar_id)
+    return until is not None and (start_date is None or start_date <= until)
+
+
+class BookingRoute:
+    """
+    Booking and BookingArchive querysets read as one ordered listing.
+    filter() and order_by() apply to every table; iterating or slicing ([:n]) reads
+    each table in that order and merges the rows. Archived rows are BookingArchive
+    instances with the same fields, so serializers and pagination cursors handle
+    them like bookings.
+    """
+
+    def __init__(self, *querysets):
+        self.querysets = querysets
+
+    def filter(self, *args, **kwargs):
+        return BookingRoute(*(queryset.filter(*args, **kwargs) for queryset in self.querysets))
+
+    def order_by(self, *fields):
+        return BookingRoute(*(queryset.order_by(*fields) for queryset in self.querysets))
+
+    def _merge(self, limit=None):
+        fields = self.querysets[0].query.order_by
+        sources = [queryset if limit is None else queryset[:limit] for queryset in self.querysets]
+        if not fields:
+            return (row for source in sources for row in source)
+        names = ['pk' if field.lstrip('-') == 'id' else field.lstrip('-') for field in fields]
+        return heapq.merge(
+            *sources,
+            key=lambda row: tuple(getattr(row, name) for name in names),
+            reverse=fields[0].startswith('-'),
+        )
+
+    def __iter__(self):
+        return self._merge()
+
+    def __getitem__(self, item):
+        if not isinstance(item, slice) or item.start or item.step or item.stop is None:
+            raise TypeError('BookingRoute only supports [:n] slices')
+        return list(islice(self._merge(limit=item.stop), item.stop))
+
+
+def archive_batch(before, calendar_id=None, batch_size=1000):
+    """Move up to batch_size bookings dated before `before` to the archive in one transaction"""
+    bookings = Booking.objects.filter(booking_date__lt=before)
+    if calendar_id:
+        bookings = bookings.filter(calendar_id=calendar_id)
+    with transaction.atomic():
+        candidates = list(bookings.order_by().values_list('id', 'calendar_id', 'booking_date')[:batch_size])
+        if not candidates:
+            return 0
+        # Day rows first, as booking requests lock them, then the bookings themselves
+        # (read again, locked until the move commits, so a concurrent edit cannot be lost)
+        days = {(calendar_id, booking_date) for _, calendar_id, booking_date in candidates}
+        lock_occupancy_days(days)
+        rows = list(bookings.select_for_update().filter(
+            pk__in=[pk for pk, _, _ in candidates]
+        ).order_by().values('id', *ARCHIVED_FIELDS))
+        if not rows:
+            return 0
+        archived_at = timezone.now()
+        BookingArchive.objects.bulk_create([BookingArchive(archived_at=archived_at, **row) for row in rows])
+        # The bookings stay listed (from the archive): no delete is logged for sync clients
+        Booking.objects.filter(pk__in=[row['id'] for row in rows])._raw_delete(Booking.objects.db)
+        refresh_occupancy(days=days | {(row['calendar_id'], row['booking_date']) for row in rows})
+        calendar_ids = {row['calendar_id'] for row in rows}
+        for archived_calendar_id in calendar_ids:
+            bump_calendar_version_on_commit(archived_calendar_id)
+        transaction.on_commit(lambda: clear_archived_until(calendar_ids))
+    return len(rows)
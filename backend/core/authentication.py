@@ -1,13 +1,76 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
 from rest_framework_simplejwt.authentication import JWTAuthentication
-from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.tokens import Token
 
 from .models import User
 
+USER_CACHE_KEY = 'jwt_user:{user_id}:{updated_at}'
+USER_VERSION_CACHE_KEY = 'jwt_user_version:{user_id}'
+
+
+def _updated_at_key(updated_at):
+    return int(updated_at.timestamp() * 1_000_000)
+
+
+def get_user_cache_key(user_id, updated_at):
+    return USER_CACHE_KEY.format(user_id=user_id, updated_at=_updated_at_key(updated_at))
+
+
+def get_user_version_cache_key(user_id):
+    return USER_VERSION_CACHE_KEY.format(user_id=user_id)
+
+
+def invalidate_cached_user(user_id, updated_at=None):
+    """
+    Point the user's cache entry at its new updated_at, or drop it without one
+    (called by the User post_save/post_delete signals once the write commits)
+    """
+    if updated_at is None:
+        cache.delete(get_user_version_cache_key(user_id))
+    else:
+        cache.set(get_user_version_cache_key(user_id), _updated_at_key(updated_at), getattr(settings, 'JWT_USER_CACHE_TTL', 60))
+
+
+def invalidate_cached_users(user_ids):
+    """
+    Drop the cached users of a bulk write. User.objects.filter(...).update() sends no
+    signals: call it after such a write, as the booking bulk writes call record_changes().
+    """
+    cache.delete_many([get_user_version_cache_key(user_id) for user_id in user_ids])
+
+
+class ClaimsUser:
+    """
+    Lightweight request.user built from the `user_id`, `email` and `role` claims that
+    UserLoginView embeds in the token (JWT_CLAIMS_ONLY_AUTH). No database access:
+    role changes and deleted users only take effect once the token expires.
+    """
+    is_authenticated = True
+    is_anonymous = False
+    
+    def __init__(self, user_id, email, role):
+        self.id = self.pk = user_id
+        self.email = email
+        self.role = role
+    
+    def __str__(self) -> str:
+        return f"{self.email} - {self.role}"
+
 
 class CustomJWTAuthentication(JWTAuthentication):
     """
     Custom JWT authentication that works with the custom User model (core.models.User)
     instead of Django's default User model.
+    
+    Users are cached for JWT_USER_CACHE_TTL seconds under their id and updated_at, so
+    steady-state requests do not query the database. A per-user entry holds the current
+    updated_at: saving the user moves it to the new one and deleting the user drops it
+    (see invalidate_cached_user), so the old entry is no longer read.
+    With JWT_CLAIMS_ONLY_AUTH, request.user is a ClaimsUser built from the token alone.
     """
     
     def get_user(self, validated_token):
@@ -23,6 +86,22 @@ class CustomJWTAuthentication(JWTAuthentication):
         if not user_id:
             raise InvalidToken('Token contained no recognizable user identification')
         
+        if getattr(settings, 'JWT_CLAIMS_ONLY_AUTH', False):
+            role = validated_token.get('role')
+            email = validated_token.get('email')
+            # Tokens issued without the claims fall back to the user lookup
+            if role and email:
+                return ClaimsUser(user_id, email, role)
+        
+        cache_ttl = getattr(settings, 'JWT_USER_CACHE_TTL', 60)
+        version_key = get_user_version_cache_key(user_id)
+        if cache_ttl:
+            updated_at = cache.get(version_key)
+            if updated_at is not None:
+                user = cache.get(USER_CACHE_KEY.format(user_id=user_id, updated_at=updated_at))
+                if user is not None:
+                    return user
+        
         try:
             user = User.objects.get(pk=user_id)
         except User.DoesNotExist:
@@ -30,5 +109,45 @@ class CustomJWTAuthentication(JWTAuthentication):
         except Exception as e:
             raise InvalidToken(f'Error retrieving user: {str(e)}')
         
+        if cache_ttl:
+            cache.set(get_user_cache_key(user_id, user.updated_at), user, cache_ttl)
+            # add(): a save committed since this read has already set the newer updated_at
+            cache.add(version_key, _updated_at_key(user.updated_at), cache_ttl)
         return user
 
+
+class StreamTicket(Token):
+    """
+    Short-lived token that only opens the event stream (GET /api/events/?ticket=).
+    EventSource cannot send headers: the page asks for a ticket with its access token
+    and puts the ticket, not the access token, in the URL. Its token type is not
+    accepted by the API authentication, and the access token is not accepted in its place.
+    """
+    token_type = 'stream'
+
+    @property
+    def lifetime(self):
+        return timedelta(seconds=getattr(settings, 'SSE_TICKET_LIFETIME', 60))
+
+    @classmethod
+    def for_user(cls, user):
+        ticket = cls()
+        ticket['user_id'] = user.id
+        return ticket
+
+
+def authenticate_access_token(raw_token):
+    """Return the user of a raw access token, or None if it is invalid"""
+    authentication = CustomJWTAuthentication()
+    try:
+        return authentication.get_user(authentication.get_validated_token(raw_token))
+    except (InvalidToken, TokenError):
+        return None
+
+
+def authenticate_stream_ticket(raw_ticket):
+    """Return the user of a raw StreamTicket, or None if it is invalid or expired"""
+    try:
+        return CustomJWTAuthentication().get_user(StreamTicket(raw_ticket))
+    except (InvalidToken, TokenError):
+        return None
@@ -0,0 +1,214 @@
+"""
+Month availability of a calendar, computed server-side.
+
+The month's DailyOccupancy rows give the number of bookings and the occupied slots
+of each day (see core.capacity) and a second query the holidays of the month; days
+with bookings at untracked free-form times read those times from the bookings. The
+result is cached per calendar version (see core.versions) so it is recomputed only
+after a booking or holiday changes.
+
+find_next_free_slots() searches forward for the next free (date, slot) pairs the same
+way: each search window costs one range query on DailyOccupancy and one on Holiday,
+and the days are then scanned in memory against the occupancy bitmasks.
+"""
+import calendar as month_calendar
+from collections import defaultdict
+from datetime import date, timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import cache
+from .capacity import decode_slots, get_occupancy_slots, normalize_slot, slot_mask
+from .models import Booking, DailyOccupancy, Holiday
+from .serializers import ALLOWED_TIME_SLOTS, CALENDAR_DAILY_LIMITS, TIME_SLOT_CALENDARS
+from .versions import get_calendar_version
+
+AVAILABILITY_CACHE_KEY = 'availability:{calendar_id}:{month}:{version}:{today}'
+NEXT_SLOTS_CACHE_KEY = 'availability_next:{calendar_id}:{start}:{count}:{version}:{today}'
+
+# Days read per search window: the first window covers the usual case, the next ones double
+NEXT_SLOTS_WINDOW_DAYS = 62
+# Furthest day searched after the start date
+NEXT_SLOTS_HORIZON_DAYS = 730
+
+
+def parse_month(value):
+    """Parse 'YYYY-MM' into (year, month); raises ValueError for anything else"""
+    year, month = (value or '').split('-')
+    year, month = int(year), int(month)
+    if not 1 <= month <= 12 or year < 1:
+        raise ValueError(value)
+    return year, month
+
+
+def compute_month_availability(calendar_id, year, month, today=None):
+    """Per-day remaining capacity, free time slots and holiday flags of one calendar month"""
+    today = today or date.today()
+    # Same rule as BookingSerializer.validate: no bookings for today or tomorrow
+    earliest_bookable = today + timedelta(days=2)
+    first_day = date(year, month, 1)
+    last_day = date(year, month, month_calendar.monthrange(year, month)[1])
+
+    daily_limit = CALENDAR_DAILY_LIMITS.get(calendar_id)
+    uses_time_slots = calendar_id in TIME_SLOT_CALENDARS
+    allowed_slots = ALLOWED_TIME_SLOTS.get(calendar_id)
+
+    booked_counts = defaultdict(int)
+    occupied_slots = defaultdict(set)
+    occupancy_rows = DailyOccupancy.objects.filter(
+        calendar_id=calendar_id,
+        day__range=(first_day, last_day),
+        booked_count__gt=0,
+    ).values_list('day', 'booked_count', 'occupied_slots_bitmask')
+    for day, booked_count, mask in occupancy_rows:
+        booked_counts[day] = booked_count
+        occupied_slots[day] = decode_slots(calendar_id, mask)
+
+    # More bookings than slots set: some are at untracked (free-form) times
+    untracked_days = [
+        day for day, booked_count in booked_counts.items() if booked_count > len(occupied_slots[day])
+    ] if uses_time_slots else []
+    if untracked_days:
+        for day, booking_time in Booking.objects.filter(
+            calendar_id=calendar_id,
+            booking_date__in=untracked_days
+        ).values_list('booking_date', 'booking_time'):
+            occupied_slots[day].add(normalize_slot(booking_time))
+
+    holidays = set(Holiday.objects.filter(
+        calendar_id=calendar_id,
+        holiday_date__range=(first_day, last_day)
+    ).values_list('holiday_date', flat=True))
+
+    days = []
+    day = first_day
+    while day <= last_day:
+        booked_count = booked_counts[day]
+        free_slots = None
+        remaining = None
+        if daily_limit is not None:
+            remaining = max(daily_limit - booked_count, 0)
+        if allowed_slots:
+            free_slots = [slot for slot in allowed_slots if normalize_slot(slot) not in occupied_slots[day]]
+            remaining = len(free_slots)
+        is_holiday = day in holidays
+        days.append({
+            'date': day.isoformat(),
+            'is_holiday': is_holiday,
+            'bookable': day >= earliest_bookable and not is_holiday and remaining != 0,
+            'booked_count': booked_count,
+            # None: no daily limit on this calendar
+            'remaining': remaining,
+            'free_slots': free_slots,
+            'occupied_slots': sorted(occupied_slots[day]) if uses_time_slots else None,
+        })
+        day += timedelta(days=1)
+
+    return {
+        'calendar_id': calendar_id,
+        'month': f'{year:04d}-{month:02d}',
+        'daily_limit': daily_limit,
+        'time_slots': allowed_slots,
+        'days': days,
+    }
+
+
+def get_month_availability(calendar_id, year, month):
+    """compute_month_availability(), cached until the calendar's next booking/holiday write"""
+    today = date.today()
+    cache_key = AVAILABILITY_CACHE_KEY.format(
+        calendar_id=calendar_id,
+        month=f'{year:04d}-{month:02d}',
+        version=get_calendar_version(calendar_id),
+        # Days become unbookable as time passes
+        today=today.isoformat(),
+    )
+    availability = cache.get(cache_key)
+    if availability is None:
+        availability = compute_month_availability(calendar_id, year, month, today=today)
+        cache.set(cache_key, availability, getattr(settings, 'AVAILABILITY_CACHE_TTL', 300))
+    return availability
+
+
+def _next_slot_windows(start, end):
+    size = NEXT_SLOTS_WINDOW_DAYS
+    while start <= end:
+        window_end = min(start + timedelta(days=size - 1), end)
+        yield start, window_end
+        start = window_end + timedelta(days=1)
+        size *= 2
+
+
+def _iter_free_slots(calendar_id, start, end):
+    """(day, time) pairs free between start and end, read window by window"""
+    daily_limit = CALENDAR_DAILY_LIMITS.get(calendar_id)
+    slots = get_occupancy_slots(calendar_id) if calendar_id in TIME_SLOT_CALENDARS else []
+    slot_bits = [(slot, slot_mask(calendar_id, slot)) for slot in slots]
+
+    for window_start, window_end in _next_slot_windows(start, end):
+        occupancy = {
+            day: (booked_count, mask)
+            for day, booked_count, mask in DailyOccupancy.objects.filter(
+                calendar_id=calendar_id,
+                day__range=(window_start, window_end),
+                booked_count__gt=0,
+            ).values_list('day', 'booked_count', 'occupied_slots_bitmask')
+        }
+        holidays = set(Holiday.objects.filter(
+            calendar_id=calendar_id,
+            holiday_date__range=(window_start, window_end)
+        ).values_list('holiday_date', flat=True))
+
+        day = window_start
+        while day <= window_end:
+            booked_count, mask = occupancy.get(day, (0, 0))
+            if day.weekday() != 6 and day not in holidays and (daily_limit is None or booked_count < daily_limit):
+                if slot_bits:
+                    for slot, bit in slot_bits:
+                        if not mask & bit:
+                            yield day, slot
+                else:
+                    yield day, None
+            day += timedelta(days=1)
+
+
+def find_next_free_slots(calendar_id, start_date=None, count=5, today=None):
+    """
+    The next `count` free (date, time) pairs of a calendar from start_date, with the
+    rules of BookingSerializer.validate: no bookings for today or tomorrow, none on
+    holidays, CALENDAR_DAILY_LIMITS, and one booking per slot on the slot calendars
+    (ALLOWED_TIME_SLOTS, or the booking form's times on Metré). Sundays are skipped.
+    Calendars without slots return time None (one entry per day with room left).
+    `exhausted`: fewer than `count` pairs are free up to `until`, the search horizon.
+    """
+    today = today or date.today()
+    start = max(start_date or today, today + timedelta(days=2))
+    end = start + timedelta(days=NEXT_SLOTS_HORIZON_DAYS)
+    slots = [
+        {'date': day.isoformat(), 'time': time}
+        for day, time in islice(_iter_free_slots(calendar_id, start, end), count)
+    ]
+    return {
+        'calendar_id': calendar_id,
+        'from': start.isoformat(),
+        'slots': slots,
+        'exhausted': len(slots) < count,
+        'until': end.isoformat(),
+    }
+
+
+def get_next_free_slots(calendar_id, start_date=None, count=5):
+    """find_next_free_slots(), cached until the calendar's next booking/holiday write"""
+    today = date.today()
+    cache_key = NEXT_SLOTS_CACHE_KEY.format(
+        calendar_id=calendar_id,
+        start=start_date.isoformat() if start_date else '',
+        count=count,
+        version=get_calendar_version(calendar_id),
+        today=today.isoformat(),
+    )
+    result = cache.get(cache_key)
+    if result is None:
+        result = find_next_free_slots(calendar_id, start_date, count, today=today)
+        cache.set(cache_key, result, getattr(settings, 'AVAILABILITY_CACHE_TTL', 300))
+    return result
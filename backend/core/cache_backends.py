@@ -0,0 +1,204 @@
+"""
+SQLite cache backend shared by every process on the host.
+
+LocMemCache gives each gunicorn worker its own cache, so throttle counters,
+cached users, data versions and cached responses differ from one worker to the
+next. SQLiteCache keeps the entries in a single SQLite file (WAL mode) that all
+workers open, without needing a cache server:
+
+    CACHES = {'default': {
+        'BACKEND': 'core.cache_backends.SQLiteCache',
+        'LOCATION': '/path/to/cache.sqlite3',
+        'OPTIONS': {'MAX_ENTRIES': 10000, 'CULL_FREQUENCY': 3},
+    }}
+
+- Entries expire after their timeout (expired rows are ignored, then removed when culling)
+- add() and incr() are atomic across processes (data versions and counters rely on it)
+- Every CULL_EVERY sets, expired rows are deleted and, above MAX_ENTRIES, the
+  entries closest to expiry are evicted (entries without a timeout go last)
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+# SQLite limits the number of bound parameters per statement
+MAX_QUERY_KEYS = 500
+
+
+class SQLiteCache(BaseCache):
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._path = location
+        options = params.get('OPTIONS', {})
+        self._cull_every = int(options.get('CULL_EVERY', 100))
+        self._busy_timeout = float(options.get('BUSY_TIMEOUT', 5))
+        self._local = threading.local()
+        self._sets = 0
+
+    def _connection(self):
+        # One connection per thread, reopened in forked worker processes
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None and self._local.pid == os.getpid():
+            return connection
+
+        directory = os.path.dirname(os.path.abspath(self._path))
+        os.makedirs(directory, exist_ok=True)
+        connection = sqlite3.connect(self._path, timeout=self._busy_timeout, isolation_level=None, check_same_thread=False)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS cache_entry '
+            '(key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL) WITHOUT ROWID'
+        )
+        connection.execute('CREATE INDEX IF NOT EXISTS cache_entry_expires ON cache_entry (expires)')
+        self._local.connection = connection
+        self._local.pid = os.getpid()
+        return connection
+
+    @contextmanager
+    def _write(self):
+        """Transaction holding the database write lock (serializes read-modify-write across processes)"""
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            yield connection
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+
+    @staticmethod
+    def _expired(expires, now=None):
+        return expires is not None and expires <= (now or time.time())
+
+    def _dumps(self, value):
+        return pickle.dumps(value, self.pickle_protocol)
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        row = self._connection().execute(
+            'SELECT value, expires FROM cache_entry WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None or self._expired(row[1]):
+            return default
+        return pickle.loads(row[0])
+
+    def get_many(self, keys, version=None):
+        key_map = {self.make_and_validate_key(key, version=version): key for key in keys}
+        if not key_map:
+            return {}
+        connection = self._connection()
+        now = time.time()
+        found = {}
+        cache_keys = list(key_map)
+        for start in range(0, len(cache_keys), MAX_QUERY_KEYS):
+            chunk = cache_keys[start:start + MAX_QUERY_KEYS]
+            rows = connection.execute(
+                'SELECT key, value, expires FROM cache_entry WHERE key IN (%s)' % ', '.join('?' * len(chunk)),
+                chunk,
+            )
+            for cache_key, value, expires in rows:
+                if not self._expired(expires, now):
+                    found[key_map[cache_key]] = pickle.loads(value)
+        # Keep the order of the requested keys
+        return {key: found[key] for key in keys if key in found}
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        row = self._connection().execute('SELECT expires FROM cache_entry WHERE key = ?', (key,)).fetchone()
+        return row is not None and not self._expired(row[0])
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._connection().execute(
+            'INSERT OR REPLACE INTO cache_entry (key, value, expires) VALUES (?, ?, ?)',
+            (key, self._dumps(value), self.get_backend_timeout(timeout)),
+        )
+        self._maybe_cull()
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        expires = self.get_backend_timeout(timeout)
+        rows = [
+            (self.make_and_validate_key(key, version=version), self._dumps(value), expires)
+            for key, value in data.items()
+        ]
+        with self._write() as connection:
+            connection.executemany('INSERT OR REPLACE INTO cache_entry (key, value, expires) VALUES (?, ?, ?)', rows)
+        self._maybe_cull()
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        # Inserts, or replaces an expired entry; a live entry is left untouched
+        cursor = self._connection().execute(
+            'INSERT INTO cache_entry (key, value, expires) VALUES (?, ?, ?) '
+            'ON CONFLICT (key) DO UPDATE SET value = excluded.value, expires = excluded.expires '
+            'WHERE cache_entry.expires IS NOT NULL AND cache_entry.expires <= ?',
+            (key, self._dumps(value), self.get_backend_timeout(timeout), time.time()),
+        )
+        added = cursor.rowcount == 1
+        if added:
+            self._maybe_cull()
+        return added
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        with self._write() as connection:
+            row = connection.execute('SELECT value, expires FROM cache_entry WHERE key = ?', (key,)).fetchone()
+            if row is None or self._expired(row[1]):
+                raise ValueError("Key '%s' not found" % key)
+            new_value = pickle.loads(row[0]) + delta
+            connection.execute('UPDATE cache_entry SET value = ? WHERE key = ?', (self._dumps(new_value), key))
+        return new_value
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        cursor = self._connection().execute(
+            'UPDATE cache_entry SET expires = ? WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (self.get_backend_timeout(timeout), key, time.time()),
+        )
+        return cursor.rowcount == 1
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._connection().execute('DELETE FROM cache_entry WHERE key = ?', (key,)).rowcount == 1
+
+    def delete_many(self, keys, version=None):
+        rows = [(self.make_and_validate_key(key, version=version),) for key in keys]
+        with self._write() as connection:
+            connection.executemany('DELETE FROM cache_entry WHERE key = ?', rows)
+
+    def clear(self):
+        self._connection().execute('DELETE FROM cache_entry')
+
+    def _maybe_cull(self):
+        self._sets += 1
+        if self._sets % self._cull_every == 0:
+            self.cull()
+
+    def cull(self):
+        """Delete expired entries, then evict down to MAX_ENTRIES if the cache is still too big"""
+        with self._write() as connection:
+            connection.execute(
+                'DELETE FROM cache_entry WHERE expires IS NOT NULL AND expires <= ?', (time.time(),)
+            )
+            count = connection.execute('SELECT COUNT(*) FROM cache_entry').fetchone()[0]
+            if count <= self._max_entries:
+                return
+            if self._cull_frequency == 0:
+                connection.execute('DELETE FROM cache_entry')
+                return
+            # Back under the limit, plus 1/CULL_FREQUENCY of it so the next sets do not cull again
+            evict = count - self._max_entries + self._max_entries // self._cull_frequency
+            connection.execute(
+                'DELETE FROM cache_entry WHERE key IN ('
+                'SELECT key FROM cache_entry ORDER BY expires IS NULL, expires LIMIT ?)',
+                (evict,),
+            )
@@ -0,0 +1,75 @@
+"""
+In-process calendar registry.
+
+Clients still send both spellings of a calendar id: the canonical slug
+("calendar1") and the legacy short id ("1"). Everything stored in the database
+uses the canonical slug, so the API edge resolves incoming ids once with
+resolve_calendar_id() and every query becomes a single-key equality lookup.
+
+The registry is read from the Calendar table once per process and cached; it
+is cleared by the Calendar post_save/post_delete signals.
+"""
+import logging
+from functools import lru_cache
+
+from django.db import DatabaseError
+
+logger = logging.getLogger(__name__)
+
+# Used until the Calendar table has been migrated and seeded
+DEFAULT_CALENDARS = (
+    (1, 'calendar1', 'Pose'),
+    (2, 'calendar2', 'Metré'),
+    (3, 'calendar3', 'SAV'),
+)
+
+
+@lru_cache(maxsize=1)
+def _registry():
+    """Return (aliases, labels): accepted spelling -> canonical slug, canonical slug -> display name"""
+    from .models import Calendar
+
+    try:
+        rows = list(Calendar.objects.values_list('id', 'slug', 'name'))
+    except DatabaseError as e:
+        logger.warning(f"Calendar registry unavailable, using defaults: {e}")
+        rows = []
+    if not rows:
+        rows = list(DEFAULT_CALENDARS)
+
+    aliases = {}
+    labels = {}
+    for pk, slug, name in rows:
+        aliases[slug] = slug
+        aliases[str(pk)] = slug
+        labels[slug] = name
+    return aliases, labels
+
+
+def resolve_calendar_id(calendar_id):
+    """
+    Return the canonical calendar_id for any accepted spelling.
+    Unknown ids are returned unchanged (stripped) so they keep matching exactly.
+    """
+    if calendar_id is None:
+        return None
+    value = str(calendar_id).strip()
+    aliases, _ = _registry()
+    return aliases.get(value, value)
+
+
+def get_calendar_label(calendar_id):
+    """Display name of a calendar (e.g. 'Pose'), falling back to the id itself"""
+    _, labels = _registry()
+    canonical_id = resolve_calendar_id(calendar_id)
+    return labels.get(canonical_id, calendar_id)
+
+
+def get_calendar_ids():
+    """Canonical ids of all registered calendars, in registry order"""
+    _, labels = _registry()
+    return list(labels)
+
+
+def clear_calendar_cache():
+    _registry.cache_clear()
@@ -0,0 +1,288 @@
+"""
+Booking capacity lookups.
+
+DailyOccupancy holds one row per (calendar, day) with the number of bookings and
+their time slots as a bitmask. The row is kept up to date in the same transaction
+as every booking write (core.signals for single writes, refresh_occupancy() for the
+bulk ones), so BookingSerializer.validate reads the holiday flag and the day's
+occupancy in a single round-trip instead of counting bookings.
+
+Bit i of the mask is the i-th slot of get_occupancy_slots(). Times outside those
+slots (free-form times) are counted but have no bit: a conflict on them is checked
+against the bookings of the day, in the same query. Changing the slot lists requires
+`manage.py rebuild_occupancy`.
+
+Booking writes additionally lock the (calendar, day) DailyOccupancy row before
+reading it, so that two concurrent requests for the same day are serialized and
+only one of them can take the last place.
+"""
+from collections import namedtuple
+from functools import lru_cache
+
+from django.db import IntegrityError, connections, router, transaction
+from django.db.models import Case, CharField, Count, Exists, F, Q, Value, When
+from django.db.models.functions import Lower, Trim
+from django.utils import timezone
+
+from .models import Booking, DailyOccupancy, Holiday
+
+DayOccupancy = namedtuple('DayOccupancy', ['is_holiday', 'booked_count', 'occupied_slots'])
+
+# Metré times offered by the booking form; its bookings are not limited to them
+FORM_TIME_SLOTS = {
+    'calendar2': ['8:00', '9:30', '11:00', '12:30', '14:00', '15:30', '17:00', '18:30'],
+}
+
+
+def normalize_slot(booking_time):
+    """Slots are compared case-insensitively and without surrounding whitespace"""
+    return (booking_time or '').strip().lower()
+
+
+def get_occupancy_slots(calendar_id):
+    """Slots tracked by the occupancy bitmask of a calendar, in bit order"""
+    from .serializers import ALLOWED_TIME_SLOTS
+    return ALLOWED_TIME_SLOTS.get(calendar_id) or FORM_TIME_SLOTS.get(calendar_id) or []
+
+
+@lru_cache(maxsize=None)
+def _slot_bits(calendar_id):
+    return {normalize_slot(slot): 1 << bit for bit, slot in enumerate(get_occupancy_slots(calendar_id))}
+
+
+def slot_mask(calendar_id, booking_time):
+    """Bit of a booking time in the calendar's occupancy bitmask, 0 for untracked times"""
+    return _slot_bits(calendar_id).get(normalize_slot(booking_time), 0)
+
+
+def decode_slots(calendar_id, mask):
+    """Normalized slots set in an occupancy bitmask"""
+    return {slot for slot, bit in _slot_bits(calendar_id).items() if mask & bit}
+
+
+def _day_bookings(calendar_id, day, slot):
+    return Booking.objects.annotate(slot=Lower(Trim('booking_time'))).filter(
+        calendar_id=calendar_id,
+        booking_date=day,
+        slot=slot,
+    )
+
+
+def get_day_occupancy(calendar_id, booking_date, exclude=None, booking_time=None):
+    """
+    Return DayOccupancy(is_holiday, booked_count, occupied_slots) for one calendar day.
+    occupied_slots holds normalized booking_time values (see normalize_slot); pass the
+    booking_time being checked so that an untracked time is looked up too.
+    `exclude` is the booking being updated: it does not count against itself.
+    """
+    holidays = Holiday.objects.filter(
+        calendar_id=calendar_id,
+        holiday_date=booking_date
+    ).annotate(
+        kind=Value('holiday', output_field=CharField()),
+        count=Value(0),
+        mask=Value(0),
+        slot=Value('', output_field=CharField()),
+    ).values_list('kind', 'count', 'mask', 'slot')
+
+    occupancy = DailyOccupancy.objects.filter(
+        calendar_id=calendar_id,
+        day=booking_date
+    ).annotate(
+        kind=Value('occupancy', output_field=CharField()),
+        slot=Value('', output_field=CharField()),
+    ).values_list('kind', 'booked_count', 'occupied_slots_bitmask', 'slot')
+    parts = [occupancy.order_by()]
+
+    if booking_time is not None and not slot_mask(calendar_id, booking_time):
+        # No bit for this time: fetch the bookings holding it (usually none)
+        taken = _day_bookings(calendar_id, booking_date, normalize_slot(booking_time))
+        if exclude is not None and exclude.pk is not None:
+            taken = taken.exclude(pk=exclude.pk)
+        parts.append(taken.annotate(
+            kind=Value('booking', output_field=CharField()),
+            count=Value(0),
+            mask=Value(0),
+        ).values_list('kind', 'count', 'mask', 'slot').order_by())
+
+    is_holiday = False
+    booked_count = 0
+    mask = 0
+    occupied_slots = set()
+    for kind, count, row_mask, slot in holidays.order_by().union(*parts, all=True):
+        if kind == 'holiday':
+            is_holiday = True
+        elif kind == 'occupancy':
+            booked_count, mask = count, row_mask
+        else:
+            occupied_slots.add(slot)
+
+    if exclude is not None and exclude.pk is not None and (exclude.calendar_id, exclude.booking_date) == (calendar_id, booking_date):
+        booked_count = max(booked_count - 1, 0)
+        mask &= ~slot_mask(calendar_id, exclude.booking_time)
+
+    occupied_slots |= decode_slots(calendar_id, mask)
+    return DayOccupancy(is_holiday, booked_count, occupied_slots)
+
+
+def lock_calendar_day(calendar_id, day):
+    """
+    Take an exclusive lock on the (calendar, day) row until the current transaction ends.
+    Must be called inside transaction.atomic(), before reading the day's occupancy.
+    """
+    if not transaction.get_connection(router.db_for_write(DailyOccupancy)).in_atomic_block:
+        raise transaction.TransactionManagementError('lock_calendar_day() must be called inside transaction.atomic().')
+
+    connection = connections[router.db_for_write(DailyOccupancy)]
+    lookup = {'calendar_id': calendar_id, 'day': day}
+
+    if not connection.features.has_select_for_update:
+        # SQLite ignores FOR UPDATE: writing the row takes the database write lock instead
+        if not DailyOccupancy.objects.filter(**lookup).update(locked_at=timezone.now()):
+            DailyOccupancy.objects.create(**lookup)
+        return
+
+    for _ in range(2):
+        try:
+            DailyOccupancy.objects.select_for_update().get(**lookup)
+            return
+        except DailyOccupancy.DoesNotExist:
+            try:
+                with transaction.atomic():
+                    DailyOccupancy.objects.create(**lookup)
+                return
+            except IntegrityError:
+                # Created concurrently by another request: wait for its lock on the next pass
+                continue
+    raise IntegrityError(f'Could not lock calendar day {calendar_id} {day}')
+
+
+def update_occupancy(calendar_id, day, count_delta=0, added_time=None, removed_time=None):
+    """
+    Apply one booking write to the day's DailyOccupancy row with a single UPDATE, in
+    the caller's transaction: count_delta bookings, the slot of added_time set and the
+    slot of removed_time cleared unless another booking of the day still holds it
+    (call after the write, so the booking itself no longer matches).
+    """
+    added_mask = slot_mask(calendar_id, added_time) if added_time is not None else 0
+    removed_mask = slot_mask(calendar_id, removed_time) if removed_time is not None else 0
+    changes = {}
+    if count_delta:
+        # Never below zero, even on a drifted row (booked_count is unsigned on MySQL)
+        changes['booked_count'] = Case(
+            When(booked_count__gte=-count_delta, then=F('booked_count') + count_delta),
+            default=Value(0),
+        )
+    mask = F('occupied_slots_bitmask')
+    if removed_mask and removed_mask != added_mask:
+        mask = Case(
+            When(Exists(_day_bookings(calendar_id, day, normalize_slot(removed_time))), then=mask),
+            default=mask.bitand(~removed_mask),
+        )
+    if added_mask:
+        mask = mask.bitor(added_mask)
+    if added_mask or (removed_mask and removed_mask != added_mask):
+        changes['occupied_slots_bitmask'] = mask
+    if not changes:
+        return
+
+    lookup = {'calendar_id': calendar_id, 'day': day}
+    if DailyOccupancy.objects.filter(**lookup).update(**changes) or count_delta <= 0:
+        return
+    try:
+        with transaction.atomic():
+            DailyOccupancy.objects.create(booked_count=count_delta, occupied_slots_bitmask=added_mask, **lookup)
+    except IntegrityError:
+        # Created concurrently: count on it
+        DailyOccupancy.objects.filter(**lookup).update(**changes)
+
+
+def compute_occupancy(bookings):
+    """{(calendar_id, day): (booked_count, bitmask)} of a Booking queryset, from one grouped query"""
+    occupancy = {}
+    rows = bookings.values('calendar_id', 'booking_date', 'booking_time').annotate(count=Count('id')).order_by()
+    for row in rows:
+        key = (row['calendar_id'], row['booking_date'])
+        count, mask = occupancy.get(key, (0, 0))
+        occupancy[key] = (count + row['count'], mask | slot_mask(row['calendar_id'], row['booking_time']))
+    return occupancy
+
+
+def _days_filter(days, date_field):
+    condition = Q()
+    for day_calendar_id in sorted({key[0] for key in days}):
+        dates = sorted(day for key_calendar_id, day in days if key_calendar_id == day_calendar_id)
+        condition |= Q(calendar_id=day_calendar_id, **{f'{date_field}__in': dates})
+    return condition
+
+
+def lock_occupancy_days(days):
+    """
+    Lock the DailyOccupancy rows of (calendar_id, day) pairs until the current transaction
+    ends, creating the missing ones. Bulk writes call it before touching the bookings: the
+    rows are locked in key order and before any booking row, as the API writes do
+    (lock_calendar_day), so a bulk write and a booking request on the same day run one
+    after the other instead of overwriting each other's count.
+    """
+    if not transaction.get_connection(router.db_for_write(DailyOccupancy)).in_atomic_block:
+        raise transaction.TransactionManagementError('lock_occupancy_days() must be called inside transaction.atomic().')
+    days = set(days)
+    if not days:
+        return
+    rows = DailyOccupancy.objects.filter(_days_filter(days, 'day'))
+    if not connections[router.db_for_write(DailyOccupancy)].features.has_select_for_update:
+        # SQLite ignores FOR UPDATE: writing first takes the database write lock instead
+        rows.update(locked_at=timezone.now())
+    missing = days - set(rows.values_list('calendar_id', 'day'))
+    if missing:
+        DailyOccupancy.objects.bulk_create(
+            [DailyOccupancy(calendar_id=key[0], day=key[1]) for key in sorted(missing)],
+            ignore_conflicts=True,
+        )
+    list(rows.order_by('calendar_id', 'day').select_for_update().values_list('pk', flat=True))
+
+
+def refresh_occupancy(days=None, calendar_id=None, fix=True):
+    """
+    Recompute DailyOccupancy from the bookings, for the given (calendar_id, day) pairs
+    or for every day (of one calendar), and return the rows that were wrong as
+    {(calendar_id, day): (stored, expected)}, each a (booked_count, bitmask) pair.
+    Used by the bulk writes, which send no signals; fix=False only reports.
+    With fix, the rows are locked before the bookings are counted (see
+    lock_occupancy_days), so a booking written meanwhile is counted, not overwritten.
+    """
+    bookings = Booking.objects.all()
+    rows = DailyOccupancy.objects.all()
+    if days is not None:
+        days = set(days)
+        if not days:
+            return {}
+        bookings = bookings.filter(_days_filter(days, 'booking_date'))
+        rows = rows.filter(_days_filter(days, 'day'))
+        if fix:
+            lock_occupancy_days(days)
+    elif fix:
+        rows = rows.order_by('calendar_id', 'day').select_for_update()
+    if calendar_id:
+        bookings = bookings.filter(calendar_id=calendar_id)
+        rows = rows.filter(calendar_id=calendar_id)
+
+    stored = {(row.calendar_id, row.day): row for row in rows}
+    expected = compute_occupancy(bookings)
+    wrong = {}
+    to_create = []
+    to_update = []
+    for key in set(expected) | set(stored):
+        values = expected.get(key, (0, 0))
+        row = stored.get(key)
+        if row is None:
+            wrong[key] = ((0, 0), values)
+            to_create.append(DailyOccupancy(calendar_id=key[0], day=key[1], booked_count=values[0], occupied_slots_bitmask=values[1]))
+        elif (row.booked_count, row.occupied_slots_bitmask) != values:
+            wrong[key] = ((row.booked_count, row.occupied_slots_bitmask), values)
+            row.booked_count, row.occupied_slots_bitmask = values
+            to_update.append(row)
+    if fix:
+        DailyOccupancy.objects.bulk_create(to_create, batch_size=1000)
+        DailyOccupancy.objects.bulk_update(to_update, ['booked_count', 'occupied_slots_bitmask'], batch_size=1000)
+    return wrong
@@ -0,0 +1,133 @@
+"""
+Incremental "changes since" sync for bookings and holidays.
+
+Every booking/holiday save or delete appends a ChangeLogEntry in the same
+transaction (see core.signals). GET /api/changes/?since=<cursor> replays the
+entries after the cursor, collapsed to the latest action per row: current
+rows for inserts/updates and ids for deletes, plus the cursor to send next.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import Booking, ChangeLogEntry, Holiday
+from .serializers import BookingSerializer, HolidaySerializer
+
+KINDS = {
+    ChangeLogEntry.KIND_BOOKING: (Booking, BookingSerializer, 'bookings'),
+    ChangeLogEntry.KIND_HOLIDAY: (Holiday, HolidaySerializer, 'holidays'),
+}
+
+
+def _change_entry(instance, action):
+    kind = ChangeLogEntry.KIND_BOOKING if isinstance(instance, Booking) else ChangeLogEntry.KIND_HOLIDAY
+    return ChangeLogEntry(
+        kind=kind,
+        object_id=instance.pk,
+        calendar_id=instance.calendar_id,
+        action=action,
+    )
+
+
+def record_change(instance, action):
+    """Append a change log entry for a Booking or Holiday write"""
+    entry = _change_entry(instance, action)
+    entry.save()
+    return entry
+
+
+def record_move(instance, calendar_id):
+    """
+    Tombstone for the calendar a Booking or Holiday leaves when it is saved under
+    `calendar_id`; call it before the save, in the same transaction. Feeds of the old
+    calendar then drop the row, and in the unfiltered feed the save's entry comes last.
+    """
+    if calendar_id != instance.calendar_id:
+        return record_change(instance, ChangeLogEntry.ACTION_DELETE)
+
+
+def record_changes(instances, action):
+    """
+    Append change log entries for rows written with bulk_create/bulk_update, which send
+    no signals. Callers also bump the calendar versions (core.versions) themselves.
+    """
+    return ChangeLogEntry.objects.bulk_create([_change_entry(instance, action) for instance in instances])
+
+
+def get_head_cursor(calendar_id=None):
+    """Cursor of the latest change (0 when nothing was ever logged)"""
+    entries = ChangeLogEntry.objects.all()
+    if calendar_id:
+        entries = entries.filter(calendar_id=calendar_id)
+    return entries.aggregate(head=Max('id'))['head'] or 0
+
+
+def parse_cursor(value):
+    """Cursors are the decimal id of a change log entry; raises ValueError otherwise"""
+    cursor = int(value)
+    if cursor < 0:
+        raise ValueError(value)
+    return cursor
+
+
+def next_cursor(since, entries, missing_before):
+    """
+    Cursor to send after a read of the change log: `entries` are the (id, created_at) pairs
+    after `since`, of every calendar, from a single query (oldest first).
+
+    Auto-increment ids are handed out before commit, so a lower id can become visible after
+    a higher one: the cursor stops before the first id missing from the read, however long
+    its transaction takes to commit. A missing id is only passed once the entry after it was
+    created before `missing_before` (CHANGES_SETTLE_SECONDS ago, longer than any writer
+    transaction): its transaction was rolled back and the id will never appear.
+    """
+    cursor = since
+    for entry_id, created_at in entries:
+        if entry_id != cursor + 1 and created_at > missing_before:
+            break
+        cursor = entry_id
+    return cursor
+
+
+def get_changes_since(since, calendar_id=None, limit=None):
+    """
+    Changes after `since`, from at most `limit` log entries per call (has_more tells the
+    client to call again with the returned cursor).
+
+    The log is read for every calendar in one statement (a single snapshot) and filtered
+    here, so that ids still missing from it are noticed: the cursor stops before them (see
+    next_cursor) and the entries after them are returned again on the next call, which is
+    harmless because replaying an upsert or a delete is idempotent. has_more is only set
+    when the cursor moved.
+    """
+    if limit is None:
+        limit = getattr(settings, 'CHANGES_PAGE_SIZE', 500)
+    missing_before = timezone.now() - timedelta(seconds=getattr(settings, 'CHANGES_SETTLE_SECONDS', 300))
+
+    entries = list(ChangeLogEntry.objects.filter(id__gt=since).order_by('id').values_list(
+        'id', 'calendar_id', 'kind', 'object_id', 'action', 'created_at'
+    )[:limit + 1])
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    cursor = next_cursor(since, [(entry[0], entry[5]) for entry in entries], missing_before)
+    has_more = has_more and cursor != since
+
+    latest_actions = {}
+    for entry_id, entry_calendar_id, kind, object_id, action, created_at in entries:
+        if not calendar_id or entry_calendar_id == calendar_id:
+            latest_actions[(kind, object_id)] = action
+
+    result = {'cursor': str(cursor), 'has_more': has_more, 'deleted': {}}
+    for kind, (model, serializer_class, key) in KINDS.items():
+        upserted = [object_id for (entry_kind, object_id), action in latest_actions.items()
+                    if entry_kind == kind and action != ChangeLogEntry.ACTION_DELETE]
+        deleted = [object_id for (entry_kind, object_id), action in latest_actions.items()
+                   if entry_kind == kind and action == ChangeLogEntry.ACTION_DELETE]
+        # Rows deleted after this page are left out; their delete entry comes with a later page
+        rows = model.objects.filter(pk__in=upserted).order_by('pk') if upserted else []
+        result[key] = serializer_class(rows, many=True).data
+        result['deleted'][key] = deleted
+    return result
@@ -0,0 +1,105 @@
+"""
+Conditional GET for the list endpoints.
+
+The booking, holiday and user listings only change when a write bumps their
+data version (core.versions), so their validators are computed from the
+version alone: a strong ETag hashing the view, the normalized query string and
+the version(s), and Last-Modified from the time of the last write.
+
+Polling clients (the admin dashboards refresh these lists continuously) send
+the ETag back in If-None-Match; when nothing changed the view answers 304
+after a single cache lookup, before the queryset is built or evaluated.
+Views that set response_cache_name also serve full responses from the
+server-side response cache (core.response_cache), keyed by the same ETag.
+"""
+import hashlib
+import math
+
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+from .calendars import resolve_calendar_id
+from .response_cache import cache_response, get_cached_response, get_response_cache_ttl, record_cache_event
+from .versions import ALL_CALENDARS_SCOPE, calendar_scope, get_versions
+
+
+def normalized_query(request):
+    """Query parameters as a sorted tuple of (name, values) so equivalent URLs share validators"""
+    params = request.query_params
+    return tuple((name, tuple(params.getlist(name))) for name in sorted(params))
+
+
+class ConditionalListMixin:
+    """
+    Adds ETag/Last-Modified to list GETs and answers matching
+    If-None-Match/If-Modified-Since with 304 Not Modified.
+    Views declare the data they list with get_version_scopes().
+    """
+    # Set to cache whole responses server-side (the name is used for hit/miss metrics)
+    response_cache_name = None
+
+    def get_version_scopes(self):
+        """Version scopes whose writes change this listing"""
+        raise NotImplementedError
+
+    def get_list_validators(self, request):
+        """Return (etag, last_modified) for the current request"""
+        versions, last_modified = get_versions(self.get_version_scopes())
+        fingerprint = repr((
+            type(self).__name__,
+            # Pagination links are absolute URLs
+            request.get_host(),
+            normalized_query(request),
+            sorted(versions.items()),
+        ))
+        etag = '"%s"' % hashlib.sha1(fingerprint.encode()).hexdigest()
+        # HTTP dates have a one-second resolution: round up so a write later in
+        # the same second as a previous one still moves Last-Modified forward
+        return etag, math.floor(last_modified) + 1
+
+    def set_validators(self, response, etag, last_modified):
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        # Let browsers keep the body but revalidate it on every poll
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ['Authorization'])
+        return response
+
+    def list(self, request, *args, **kwargs):
+        etag, last_modified = self.get_list_validators(request)
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            return self.set_validators(not_modified, etag, last_modified)
+        response = self.get_list_response(request, etag, *args, **kwargs)
+        if response.status_code == 200:
+            self.set_validators(response, etag, last_modified)
+        return response
+
+    def get_list_response(self, request, etag, *args, **kwargs):
+        if not self.response_cache_name or not get_response_cache_ttl():
+            return super().list(request, *args, **kwargs)
+
+        data = get_cached_response(etag)
+        if data is not None:
+            record_cache_event(self.response_cache_name, hit=True)
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+
+        record_cache_event(self.response_cache_name, hit=False)
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache_response(etag, response.data)
+        response['X-Cache'] = 'MISS'
+        return response
+
+
+class CalendarConditionalListMixin(ConditionalListMixin):
+    """Listings filtered by an optional ?calendar_id= (bookings, holidays)"""
+
+    def get_version_scopes(self):
+        calendar_id = self.request.query_params.get('calendar_id')
+        if calendar_id:
+            return [calendar_scope(resolve_calendar_id(calendar_id))]
+        return [ALL_CALENDARS_SCOPE]
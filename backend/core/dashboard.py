@@ -0,0 +1,99 @@
+"""
+Cross-calendar dashboard summary.
+
+Replaces the admin dashboard's per-calendar downloads of every booking and holiday
+with four small queries: booking counts per calendar (summed from the DailyOccupancy
+day rows), the newest bookings, the top clients and the recently added holidays
+(each LIMITed on the database side).
+"""
+from datetime import date, timedelta
+
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .calendars import get_calendar_ids, get_calendar_label
+from .models import Booking, DailyOccupancy, Holiday
+
+# The dashboard ranks the SAV calendar's clients
+TOP_CLIENTS_CALENDAR_ID = 'calendar3'
+RECENT_HOLIDAYS_DAYS = 7
+# Upper bound of the recent lists when they are cut by date (`since`) instead of `limit`
+MAX_RECENT_SINCE = 200
+
+
+def _recent(queryset, size, total=False):
+    """The first `size` rows of a queryset and, with total, its row count (counted only when cut)"""
+    rows = list(queryset[:size])
+    if not total or len(rows) < size:
+        return rows, len(rows)
+    return rows, queryset.count()
+
+
+def build_dashboard_summary(limit=10, top_clients_calendar_id=TOP_CLIENTS_CALENDAR_ID, today=None, since=None):
+    """
+    Summary payload of GET /api/dashboard/
+    With `since`, recent_bookings holds every booking created since then (and
+    recent_holidays every holiday of the last RECENT_HOLIDAYS_DAYS days), up to
+    MAX_RECENT_SINCE each instead of `limit`, along with their totals
+    (recent_bookings_total, recent_holidays_total) so that a cut list can say so.
+    """
+    today = today or date.today()
+    month_start = today.replace(day=1)
+    next_month_start = (month_start + timedelta(days=32)).replace(day=1)
+
+    # Summed from the per-day counts (DailyOccupancy) instead of counting bookings
+    counts = {
+        row['calendar_id']: row
+        for row in DailyOccupancy.objects.filter(booked_count__gt=0).values('calendar_id').annotate(
+            total=Coalesce(Sum('booked_count'), 0),
+            this_month=Coalesce(Sum('booked_count', filter=Q(day__gte=month_start, day__lt=next_month_start)), 0),
+            upcoming=Coalesce(Sum('booked_count', filter=Q(day__gte=today)), 0),
+        ).order_by()
+    }
+    calendar_ids = get_calendar_ids()
+    calendar_ids += sorted(calendar_id for calendar_id in counts if calendar_id not in calendar_ids)
+    calendars = []
+    for calendar_id in calendar_ids:
+        row = counts.get(calendar_id, {})
+        calendars.append({
+            'calendar_id': calendar_id,
+            'name': get_calendar_label(calendar_id),
+            'total': row.get('total', 0),
+            'this_month': row.get('this_month', 0),
+            'upcoming': row.get('upcoming', 0),
+        })
+
+    recent_size = MAX_RECENT_SINCE if since is not None else limit
+    bookings = Booking.objects.order_by('-created_at', '-id')
+    if since is not None:
+        bookings = bookings.filter(created_at__gte=since)
+    recent_bookings, recent_bookings_total = _recent(bookings.values(
+        'id', 'calendar_id', 'booking_date', 'booking_time', 'client_name', 'designer_name', 'created_at'
+    ), recent_size, total=since is not None)
+
+    top_clients = list(Booking.objects.filter(
+        calendar_id=top_clients_calendar_id
+    ).exclude(client_name='').values('client_name').annotate(
+        count=Count('id')
+    ).order_by('-count', 'client_name')[:limit])
+
+    recent_holidays, recent_holidays_total = _recent(Holiday.objects.filter(
+        created_at__gte=timezone.now() - timedelta(days=RECENT_HOLIDAYS_DAYS)
+    ).order_by('-created_at', '-id').values(
+        'id', 'calendar_id', 'holiday_date', 'description', 'created_at'
+    ), recent_size, total=since is not None)
+
+    summary = {
+        'month': month_start.strftime('%Y-%m'),
+        'days_in_month': (next_month_start - month_start).days,
+        'calendars': calendars,
+        'recent_bookings': recent_bookings,
+        'top_clients_calendar_id': top_clients_calendar_id,
+        'top_clients': top_clients,
+        'recent_holidays': recent_holidays,
+    }
+    if since is not None:
+        summary['recent_bookings_total'] = recent_bookings_total
+        summary['recent_holidays_total'] = recent_holidays_total
+    return summary
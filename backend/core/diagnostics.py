@@ -0,0 +1,100 @@
+"""
+Booking diagnostics for GET /api/bookings/debug/.
+
+The per-day booking counts are computed by the database (GROUP BY booking_date on
+the (calendar_id, booking_date) index), optionally within a date range. Only the
+over-capacity days, at most `limit` of them, have their bookings fetched, so the
+work and the response size depend on the limit, not on the calendar's history.
+Larger ranges are walked page by page with `next_start_date`. Ranges reaching
+archived dates (core.archive) also count the BookingArchive rows.
+"""
+from collections import Counter
+
+from django.db.models import Count
+
+from .archive import reaches_archive
+from .models import Booking, BookingArchive
+from .serializers import CALENDAR_DAILY_LIMITS
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+
+def get_default_min_count(calendar_id):
+    """Days above the calendar's daily limit; 2+ bookings on calendars without a limit"""
+    daily_limit = CALENDAR_DAILY_LIMITS.get(calendar_id)
+    return daily_limit + 1 if daily_limit is not None else 2
+
+
+def _filter_range(queryset, calendar_id, start_date, end_date):
+    queryset = queryset.filter(calendar_id=calendar_id)
+    if start_date:
+        queryset = queryset.filter(booking_date__gte=start_date)
+    if end_date:
+        queryset = queryset.filter(booking_date__lte=end_date)
+    return queryset
+
+
+def _count_days_with_archive(sources, min_count, limit):
+    """Per-day counts of each table (GROUP BY in the database), summed by date"""
+    day_totals = Counter()
+    for source in sources:
+        for booking_date, count in source.values('booking_date').annotate(
+            count=Count('id')
+        ).order_by().values_list('booking_date', 'count'):
+            day_totals[booking_date] += count
+    totals = {'total': sum(day_totals.values()), 'days': len(day_totals)}
+    day_counts = sorted((day, count) for day, count in day_totals.items() if count >= min_count)
+    return totals, day_counts[:limit + 1]
+
+
+def build_booking_diagnostics(calendar_id, start_date=None, end_date=None, limit=DEFAULT_LIMIT, min_count=None):
+    """Payload of GET /api/bookings/debug/ for one (canonical) calendar id"""
+    if min_count is None:
+        min_count = get_default_min_count(calendar_id)
+
+    bookings = _filter_range(Booking.objects.all(), calendar_id, start_date, end_date)
+    sources = [bookings]
+    if reaches_archive(calendar_id, start_date):
+        # Archived days are merged in memory: bounded by the number of days, not of bookings
+        sources.append(_filter_range(BookingArchive.objects.all(), calendar_id, start_date, end_date))
+        totals, day_counts = _count_days_with_archive(sources, min_count, limit)
+    else:
+        totals = bookings.aggregate(total=Count('id'), days=Count('booking_date', distinct=True))
+        # One extra day tells whether the range holds more over-capacity days than the limit
+        day_counts = list(bookings.values('booking_date').annotate(
+            count=Count('id')
+        ).filter(count__gte=min_count).order_by('booking_date').values_list('booking_date', 'count')[:limit + 1])
+    next_start_date = day_counts[limit][0] if len(day_counts) > limit else None
+    day_counts = day_counts[:limit]
+
+    dates = {
+        booking_date: {'date': str(booking_date), 'count': count, 'bookings': []}
+        for booking_date, count in day_counts
+    }
+    if dates:
+        rows = sorted(
+            row for source in sources for row in source.filter(booking_date__in=list(dates)).order_by(
+                'booking_date', 'booking_time', 'id'
+            ).values_list('booking_date', 'booking_time', 'id', 'client_name')
+        )
+        for booking_date, booking_time, pk, client_name in rows:
+            dates[booking_date]['bookings'].append({
+                'id': pk,
+                'date': str(booking_date),
+                'time': booking_time,
+                'client': client_name,
+                'calendar_id': calendar_id,
+            })
+
+    return {
+        'start_date': str(start_date) if start_date else None,
+        'end_date': str(end_date) if end_date else None,
+        'daily_limit': CALENDAR_DAILY_LIMITS.get(calendar_id),
+        'min_count': min_count,
+        'total_bookings': totals['total'],
+        'days_with_bookings': totals['days'],
+        'over_capacity_dates': list(dates.values()),
+        'truncated': next_start_date is not None,
+        'next_start_date': str(next_start_date) if next_start_date else None,
+    }
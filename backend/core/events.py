@@ -0,0 +1,196 @@
+"""
+Server-Sent Events for booking and holiday changes (GET /api/events/).
+
+Events are read from the change log (core.changes), so a stream also sees writes
+made by the other worker processes: one tail task per process reads new
+ChangeLogEntry rows and fans them out to the streams of that process. Commits in
+this process wake the tail task immediately (see core.signals); writes made by
+other processes are picked up within SSE_POLL_INTERVAL seconds.
+
+Every event carries the change log id, so a reconnecting EventSource sends it back
+as Last-Event-ID and gets the events it missed replayed from the log.
+"""
+import asyncio
+import json
+import logging
+from collections import namedtuple
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from .changes import KINDS, get_head_cursor, next_cursor
+from .models import ChangeLogEntry
+
+logger = logging.getLogger(__name__)
+
+Event = namedtuple('Event', ['id', 'name', 'calendar_id', 'data', 'created_at'])
+
+EVENT_SUFFIXES = {
+    ChangeLogEntry.ACTION_CREATE: 'created',
+    ChangeLogEntry.ACTION_UPDATE: 'updated',
+    ChangeLogEntry.ACTION_DELETE: 'deleted',
+}
+
+# Replay/poll batch size
+EVENT_BATCH_SIZE = 500
+
+
+def fetch_events(since, calendar_id=None, limit=EVENT_BATCH_SIZE):
+    """
+    Events for the change log entries after `since` (oldest first). Created/updated
+    events carry the current serialized row (None if it was deleted since).
+    """
+    entries = ChangeLogEntry.objects.filter(id__gt=since)
+    if calendar_id:
+        entries = entries.filter(calendar_id=calendar_id)
+    entries = list(entries.order_by('id')[:limit])
+
+    rows = {}
+    for kind, (model, serializer_class, _) in KINDS.items():
+        object_ids = {
+            entry.object_id for entry in entries
+            if entry.kind == kind and entry.action != ChangeLogEntry.ACTION_DELETE
+        }
+        if object_ids:
+            for row in serializer_class(model.objects.filter(pk__in=object_ids), many=True).data:
+                rows[(kind, row['id'])] = row
+
+    return [
+        Event(
+            id=entry.id,
+            name=f'{entry.kind}.{EVENT_SUFFIXES[entry.action]}',
+            calendar_id=entry.calendar_id,
+            data={
+                'id': entry.object_id,
+                'calendar_id': entry.calendar_id,
+                entry.kind: rows.get((entry.kind, entry.object_id)),
+            },
+            created_at=entry.created_at,
+        )
+        for entry in entries
+    ]
+
+
+def format_event(event):
+    payload = json.dumps(event.data, cls=DjangoJSONEncoder, separators=(',', ':'))
+    return f'id: {event.id}\nevent: {event.name}\ndata: {payload}\n\n'
+
+
+class ChangeLogBroadcaster:
+    """In-process fan-out of change log events to the open SSE streams"""
+
+    def __init__(self):
+        self._loop = None
+        self._subscribers = set()
+        self._wakeup = None
+        self._task = None
+        self._cursor = None
+        # Published ids above the cursor (entries that may still have uncommitted predecessors)
+        self._published = set()
+
+    def subscribe(self):
+        """Register a stream; must be called from the event loop serving it"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # First stream of this process (or a new event loop): start from the current head
+            self._loop = loop
+            self._subscribers = set()
+            self._wakeup = asyncio.Event()
+            self._task = None
+            self._cursor = None
+            self._published = set()
+        queue = asyncio.Queue(maxsize=getattr(settings, 'SSE_QUEUE_SIZE', 100))
+        self._subscribers.add(queue)
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._run())
+        return queue
+
+    def unsubscribe(self, queue):
+        self._subscribers.discard(queue)
+
+    def notify(self):
+        """Wake the tail task now (thread-safe; called when a booking/holiday write commits)"""
+        loop, wakeup = self._loop, self._wakeup
+        if loop is None or wakeup is None or loop.is_closed():
+            return
+        try:
+            loop.call_soon_threadsafe(wakeup.set)
+        except RuntimeError:
+            # Event loop closed in the meantime
+            pass
+
+    async def _run(self):
+        poll_interval = getattr(settings, 'SSE_POLL_INTERVAL', 2)
+        if self._cursor is None:
+            self._cursor = await sync_to_async(get_head_cursor)()
+        while self._subscribers:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if not self._subscribers:
+                break
+            try:
+                await self.poll()
+            except Exception as e:
+                logger.error(f"SSE change log poll failed: {e}", exc_info=True)
+
+    async def poll(self):
+        """Publish the change log entries written since the last poll"""
+        events = await sync_to_async(fetch_events)(self._cursor)
+        for event in events:
+            if event.id not in self._published:
+                self._published.add(event.id)
+                self._publish(event)
+
+        # Same rule as GET /api/changes/: stop before ids that may still commit
+        missing_before = timezone.now() - timedelta(seconds=getattr(settings, 'CHANGES_SETTLE_SECONDS', 300))
+        self._cursor = next_cursor(self._cursor, [(event.id, event.created_at) for event in events], missing_before)
+        self._published = {event_id for event_id in self._published if event_id > self._cursor}
+
+    def _publish(self, event):
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Client too slow: end its stream, it reconnects and replays from Last-Event-ID
+                self._subscribers.discard(queue)
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+
+
+broadcaster = ChangeLogBroadcaster()
+
+
+async def event_stream(calendar_id=None, last_event_id=None, source=None):
+    """SSE body: replay after Last-Event-ID, then live events and heartbeat comments"""
+    source = source or broadcaster
+    heartbeat = getattr(settings, 'SSE_HEARTBEAT_SECONDS', 15)
+    queue = source.subscribe()
+    try:
+        yield f"retry: {getattr(settings, 'SSE_RETRY_MS', 3000)}\n\n"
+
+        replayed = set()
+        if last_event_id is not None:
+            for event in await sync_to_async(fetch_events)(last_event_id, calendar_id):
+                replayed.add(event.id)
+                yield format_event(event)
+
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=heartbeat)
+            except asyncio.TimeoutError:
+                yield ': heartbeat\n\n'
+                continue
+            if event is None:
+                return
+            if event.id in replayed or (calendar_id and event.calendar_id != calendar_id):
+                continue
+            yield format_event(event)
+    finally:
+        source.unsubscribe(queue)
@@ -8,12 +8,20 @@ import os
 import json
 import base64
 import logging
+import threading
 import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
 from pathlib import Path
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.base import MIMEBase
 
+try:
+    import fcntl
+except ImportError:  # Windows: refreshes are only serialized within the process
+    fcntl = None
+
 from django.conf import settings
 from django.core.mail.backends.base import BaseEmailBackend
 from django.core.mail.message import EmailMessage
@@ -36,6 +44,99 @@ logger = logging.getLogger(__name__)
 # Gmail API scope for sending emails
 SCOPES = ['https://www.googleapis.com/auth/gmail.send']
 
+# Access tokens are refreshed when they expire within this many seconds
+TOKEN_REFRESH_MARGIN = 300
+
+# Gmail accepts at most 100 calls per HTTP batch request
+MAX_BATCH_SIZE = 100
+
+
+def token_needs_refresh(credentials):
+    """True if the access token is missing, expired or about to expire"""
+    if not credentials.valid:
+        return True
+    if not credentials.expiry:
+        return False
+    # google-auth stores expiry as a naive UTC datetime
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    return (credentials.expiry - now).total_seconds() < TOKEN_REFRESH_MARGIN
+
+
+@contextmanager
+def token_file_lock(token_file):
+    """
+    Exclusive lock shared by all worker processes using the same token file,
+    so only one of them refreshes the token at a time.
+    """
+    if fcntl is None or not token_file:
+        yield
+        return
+    lock_dir = os.path.dirname(token_file)
+    if lock_dir:
+        os.makedirs(lock_dir, exist_ok=True)
+    with open(f'{token_file}.lock', 'a') as lock_handle:
+        fcntl.flock(lock_handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_handle, fcntl.LOCK_UN)
+
+
+class GmailClientCache:
+    """
+    Process-wide Gmail API client shared by every GmailOAuth2Backend instance.
+    
+    - Credentials are loaded once and refreshed only when the access token is about
+      to expire (double-checked under a lock, so concurrent threads refresh once)
+    - Refreshes are also serialized across processes with a lock file next to the
+      token file; a process that waited picks up the token another process saved
+    - The Gmail service is built once per thread (httplib2 is not thread-safe) and
+      reused for every message: refreshes update the shared credentials in place
+    """
+    
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._local = threading.local()
+        self._generation = 0
+        self.credentials = None
+    
+    def reset(self):
+        """Forget the cached credentials and services (e.g. after re-running setup_gmail_oauth.py)"""
+        with self._lock:
+            self.credentials = None
+            self._generation += 1
+    
+    def get_credentials(self, backend):
+        """Return valid credentials, loading them on first use and refreshing them when needed"""
+        credentials = self.credentials
+        if credentials is not None and not token_needs_refresh(credentials):
+            return credentials
+        
+        with self._lock:
+            if self.credentials is None:
+                self.credentials = backend._get_token()
+                if self.credentials is None:
+                    return None
+            if token_needs_refresh(self.credentials) and self.credentials.refresh_token:
+                if not backend._refresh_token(self.credentials):
+                    return None
+            return self.credentials
+    
+    def get_service(self, backend):
+        """Return this thread's Gmail service, building it only the first time"""
+        credentials = self.get_credentials(backend)
+        if credentials is None or not credentials.valid:
+            return None
+        
+        if getattr(self._local, 'generation', None) != self._generation or self._local.service is None:
+            self._local.service = build('gmail', 'v1', credentials=credentials, cache_discovery=False)
+            self._local.generation = self._generation
+            logger.info("Gmail OAuth2 service initialized successfully")
+        return self._local.service
+
+
+gmail_client_cache = GmailClientCache()
+
 
 class GmailOAuth2Backend(BaseEmailBackend):
     """
@@ -50,12 +151,24 @@ class GmailOAuth2Backend(BaseEmailBackend):
     - Default: looks for client_secret_*.json in backend directory
     """
     
-    def __init__(self, fail_silently=False, **kwargs):
+    def __init__(self, fail_silently=False, batch_size=None, **kwargs):
         super().__init__(fail_silently=fail_silently, **kwargs)
         self.service = None
         self.credentials = None
+        if batch_size is None:
+            batch_size = getattr(settings, 'GMAIL_BATCH_SIZE', 50)
+        self.batch_size = max(1, min(batch_size, MAX_BATCH_SIZE))
         self._initialize_service()
     
+    @property
+    def supports_batch_send(self):
+        """
+        True if multi-message sends go through Gmail HTTP batch requests.
+        In that mode send_messages() does not raise for individual failures: each message
+        gets a `delivery_error` attribute (None when sent) and `gmail_message_id`.
+        """
+        return self.batch_size > 1
+    
     def _get_credentials_file_path(self):
         """Get the path to the OAuth2 credentials file."""
         # Check for explicit setting
@@ -187,20 +300,27 @@ class GmailOAuth2Backend(BaseEmailBackend):
     
     def _refresh_token(self, credentials):
         """
-        Refresh expired access token using refresh token.
-        This ensures tokens never expire by automatically refreshing before expiration.
+        Refresh the access token using the refresh token if it is expired or expires soon.
+        The credentials object is updated in place so the cached Gmail service keeps using it.
         """
         try:
             if credentials and credentials.refresh_token:
-                # Refresh if expired OR if about to expire (within 5 minutes)
-                # This proactive refresh ensures tokens never expire
-                if credentials.expired or (credentials.expiry and 
-                    (credentials.expiry.timestamp() - time.time()) < 300):
-                    logger.info("Refreshing access token (expired or expiring soon)")
-                    credentials.refresh(Request())
-                    # Save refreshed token immediately
-                    self._save_token(credentials)
-                    logger.info("Access token refreshed successfully")
+                if token_needs_refresh(credentials):
+                    using_env_token = bool(os.environ.get('GMAIL_TOKEN_JSON'))
+                    token_file = None if using_env_token else self._get_token_file_path()
+                    with token_file_lock(token_file):
+                        # Another worker process may have refreshed the token while we waited
+                        stored = self._get_token() if token_file else None
+                        if stored and stored.refresh_token == credentials.refresh_token and not token_needs_refresh(stored):
+                            credentials.token = stored.token
+                            credentials.expiry = stored.expiry
+                            logger.info("Using access token refreshed by another process")
+                        else:
+                            logger.info("Refreshing access token (expired or expiring soon)")
+                            credentials.refresh(Request())
+                            # Save refreshed token immediately
+                            self._save_token(credentials)
+                            logger.info("Access token refreshed successfully")
                 return credentials
         except Exception as e:
             error_msg = str(e).lower()
@@ -238,20 +358,26 @@ class GmailOAuth2Backend(BaseEmailBackend):
                     'client_secret': credentials.client_secret,
                     'scopes': credentials.scopes,
                 }
+                if credentials.expiry:
+                    # Lets other worker processes know the token is still fresh
+                    token_data['expiry'] = credentials.expiry.strftime('%Y-%m-%dT%H:%M:%SZ')
                 
-                with open(token_file, 'w') as f:
+                # Write then rename, so other processes never read a partial file
+                tmp_file = f'{token_file}.tmp'
+                with open(tmp_file, 'w') as f:
                     json.dump(token_data, f, indent=2)
+                os.replace(tmp_file, token_file)
             except Exception as e:
                 logger.warning(f"Failed to save token to file: {e}")
     
     def _initialize_service(self):
         """
-        Initialize Gmail API service with OAuth2 credentials.
-        Automatically refreshes tokens to ensure they never expire.
+        Get the process-wide Gmail API service (built once, see GmailClientCache).
+        Tokens are refreshed only when they are about to expire.
         """
         try:
-            # Load token
-            self.credentials = self._get_token()
+            self.service = gmail_client_cache.get_service(self)
+            self.credentials = gmail_client_cache.credentials
             
             if not self.credentials:
                 if not self.fail_silently:
@@ -263,21 +389,12 @@ class GmailOAuth2Backend(BaseEmailBackend):
                 logger.warning("Gmail OAuth2 token not found. Email sending will fail.")
                 return
             
-            # Always refresh token proactively to prevent expiration
-            # This ensures tokens are refreshed before they expire
-            if self.credentials.refresh_token:
-                self.credentials = self._refresh_token(self.credentials)
-            
-            if not self.credentials or not self.credentials.valid:
+            if not self.service:
                 if not self.fail_silently:
                     raise ValueError("Invalid or expired Gmail OAuth2 credentials")
                 logger.error("Invalid Gmail OAuth2 credentials")
                 return
             
-            # Build Gmail service
-            self.service = build('gmail', 'v1', credentials=self.credentials)
-            logger.info("Gmail OAuth2 service initialized successfully")
-            
         except Exception as e:
             if not self.fail_silently:
                 raise
@@ -342,21 +459,21 @@ class GmailOAuth2Backend(BaseEmailBackend):
             logger.warning("Gmail service not initialized. Cannot send emails.")
             return 0
         
+        email_messages = list(email_messages)
+        if len(email_messages) > 1 and self.supports_batch_send:
+            return self._send_batch(email_messages)
+        
         sent_count = 0
         for email_message in email_messages:
             try:
-                # Always refresh token proactively before sending to prevent expiration
-                # This ensures tokens never expire during email sending
-                if self.credentials and self.credentials.refresh_token:
-                    self.credentials = self._refresh_token(self.credentials)
-                    if self.credentials and self.credentials.valid:
-                        # Rebuild service with refreshed credentials
-                        self.service = build('gmail', 'v1', credentials=self.credentials)
-                    else:
-                        logger.error("Failed to refresh credentials. Cannot send email.")
-                        if not self.fail_silently:
-                            raise ValueError("Invalid credentials after refresh")
-                        continue
+                # Cheap expiry check; the token is only refreshed when it is about to expire
+                # and the refresh updates the credentials used by the cached service
+                credentials = gmail_client_cache.get_credentials(self)
+                if not credentials or not credentials.valid:
+                    logger.error("Failed to refresh credentials. Cannot send email.")
+                    if not self.fail_silently:
+                        raise ValueError("Invalid credentials after refresh")
+                    continue
                 
                 # Create message
                 message = self._create_message(email_message)
@@ -383,3 +500,89 @@ class GmailOAuth2Backend(BaseEmailBackend):
         
         return sent_count
 
+    
+    @staticmethod
+    def _is_retryable(error):
+        """Rate limiting and server errors are worth retrying, other API errors are not"""
+        if isinstance(error, HttpError):
+            return error.resp.status == 429 or error.resp.status >= 500
+        return True
+    
+    def _send_batch(self, email_messages):
+        """
+        Send messages with Gmail HTTP batch requests of at most `batch_size` calls.
+        
+        Failed items (rate limiting, server or transport errors) are retried in a new
+        batch, up to GMAIL_BATCH_MAX_RETRIES times with exponential backoff. Returns the
+        number of messages sent; each message gets `delivery_error` and `gmail_message_id`.
+        """
+        max_retries = getattr(settings, 'GMAIL_BATCH_MAX_RETRIES', 2)
+        retry_delay = getattr(settings, 'GMAIL_BATCH_RETRY_DELAY', 1)
+        
+        pending = {}
+        for index, email_message in enumerate(email_messages):
+            email_message.gmail_message_id = None
+            try:
+                pending[str(index)] = (email_message, self._create_message(email_message))
+                email_message.delivery_error = None
+            except Exception as e:
+                email_message.delivery_error = e
+                logger.error(f"Failed to build email to {email_message.to}: {e}")
+        
+        for attempt in range(max_retries + 1):
+            if attempt:
+                time.sleep(retry_delay * (2 ** (attempt - 1)))
+            credentials = gmail_client_cache.get_credentials(self)
+            if not credentials or not credentials.valid:
+                error = ValueError("Invalid credentials after refresh")
+                for email_message, _ in pending.values():
+                    email_message.delivery_error = error
+                break
+            
+            failed = {}
+            request_ids = list(pending)
+            for start in range(0, len(request_ids), self.batch_size):
+                chunk = request_ids[start:start + self.batch_size]
+                
+                def callback(request_id, response, exception):
+                    email_message = pending[request_id][0]
+                    if exception is None:
+                        email_message.delivery_error = None
+                        email_message.gmail_message_id = (response or {}).get('id')
+                    else:
+                        email_message.delivery_error = exception
+                        failed[request_id] = pending[request_id]
+                
+                batch = self.service.new_batch_http_request(callback=callback)
+                for request_id in chunk:
+                    batch.add(
+                        self.service.users().messages().send(userId='me', body=pending[request_id][1]),
+                        request_id=request_id
+                    )
+                try:
+                    batch.execute()
+                except Exception as e:
+                    # The whole batch request failed (transport error, 5xx on the batch endpoint)
+                    logger.warning(f"Gmail batch request of {len(chunk)} messages failed: {e}")
+                    for request_id in chunk:
+                        pending[request_id][0].delivery_error = e
+                        failed[request_id] = pending[request_id]
+            
+            pending = {
+                request_id: item for request_id, item in failed.items()
+                if self._is_retryable(item[0].delivery_error)
+            }
+            if not pending:
+                break
+            if attempt < max_retries:
+                logger.warning(f"Retrying {len(pending)} Gmail batch item(s) (retry {attempt + 1}/{max_retries})")
+        
+        sent_count = 0
+        for email_message in email_messages:
+            if email_message.delivery_error is None:
+                sent_count += 1
+                logger.info(f"Email sent successfully via Gmail API to {email_message.to}. Message ID: {email_message.gmail_message_id or 'N/A'}")
+            else:
+                logger.error(f"Failed to send email to {email_message.to} via Gmail batch: {email_message.delivery_error}")
+        logger.info(f"Gmail batch send: {sent_count}/{len(email_messages)} messages sent")
+        return sent_count
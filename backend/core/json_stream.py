@@ -0,0 +1,107 @@
+"""
+Incremental reader for large JSON exports.
+
+The historical calendar exports are a single object holding a large array
+(``{"bookings": [...]}``). iter_json_array() yields the array's elements one by
+one while reading the file in fixed-size chunks, so memory use depends on the
+size of one element, not of the file. Each element is decoded by the standard
+library's C scanner (json.JSONDecoder.raw_decode).
+"""
+import json
+
+WHITESPACE = ' \t\n\r'
+NUMBER_CHARS = set('0123456789+-.eE')
+
+
+class _Reader:
+    """Sliding window over a text file; consumed input is dropped as the position advances"""
+
+    def __init__(self, file, chunk_size):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        """Read one more chunk; returns False at end of file"""
+        if self.eof:
+            return False
+        chunk = self.file.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        if self.pos:
+            self.buffer = self.buffer[self.pos:]
+            self.pos = 0
+        self.buffer += chunk
+        return True
+
+    def peek(self):
+        """Next non-whitespace character (without consuming it), or '' at end of file"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill():
+                return ''
+
+    def expect(self, char):
+        if self.peek() != char:
+            found = self.peek() or 'end of file'
+            raise json.JSONDecodeError(f'Expected {char!r}, found {found!r}', self.buffer, self.pos)
+        self.pos += 1
+
+    def decode(self, decoder):
+        """Decode the next complete JSON value"""
+        self.peek()
+        while True:
+            try:
+                value, end = decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self.fill():
+                    continue
+                raise
+            # A number running to the end of the buffer ("12", "1.", "1e") may continue in the next chunk
+            if (isinstance(value, (int, float)) and not isinstance(value, bool)
+                    and all(char in NUMBER_CHARS for char in self.buffer[end:]) and self.fill()):
+                continue
+            self.pos = end
+            return value
+
+
+def iter_json_array(file, key, chunk_size=1 << 16):
+    """
+    Yield the elements of the array stored under `key` in the file's top-level object.
+    Other keys are skipped; nothing is yielded when the key is missing.
+    Raises json.JSONDecodeError on malformed input.
+    """
+    decoder = json.JSONDecoder()
+    reader = _Reader(file, chunk_size)
+
+    reader.expect('{')
+    if reader.peek() == '}':
+        return
+    while True:
+        name = reader.decode(decoder)
+        reader.expect(':')
+        if name != key:
+            reader.decode(decoder)
+        elif reader.peek() == '[':
+            reader.expect('[')
+            if reader.peek() == ']':
+                return
+            while True:
+                yield reader.decode(decoder)
+                if reader.peek() == ']':
+                    return
+                reader.expect(',')
+        else:
+            # Not an array: treat as no rows
+            reader.decode(decoder)
+            return
+
+        if reader.peek() == '}':
+            return
+        reader.expect(',')
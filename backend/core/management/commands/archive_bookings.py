@@ -0,0 +1,83 @@
+"""
+Django management command to move past bookings to the archive table (BookingArchive).
+Usage: python manage.py archive_bookings --before 2024-01-01 [--calendar-id calendar1] [--batch-size 1000] [--dry-run]
+
+- Bookings dated before --before are moved in chunks, one short transaction per
+  --batch-size rows, keeping their id (see core.archive)
+- GET /api/bookings/ and /api/bookings/debug/ keep returning them: ranges that reach
+  archived dates read both tables
+- --before must not be in the future: capacity checks only read the live table
+"""
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from core.archive import archive_batch
+from core.calendars import resolve_calendar_id
+from core.models import Booking
+
+
+class Command(BaseCommand):
+    help = 'Move bookings dated before --before from Booking to BookingArchive in chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--before',
+            type=str,
+            required=True,
+            help='Archive bookings dated strictly before this date (YYYY-MM-DD)'
+        )
+        parser.add_argument(
+            '--calendar-id',
+            type=str,
+            default=None,
+            help='Only archive this calendar (default: every calendar)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Bookings moved per transaction (default: 1000)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only count the bookings that would be archived'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            before = parse_date(options['before'])
+        except ValueError:
+            before = None
+        if before is None:
+            raise CommandError('--before must be a date (YYYY-MM-DD)')
+        if before > date.today():
+            raise CommandError('--before cannot be in the future: upcoming bookings must stay in the live table')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+        calendar_id = resolve_calendar_id(options['calendar_id']) if options['calendar_id'] else None
+        scope = calendar_id or 'all calendars'
+
+        if options['dry_run']:
+            bookings = Booking.objects.filter(booking_date__lt=before)
+            if calendar_id:
+                bookings = bookings.filter(calendar_id=calendar_id)
+            self.stdout.write(f'{bookings.count()} bookings before {before} would be archived ({scope})')
+            return
+
+        started = time.monotonic()
+        archived = 0
+        while True:
+            moved = archive_batch(before, calendar_id=calendar_id, batch_size=options['batch_size'])
+            if not moved:
+                break
+            archived += moved
+            self.stdout.write(f'  Archived {archived} bookings...')
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Archived {archived} bookings before {before} ({scope}) in {elapsed:.2f}s'
+        ))
@@ -0,0 +1,123 @@
+"""
+Django management command to compare the latency of the cache backends.
+Usage: python manage.py benchmark_cache [--backends locmem,sqlite,file] [--iterations 2000] [--value-size 20000]
+
+Each backend gets a throwaway instance (temporary directory for sqlite/file,
+CACHE_LOCATION or the default URL for redis) and is timed on the operations
+the application performs:
+- get hit of a cached list response (--value-size bytes of booking-like data)
+- get_many of two small keys (data version + last-modified, every list request)
+- incr (throttle counters, data version bumps)
+- set of a list response
+"""
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import import_string
+
+
+class Command(BaseCommand):
+    help = 'Benchmark get/get_many/incr/set latency of the locmem, sqlite, file and redis cache backends'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--backends',
+            type=str,
+            default='locmem,sqlite,file',
+            help='Comma-separated backends among settings.CACHE_BACKENDS (default: locmem,sqlite,file)'
+        )
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=2000,
+            help='Operations timed per measurement (default: 2000)'
+        )
+        parser.add_argument(
+            '--value-size',
+            type=int,
+            default=20000,
+            help='Approximate size in bytes of the cached response (default: 20000)'
+        )
+
+    def build_value(self, size):
+        booking = {
+            'id': 1,
+            'calendar_id': 'calendar1',
+            'booking_date': '2025-01-01',
+            'booking_time': '8:00-11:00',
+            'client_name': 'Client',
+            'client_phone': '0123456789',
+            'designer_name': 'Designer',
+            'message': '',
+        }
+        count = max(1, size // len(repr(booking)))
+        return [dict(booking, id=index) for index in range(count)]
+
+    def create_cache(self, name, directory):
+        backend_path, default_location = settings.CACHE_BACKENDS[name]
+        if name == 'sqlite':
+            location = f'{directory}/cache.sqlite3'
+        elif name == 'file':
+            location = f'{directory}/files'
+        elif name == 'redis':
+            location = os.environ.get('CACHE_LOCATION') or default_location
+        else:
+            location = f'benchmark-{name}'
+        return import_string(backend_path)(location, {'OPTIONS': {'MAX_ENTRIES': 100000}})
+
+    def measure(self, operation, iterations):
+        """Return (median, p95) latency of operation() in microseconds"""
+        timings = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            operation()
+            timings.append((time.perf_counter() - start) * 1e6)
+        timings.sort()
+        return statistics.median(timings), timings[int(len(timings) * 0.95) - 1]
+
+    def benchmark(self, cache, value, iterations):
+        cache.set('bench:response', value, timeout=None)
+        cache.set_many({'bench:version': 1, 'bench:modified': time.time()}, timeout=None)
+        if cache.get('bench:response') != value:
+            raise CommandError('Read back a different value than was written')
+
+        counter = iter(range(iterations))
+        return {
+            'get hit': self.measure(lambda: cache.get('bench:response'), iterations),
+            'get_many (2 keys)': self.measure(lambda: cache.get_many(['bench:version', 'bench:modified']), iterations),
+            'incr': self.measure(lambda: cache.incr('bench:version'), iterations),
+            'set': self.measure(lambda: cache.set(f'bench:set:{next(counter)}', value), iterations),
+        }
+
+    def handle(self, *args, **options):
+        names = [name.strip() for name in options['backends'].split(',') if name.strip()]
+        unknown = [name for name in names if name not in settings.CACHE_BACKENDS]
+        if unknown:
+            raise CommandError(f"Unknown backend(s): {', '.join(unknown)}")
+
+        value = self.build_value(options['value_size'])
+        self.stdout.write(
+            f"{options['iterations']} iterations, cached response of {len(value)} bookings; "
+            f"median / p95 in microseconds"
+        )
+        for name in names:
+            directory = tempfile.mkdtemp(prefix='benchmark_cache_')
+            try:
+                cache = self.create_cache(name, directory)
+                results = self.benchmark(cache, value, options['iterations'])
+                cache.clear()
+                cache.close()
+            except Exception as e:
+                self.stdout.write(self.style.WARNING(f"{name}: skipped ({e})"))
+                continue
+            finally:
+                shutil.rmtree(directory, ignore_errors=True)
+
+            self.stdout.write(self.style.SUCCESS(name))
+            for operation, (median, p95) in results.items():
+                self.stdout.write(f"  {operation:<18} {median:9.1f} / {p95:9.1f}")
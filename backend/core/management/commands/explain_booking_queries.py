@@ -0,0 +1,152 @@
+"""
+Django management command to print the database query plans of the booking hot paths.
+Usage: python manage.py explain_booking_queries [--calendar-id calendar1] [--date YYYY-MM-DD]
+
+The queries are not rewritten by hand: the command runs the real code paths and
+captures the SQL they issue, so the plans always match what production executes.
+
+Covered code paths:
+1. BookingListCreateView.get_queryset (calendar + date range listing)
+2. BookingSerializer.validate (holiday check, daily capacity and slot conflict queries)
+3. HolidayListCreateView.get_queryset (calendar + date range listing)
+
+Use it after running migrations to check that the composite indexes
+(booking_cal_date_time_idx, booking_cal_date_idx, holiday_date_cal_idx) are picked up.
+"""
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.utils.dateparse import parse_date
+from rest_framework.request import Request
+
+from core.serializers import BookingSerializer
+from core.views import BookingListCreateView, HolidayListCreateView
+
+
+class Command(BaseCommand):
+    help = 'Print EXPLAIN plans for the queries issued by the booking list, booking validation and holiday list code paths'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--calendar-id',
+            type=str,
+            default='calendar1',
+            help='Calendar to build the queries for (default: calendar1)'
+        )
+        parser.add_argument(
+            '--date',
+            type=str,
+            help='Booking date used for the validation queries (default: 3 days from today)'
+        )
+        parser.add_argument(
+            '--booking-time',
+            type=str,
+            default='8:00-11:00',
+            help='Time slot used for the slot conflict query (default: 8:00-11:00)'
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=31,
+            help='Length of the listing date range in days (default: 31)'
+        )
+
+    def explain_prefix(self):
+        if connection.vendor == 'sqlite':
+            return 'EXPLAIN QUERY PLAN '
+        return 'EXPLAIN '
+
+    def explain_sql(self, sql):
+        """Run EXPLAIN on an already interpolated SQL statement and return printable rows"""
+        with connection.cursor() as cursor:
+            cursor.execute(self.explain_prefix() + sql)
+            columns = [col[0] for col in cursor.description] if cursor.description else []
+            rows = cursor.fetchall()
+        lines = []
+        if columns:
+            lines.append(' | '.join(columns))
+        for row in rows:
+            lines.append(' | '.join('' if value is None else str(value) for value in row))
+        return '\n'.join(lines)
+
+    def write_section(self, title):
+        self.stdout.write('')
+        self.stdout.write(self.style.SUCCESS('=' * 60))
+        self.stdout.write(self.style.SUCCESS(title))
+        self.stdout.write(self.style.SUCCESS('=' * 60))
+
+    def write_plan(self, sql, plan):
+        self.stdout.write(self.style.WARNING('SQL:'))
+        self.stdout.write(f'  {sql}')
+        self.stdout.write(self.style.WARNING('Plan:'))
+        for line in plan.splitlines():
+            self.stdout.write(f'  {line}')
+        self.stdout.write('')
+
+    def build_view(self, view_class, params):
+        """Instantiate a list view the way DRF does for a GET request"""
+        django_request = RequestFactory().get('/', params)
+        view = view_class()
+        view.request = Request(django_request)
+        view.args = ()
+        view.kwargs = {}
+        view.format_kwarg = None
+        return view
+
+    def explain_list_view(self, title, view_class, params):
+        self.write_section(title)
+        self.stdout.write(f'Query params: {params}')
+        queryset = self.build_view(view_class, params).get_queryset()
+        sql = str(queryset.query)
+        self.write_plan(sql, queryset.explain())
+
+    def explain_booking_validation(self, calendar_id, booking_date, booking_time):
+        self.write_section('BookingSerializer.validate')
+        payload = {
+            'calendar_id': calendar_id,
+            'booking_date': booking_date.isoformat(),
+            'booking_time': booking_time,
+            'client_name': 'explain',
+            'client_phone': '0000000000',
+            'designer_name': 'explain',
+        }
+        self.stdout.write(f'Payload: {payload}')
+
+        serializer = BookingSerializer(data=payload)
+        with CaptureQueriesContext(connection) as captured:
+            serializer.is_valid()
+
+        if serializer.errors:
+            self.stdout.write(self.style.WARNING(f'Validation stopped early: {dict(serializer.errors)}'))
+
+        selects = [q['sql'] for q in captured.captured_queries if q['sql'].lstrip().upper().startswith('SELECT')]
+        if not selects:
+            self.stdout.write(self.style.WARNING('No SELECT query was issued for this payload.'))
+        for sql in selects:
+            self.write_plan(sql, self.explain_sql(sql))
+
+    def handle(self, *args, **options):
+        calendar_id = options['calendar_id']
+
+        if options.get('date'):
+            booking_date = parse_date(options['date'])
+            if not booking_date:
+                raise CommandError(f'Invalid date: {options["date"]} (expected YYYY-MM-DD)')
+        else:
+            booking_date = date.today() + timedelta(days=3)
+
+        end_date = booking_date + timedelta(days=max(options['days'], 1) - 1)
+        range_params = {
+            'calendar_id': calendar_id,
+            'start_date': booking_date.isoformat(),
+            'end_date': end_date.isoformat(),
+        }
+
+        self.stdout.write(self.style.SUCCESS(f'Database vendor: {connection.vendor}'))
+
+        self.explain_list_view('BookingListCreateView.get_queryset', BookingListCreateView, range_params)
+        self.explain_booking_validation(calendar_id, booking_date, options['booking_time'])
+        self.explain_list_view('HolidayListCreateView.get_queryset', HolidayListCreateView, range_params)
@@ -1,16 +1,29 @@
 """
 Django management command to import all calendar data from JSON files and filter out Sunday bookings.
-Usage: python manage.py import_and_clean_calendars [--clear]
+Usage: python manage.py import_and_clean_calendars [--clear] [--batch-size 1000] [--workers 3] [--write-cleaned]
+                                                  [--dry-run] [--restart]
 
 This script performs the following operations:
 1. Reads JSON files from the data/ directory (pose.json, sav.json, metré.json)
-2. Transforms data: Creates cleaned JSON files (new_pose.json, new_sav.json, new_metre.json) with Sundays removed
+   as a stream: the "bookings" array is parsed row by row, so memory use does not
+   grow with the size of the export
+2. Transforms data: with --write-cleaned, also writes cleaned JSON files
+   (new_pose.json, new_sav.json, new_metre.json) with Sundays removed, in the same pass
 3. Removes Sundays: Filters out all Sunday bookings from JSON data BEFORE importing
 4. Maps fields: Converts JSON fields to database model fields
 5. Handles duplicates: Updates existing bookings instead of creating duplicates
+   (existing bookings are loaded once, then rows are written with bulk_create/bulk_update,
+   one transaction per --batch-size rows; unchanged rows are not written)
 6. Converts timestamps: Converts JavaScript timestamp (milliseconds) to Python datetime
 7. Sets designer_name: All imported bookings have designer_name set to "ancien_rdv"
 8. Sets calendar_id: Automatically assigns calendar_id based on file
+9. Skips unchanged rows: rows whose content hash (designer, message) and timestamp match
+   the stored booking are not written, so a routine re-sync only touches the rows that differ
+10. Resumes: after each committed batch a checkpoint (<file>.<calendar_id>.checkpoint) records
+   the rows done; running the same import again continues from there (--restart ignores it)
+11. --dry-run reports the created/updated/unchanged diff without writing anything
+12. With --workers N, imports up to N calendars at the same time, each in its own
+   process with its own database connection (calendars never share rows)
 
 Field Mapping (JSON → Database):
 ---------------------------------
@@ -31,14 +44,104 @@ Calendar Mapping:
 - sav.json → calendar_id = "calendar2" (SAV calendar)
 - metré.json → calendar_id = "calendar3" (Metré calendar)
 """
+import hashlib
+import itertools
 import json
 import os
+import textwrap
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
 from datetime import datetime
+from io import StringIO
+
+import django
 from django.core.management.base import BaseCommand, CommandError
 from django.conf import settings
+from django.db import connections, transaction
 from django.utils import timezone
 from django.utils.dateparse import parse_date
-from core.models import Booking
+from core.capacity import lock_occupancy_days, refresh_occupancy
+from core.changes import record_changes
+from core.json_stream import iter_json_array
+from core.models import Booking, ChangeLogEntry
+from core.reset_jobs import delete_bookings
+from core.versions import bump_calendar_version_on_commit
+
+# A JSON row matches an existing booking of its calendar on these fields...
+IMPORT_KEY_FIELDS = ('booking_date', 'booking_time', 'client_name', 'client_phone')
+# ...and only these are rewritten when it does
+IMPORT_UPDATE_FIELDS = ('designer_name', 'message', 'created_at')
+# Counts returned by import_calendar (added up over the calendars at the end)
+SUMMARY_FIELDS = ('rows', 'created', 'updated', 'unchanged', 'skipped', 'sundays', 'errors', 'seconds')
+
+
+def content_hash(values):
+    """Digest of the fields an import may rewrite (created_at is compared on its own)"""
+    content = '\x1f'.join(str(values[field] or '') for field in ('designer_name', 'message'))
+    return hashlib.blake2b(content.encode(), digest_size=16).digest()
+
+
+class ImportCheckpoint:
+    """
+    Import progress saved after every committed batch (<file>.<calendar_id>.checkpoint),
+    so an interrupted import resumes after the last committed row instead of
+    starting over. It only applies to the same file (size and modification time)
+    and is removed once the import completes without errors.
+    """
+
+    def __init__(self, file_path, calendar_id):
+        self.path = f'{file_path}.{calendar_id}.checkpoint'
+        stat = os.stat(file_path)
+        self.fingerprint = {'calendar_id': calendar_id, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+    def load(self):
+        """Number of rows committed by an interrupted run of the same file (0 if none)"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return 0
+        if data.get('file') != self.fingerprint:
+            return 0
+        return int(data.get('rows_done', 0))
+
+    def save(self, rows_done):
+        temp_path = f'{self.path}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'file': self.fingerprint, 'rows_done': rows_done}, f)
+        os.replace(temp_path, self.path)
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+@contextmanager
+def imported_created_at():
+    """
+    Keep the imported created_at on bulk_create instead of auto_now_add's now()
+    (avoids a second bulk_update pass on every new row). Only for this single-threaded command.
+    """
+    field = Booking._meta.get_field('created_at')
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+def import_calendar_worker(**job):
+    """
+    Import one calendar in a --workers process; returns (output, summary).
+    The calendars never share rows, so each worker uses its own connection and batch transactions.
+    """
+    output = StringIO()
+    try:
+        summary = Command(stdout=output, no_color=True).import_calendar(**job)
+    finally:
+        connections.close_all()
+    return output.getvalue(), summary
 
 
 class Command(BaseCommand):
@@ -55,6 +158,33 @@ class Command(BaseCommand):
             type=str,
             help='Path to a specific JSON file (default: imports all calendars)'
         )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Bookings created/updated per transaction (default: 1000)'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Calendars imported in parallel, one process each (default: 1)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report how many bookings would be created, updated or left unchanged'
+        )
+        parser.add_argument(
+            '--restart',
+            action='store_true',
+            help='Ignore the checkpoint of an interrupted import and start from the first row'
+        )
+        parser.add_argument(
+            '--write-cleaned',
+            action='store_true',
+            help='Also write the cleaned files (data/new_*.json, Sundays removed) while importing'
+        )
 
     def get_project_root(self):
         """Find the project root directory containing the data/ folder"""
@@ -85,191 +215,364 @@ class Command(BaseCommand):
         except Exception:
             return os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))))
 
-    def create_cleaned_json_file(self, original_file_path, output_file_name):
-        """Read original JSON file, filter out Sundays, and create a new cleaned JSON file"""
-        # Get absolute path
-        if not os.path.isabs(original_file_path):
-            project_root = self.get_project_root()
-            original_file_path = os.path.join(project_root, original_file_path)
-        
-        if not os.path.exists(original_file_path):
-            raise CommandError(f'File not found: {original_file_path}')
-        
-        self.stdout.write(f'Reading original JSON file: {original_file_path}')
-        
-        try:
-            with open(original_file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-        except json.JSONDecodeError as e:
-            raise CommandError(f'Invalid JSON file: {e}')
-        except Exception as e:
-            raise CommandError(f'Error reading file: {e}')
-        
-        bookings_data = data.get('bookings', [])
-        if not bookings_data:
-            self.stdout.write(self.style.WARNING(f'No bookings found in {original_file_path}'))
-            return None, 0
-        
-        self.stdout.write(f'Found {len(bookings_data)} bookings in original file')
-        
-        # Filter out Sunday bookings
-        # weekday() returns 0=Monday, 6=Sunday
-        filtered_bookings = []
-        sunday_count = 0
-        
-        for booking_data in bookings_data:
-            date_str = booking_data.get('date')
-            if date_str:
-                try:
-                    booking_date = parse_date(date_str)
-                    if booking_date and booking_date.weekday() == 6:  # Sunday
-                        sunday_count += 1
-                        continue  # Skip Sunday bookings
-                    filtered_bookings.append(booking_data)
-                except (ValueError, TypeError):
-                    # Invalid date, skip this booking
-                    continue
-        
-        if sunday_count > 0:
-            self.stdout.write(self.style.WARNING(f'Filtered out {sunday_count} Sunday booking(s)'))
-        
-        # Create cleaned data structure
-        cleaned_data = {
-            'bookings': filtered_bookings
-        }
-        
-        # Write to new cleaned file
-        project_root = self.get_project_root()
-        output_file_path = os.path.join(project_root, 'data', output_file_name)
-        
-        try:
-            with open(output_file_path, 'w', encoding='utf-8') as f:
-                json.dump(cleaned_data, f, ensure_ascii=False, indent=2)
-            self.stdout.write(self.style.SUCCESS(f'Created cleaned file: {output_file_path}'))
-            self.stdout.write(f'  - Original bookings: {len(bookings_data)}')
-            self.stdout.write(f'  - Sundays removed: {sunday_count}')
-            self.stdout.write(f'  - Cleaned bookings: {len(filtered_bookings)}')
-        except Exception as e:
-            raise CommandError(f'Error writing cleaned file: {e}')
-        
-        return output_file_path, sunday_count
-
-    def import_calendar(self, file_path, calendar_id, calendar_name, clear_existing):
-        """Import bookings from a cleaned JSON file"""
-        # Get absolute path
+    def resolve_path(self, file_path):
+        """Absolute path of a data file (relative paths start at the project root)"""
         if not os.path.isabs(file_path):
-            project_root = self.get_project_root()
-            file_path = os.path.join(project_root, file_path)
-        
+            file_path = os.path.join(self.get_project_root(), file_path)
         if not os.path.exists(file_path):
             raise CommandError(f'File not found: {file_path}')
-        
-        self.stdout.write(f'Reading cleaned JSON file: {file_path}')
-        
+        return file_path
+
+    def read_bookings(self, file_path):
+        """Stream the rows of the file's "bookings" array without loading the whole file"""
         try:
             with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+                yield from iter_json_array(f, 'bookings')
         except json.JSONDecodeError as e:
             raise CommandError(f'Invalid JSON file: {e}')
-        except Exception as e:
+        except OSError as e:
             raise CommandError(f'Error reading file: {e}')
-        
-        bookings_data = data.get('bookings', [])
-        if not bookings_data:
+
+    def remove_sundays(self, rows, stats):
+        """Filter out Sunday bookings, counting them in stats['sundays']"""
+        for booking_data in rows:
+            try:
+                booking_date = parse_date(booking_data.get('date') or '')
+            except (ValueError, TypeError):
+                booking_date = None
+            # weekday() returns 0=Monday, 6=Sunday
+            if booking_date and booking_date.weekday() == 6:
+                stats['sundays'] += 1
+                continue
+            yield booking_data
+
+    def write_cleaned_file(self, rows, output_file_path):
+        """
+        Copy the rows streaming through to a cleaned JSON file (same layout as
+        json.dump(indent=2)); the file only replaces the previous one once complete.
+        """
+        temp_path = f'{output_file_path}.tmp'
+        count = 0
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                f.write('{\n  "bookings": [')
+                for row in rows:
+                    f.write(',\n' if count else '\n')
+                    f.write(textwrap.indent(json.dumps(row, ensure_ascii=False, indent=2), '    '))
+                    count += 1
+                    yield row
+                f.write('\n  ]\n}' if count else ']\n}')
+            os.replace(temp_path, output_file_path)
+        except OSError as e:
+            raise CommandError(f'Error writing cleaned file: {e}')
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        self.stdout.write(self.style.SUCCESS(f'Created cleaned file: {output_file_path} ({count} bookings)'))
+
+    def import_calendar(self, file_path, calendar_id, calendar_name, clear_existing, batch_size=1000,
+                        cleaned_file_path=None, dry_run=False, restart=False):
+        """
+        Import bookings from a JSON export in one streaming pass:
+        parse -> remove Sundays -> (copy to cleaned_file_path) -> map fields -> batched upserts.
+        With dry_run, only the created/updated/unchanged diff is computed.
+        Returns the summary counts (see SUMMARY_FIELDS).
+        """
+        file_path = self.resolve_path(file_path)
+        self.stdout.write(f'Streaming bookings from {file_path}')
+        
+        stats = {'sundays': 0}
+        bookings_data = self.remove_sundays(self.read_bookings(file_path), stats)
+        if cleaned_file_path:
+            bookings_data = self.write_cleaned_file(bookings_data, cleaned_file_path)
+        
+        # Nothing is cleared when the file holds no bookings (or is invalid from the start)
+        first_booking = next(bookings_data, None)
+        if first_booking is None:
             self.stdout.write(self.style.WARNING(f'No bookings found in {file_path}'))
-            return
-        
-        self.stdout.write(f'Importing {len(bookings_data)} bookings from cleaned file')
-        
-        # Clear existing bookings if requested
-        if clear_existing:
-            deleted_count = Booking.objects.filter(calendar_id=calendar_id).delete()[0]
-            self.stdout.write(self.style.WARNING(f'Cleared {deleted_count} existing {calendar_name} calendar bookings'))
+            return dict(dict.fromkeys(SUMMARY_FIELDS, 0), sundays=stats['sundays'])
+        bookings_data = itertools.chain([first_booking], bookings_data)
+        
+        checkpoint = None if dry_run else ImportCheckpoint(file_path, calendar_id)
+        resume_after = 0
+        if checkpoint and not restart:
+            resume_after = checkpoint.load()
+        if resume_after:
+            # The interrupted run already cleared the calendar and committed these rows
+            self.stdout.write(self.style.WARNING(f'Resuming after row {resume_after} (checkpoint {checkpoint.path})'))
+            bookings_data = itertools.islice(bookings_data, resume_after, None)
+        elif clear_existing:
+            # Clear existing bookings if requested
+            if dry_run:
+                deleted_count = Booking.objects.filter(calendar_id=calendar_id).count()
+                self.stdout.write(self.style.WARNING(f'Would clear {deleted_count} existing {calendar_name} calendar bookings'))
+            else:
+                deleted_count = delete_bookings(Booking.objects.filter(calendar_id=calendar_id))
+                self.stdout.write(self.style.WARNING(f'Cleared {deleted_count} existing {calendar_name} calendar bookings'))
+        
+        started = time.monotonic()
+        # Existing bookings by import key (one query), reduced to (pk, content hash, created_at)
+        existing = {} if (dry_run and clear_existing and not resume_after) else self.load_existing_bookings(calendar_id)
+        # Bookings created or updated in the current batch, so a booking listed twice in the
+        # file is updated instead of duplicated (committed batches move to `existing`)
+        imported = {}
         
         # Import bookings
         created_count = 0
         updated_count = 0
+        unchanged_count = 0
         skipped_count = 0
         error_count = 0
+        to_create = []
+        to_update = {}
         
-        for idx, booking_data in enumerate(bookings_data, 1):
+        idx = resume_after
+        for idx, booking_data in enumerate(bookings_data, resume_after + 1):
             try:
-                # Map JSON fields to database fields
-                booking_date_str = booking_data.get('date')
-                if not booking_date_str:
-                    skipped_count += 1
-                    continue
-                
-                booking_date = parse_date(booking_date_str)
-                if not booking_date:
-                    skipped_count += 1
-                    continue
-                
-                # Convert timestamp to datetime (timezone-aware)
-                timestamp = booking_data.get('timestamp')
-                created_at = None
-                if timestamp:
-                    try:
-                        # Convert milliseconds to seconds and create timezone-aware datetime
-                        naive_dt = datetime.fromtimestamp(timestamp / 1000)
-                        created_at = timezone.make_aware(naive_dt)
-                    except (ValueError, OSError):
-                        created_at = timezone.now()
-                else:
-                    created_at = timezone.now()
-                
-                # Check if booking already exists (by calendar_id, date, time, and client)
-                existing_booking = Booking.objects.filter(
-                    calendar_id=calendar_id,
-                    booking_date=booking_date,
-                    booking_time=booking_data.get('time', ''),
-                    client_name=booking_data.get('name', ''),
-                    client_phone=booking_data.get('phone', '')
-                ).first()
-                
-                booking_data_mapped = {
-                    'calendar_id': calendar_id,
-                    'booking_date': booking_date,
-                    'booking_time': booking_data.get('time', '21h00'),  # Default for Pose
-                    'client_name': booking_data.get('name', ''),
-                    'client_phone': booking_data.get('phone', ''),
-                    'designer_name': 'ancien_rdv',  # Always set to "ancien_rdv" for imported bookings
-                    'message': booking_data.get('message', ''),
-                }
-                
-                if existing_booking:
-                    # Update existing booking
-                    for key, value in booking_data_mapped.items():
-                        setattr(existing_booking, key, value)
-                    existing_booking.created_at = created_at
-                    existing_booking.save()
-                    updated_count += 1
-                    if idx % 50 == 0:
-                        self.stdout.write(f'  Processed {idx}/{len(bookings_data)} bookings...')
-                else:
-                    # Create new booking
-                    booking = Booking(**booking_data_mapped)
-                    booking.created_at = created_at
-                    booking.save()
-                    created_count += 1
-                    if idx % 50 == 0:
-                        self.stdout.write(f'  Processed {idx}/{len(bookings_data)} bookings...')
-                        
+                values = self.map_booking(booking_data, calendar_id)
             except Exception as e:
                 error_count += 1
                 self.stdout.write(self.style.ERROR(f'  [{idx}] Error: {str(e)}'))
                 continue
+            if values is None:
+                skipped_count += 1
+                continue
+            
+            key = self.import_key(values)
+            booking = imported.get(key)
+            if booking is not None:
+                # Listed again in the file: the last values win
+                if any(getattr(booking, field) != value for field, value in values.items() if value is not None):
+                    for field, value in values.items():
+                        if value is not None:
+                            setattr(booking, field, value)
+                    if booking.pk is not None:
+                        to_update[booking.pk] = booking
+                    updated_count += 1
+                else:
+                    unchanged_count += 1
+            elif key in existing:
+                pk, old_hash, old_created_at = existing[key]
+                if content_hash(values) == old_hash and values['created_at'] in (None, old_created_at):
+                    # Same content: nothing is written for this row
+                    unchanged_count += 1
+                else:
+                    # Update existing booking (rows without timestamp keep their created_at)
+                    booking = Booking(pk=pk, **values)
+                    if booking.created_at is None:
+                        booking.created_at = old_created_at
+                    imported[key] = booking
+                    # No pk: created earlier by this dry run, nothing to write
+                    if pk is not None:
+                        to_update[pk] = booking
+                    updated_count += 1
+            else:
+                # Create new booking
+                booking = Booking(**values)
+                if booking.created_at is None:
+                    booking.created_at = timezone.now()
+                imported[key] = booking
+                to_create.append(booking)
+                created_count += 1
+            
+            if len(to_create) + len(to_update) >= batch_size:
+                failed = 0
+                if not dry_run:
+                    failed = self.write_batch(calendar_id, to_create, list(to_update.values()), imported)
+                    error_count += failed
+                    # Resume from here only while every batch so far was committed
+                    if checkpoint and not error_count:
+                        checkpoint.save(idx)
+                self.remember_batch(imported, existing, committed=not failed)
+                to_create, to_update = [], {}
+                self.stdout.write(f'  Processed {idx} bookings...')
+        
+        if (to_create or to_update) and not dry_run:
+            error_count += self.write_batch(calendar_id, to_create, list(to_update.values()), imported)
+        imported.clear()
+        if checkpoint and not error_count:
+            checkpoint.clear()
+        elapsed = time.monotonic() - started
         
         # Summary
         self.stdout.write('')
         self.stdout.write(self.style.SUCCESS('=' * 50))
-        self.stdout.write(self.style.SUCCESS(f'{calendar_name} Import Summary:'))
+        if dry_run:
+            self.stdout.write(self.style.SUCCESS(f'{calendar_name} Dry Run (nothing written):'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'{calendar_name} Import Summary:'))
         self.stdout.write(self.style.SUCCESS(f'  Created: {created_count}'))
         self.stdout.write(self.style.SUCCESS(f'  Updated: {updated_count}'))
+        self.stdout.write(self.style.SUCCESS(f'  Unchanged: {unchanged_count}'))
         self.stdout.write(self.style.SUCCESS(f'  Skipped: {skipped_count}'))
+        self.stdout.write(self.style.SUCCESS(f'  Sundays removed: {stats["sundays"]}'))
         if error_count > 0:
             self.stdout.write(self.style.ERROR(f'  Errors: {error_count}'))
+            if checkpoint:
+                self.stdout.write(self.style.ERROR(f'  Run the import again to resume from {checkpoint.path}'))
+        rows = idx - resume_after
+        self.stdout.write(self.style.SUCCESS(
+            f'  Throughput: {rows / max(elapsed, 1e-6):.0f} rows/s ({rows} rows in {elapsed:.2f}s)'
+        ))
         self.stdout.write(self.style.SUCCESS('=' * 50))
+        return {
+            'rows': rows,
+            'created': created_count,
+            'updated': updated_count,
+            'unchanged': unchanged_count,
+            'skipped': skipped_count,
+            'sundays': stats['sundays'],
+            'errors': error_count,
+            'seconds': elapsed,
+        }
+
+    def map_booking(self, booking_data, calendar_id):
+        """Map one JSON row to Booking field values (None when it has no valid date)"""
+        booking_date_str = booking_data.get('date')
+        if not booking_date_str:
+            return None
+        
+        try:
+            booking_date = parse_date(booking_date_str)
+        except (ValueError, TypeError):
+            return None
+        if not booking_date:
+            return None
+        
+        # Convert timestamp to datetime (timezone-aware); None keeps the database default
+        timestamp = booking_data.get('timestamp')
+        created_at = None
+        if timestamp:
+            try:
+                # Convert milliseconds to seconds and create timezone-aware datetime
+                naive_dt = datetime.fromtimestamp(timestamp / 1000)
+                created_at = timezone.make_aware(naive_dt)
+            except (ValueError, OSError):
+                created_at = None
+        
+        return {
+            'calendar_id': calendar_id,
+            'booking_date': booking_date,
+            'booking_time': booking_data.get('time', '21h00'),  # Default for Pose
+            'client_name': booking_data.get('name', ''),
+            'client_phone': booking_data.get('phone', ''),
+            'designer_name': 'ancien_rdv',  # Always set to "ancien_rdv" for imported bookings
+            'message': booking_data.get('message', ''),
+            'created_at': created_at,
+        }
+
+    @staticmethod
+    def import_key(values):
+        """A booking already exists when the calendar, date, time and client match"""
+        if isinstance(values, Booking):
+            return tuple(getattr(values, field) for field in IMPORT_KEY_FIELDS)
+        return tuple(values[field] for field in IMPORT_KEY_FIELDS)
+
+    def load_existing_bookings(self, calendar_id):
+        """Existing bookings of the calendar: import key -> (pk, content hash, created_at)"""
+        fields = ('pk', *IMPORT_KEY_FIELDS, *IMPORT_UPDATE_FIELDS)
+        bookings = {}
+        for row in Booking.objects.filter(calendar_id=calendar_id).values_list(*fields).iterator(chunk_size=5000):
+            values = dict(zip(fields, row))
+            bookings.setdefault(self.import_key(values), (values['pk'], content_hash(values), values['created_at']))
+        return bookings
+
+    @staticmethod
+    def remember_batch(imported, existing, committed=True):
+        """
+        Record the batch's bookings in `existing` as (pk, content hash, created_at) and
+        drop the instances, so only the current batch is held as model instances. A
+        failed batch is forgotten: its rows are matched against what the database holds.
+        """
+        if committed:
+            for key, booking in imported.items():
+                existing[key] = (booking.pk, content_hash(vars(booking)), booking.created_at)
+        imported.clear()
+
+    def write_batch(self, calendar_id, to_create, to_update, imported):
+        """
+        Write one batch in its own transaction and return the number of failed rows.
+        bulk_create/bulk_update send no signals, so the change log entries, the
+        calendar version bump (for the sync API, SSE streams and caches) and the
+        DailyOccupancy rows of the new bookings' days are updated here.
+        """
+        try:
+            days = {(calendar_id, booking.booking_date) for booking in to_create}
+            with transaction.atomic():
+                # Before the INSERTs: booking requests on these days wait for the batch
+                lock_occupancy_days(days)
+                with imported_created_at():
+                    Booking.objects.bulk_create(to_create)
+                if to_create and to_create[0].pk is None:
+                    self.fill_created_pks(calendar_id, to_create)
+                if to_update:
+                    Booking.objects.bulk_update(to_update, IMPORT_UPDATE_FIELDS)
+                
+                record_changes(to_create, ChangeLogEntry.ACTION_CREATE)
+                record_changes(to_update, ChangeLogEntry.ACTION_UPDATE)
+                refresh_occupancy(days=days)
+                bump_calendar_version_on_commit(calendar_id)
+        except Exception as e:
+            self.stdout.write(self.style.ERROR(f'  Batch of {len(to_create) + len(to_update)} bookings failed: {str(e)}'))
+            # Rows that were never created must not be matched by later rows
+            for booking in to_create:
+                imported.pop(self.import_key(booking), None)
+            return len(to_create) + len(to_update)
+        return 0
+
+    def fill_created_pks(self, calendar_id, bookings):
+        """Backends that do not return ids from bulk inserts (MySQL): read them back by import key"""
+        by_key = {self.import_key(booking): booking for booking in bookings}
+        rows = Booking.objects.filter(
+            calendar_id=calendar_id,
+            booking_date__in={booking.booking_date for booking in bookings},
+        ).values_list('pk', *IMPORT_KEY_FIELDS)
+        for pk, *key in rows:
+            booking = by_key.get(tuple(key))
+            if booking is not None:
+                booking.pk = pk
+
+    def create_executor(self, workers):
+        # Forked workers must not share the parent's database connections
+        connections.close_all()
+        return ProcessPoolExecutor(max_workers=workers, initializer=django.setup)
+
+    def run_workers(self, jobs, workers):
+        """Import the calendars in parallel; each calendar's output is printed as it finishes"""
+        self.stdout.write(f'Importing {len(jobs)} calendars with {workers} workers...')
+        self.stdout.write('')
+        summaries = {}
+        failures = []
+        with self.create_executor(workers) as executor:
+            futures = {executor.submit(import_calendar_worker, **job): job for job in jobs}
+            for future in as_completed(futures):
+                calendar_name, calendar_id = futures[future]['calendar_name'], futures[future]['calendar_id']
+                try:
+                    output, summary = future.result()
+                except Exception as e:
+                    failures.append(calendar_name)
+                    self.stdout.write(self.style.ERROR(f'{calendar_name} calendar ({calendar_id}) failed: {e}'))
+                    continue
+                self.stdout.write(self.style.WARNING(f'{calendar_name} calendar ({calendar_id}) done:'))
+                self.stdout.write(output)
+                summaries[calendar_name] = summary
+        if failures:
+            raise CommandError(f'Import failed for: {", ".join(failures)}')
+        return summaries
+
+    def write_totals(self, summaries, elapsed):
+        """Totals over all imported calendars"""
+        totals = {field: sum(summary[field] for summary in summaries.values()) for field in SUMMARY_FIELDS}
+        self.stdout.write(self.style.SUCCESS('=' * 60))
+        self.stdout.write(self.style.SUCCESS(f'All calendars ({", ".join(summaries) or "none"}):'))
+        self.stdout.write(self.style.SUCCESS(
+            f'  Created: {totals["created"]}, Updated: {totals["updated"]}, Unchanged: {totals["unchanged"]}, '
+            f'Skipped: {totals["skipped"]}, Errors: {totals["errors"]}'
+        ))
+        self.stdout.write(self.style.SUCCESS(f'Total Sundays filtered: {totals["sundays"]}'))
+        self.stdout.write(self.style.SUCCESS(
+            f'  Throughput: {totals["rows"] / max(elapsed, 1e-6):.0f} rows/s ({totals["rows"]} rows in {elapsed:.2f}s)'
+        ))
 
     def handle(self, *args, **options):
         clear_existing = options['clear']
@@ -279,8 +582,6 @@ class Command(BaseCommand):
         self.stdout.write(self.style.SUCCESS('Calendar Data Transformation and Import'))
         self.stdout.write(self.style.SUCCESS('=' * 60))
         self.stdout.write('')
-        self.stdout.write('Step 1: Creating cleaned JSON files (removing Sundays)')
-        self.stdout.write('')
         
         project_root = self.get_project_root()
         
@@ -329,14 +630,13 @@ class Command(BaseCommand):
                 cleaned_file_path,
                 calendar['calendar_id'],
                 calendar['name'],
-                clear_existing
+                clear_existing,
+                options['batch_size'],
+                dry_run=options['dry_run'],
+                restart=options['restart'],
             )
             return
         
-        # Step 1: Create cleaned JSON files
-        cleaned_files_created = []
-        total_sundays_filtered = 0
-        
         if specific_file:
             # Find matching calendar
             calendar = None
@@ -352,44 +652,36 @@ class Command(BaseCommand):
         else:
             calendars_to_process = calendars
         
+        # One streaming pass per calendar: the original export is filtered and imported
+        # directly; the cleaned copy is only written with --write-cleaned
+        jobs = []
         for calendar in calendars_to_process:
-            self.stdout.write(self.style.WARNING(f'Processing {calendar["name"]} calendar...'))
-            cleaned_file_path, sunday_count = self.create_cleaned_json_file(
-                calendar['original_file'],
-                calendar['cleaned_file']
-            )
-            if cleaned_file_path:
-                cleaned_files_created.append({
-                    'cleaned_file': cleaned_file_path,
-                    'calendar_id': calendar['calendar_id'],
-                    'name': calendar['name'],
-                    'sundays_filtered': sunday_count
-                })
-                total_sundays_filtered += sunday_count
-            self.stdout.write('')
-        
-        self.stdout.write(self.style.SUCCESS('=' * 60))
-        self.stdout.write(self.style.SUCCESS(f'Created {len(cleaned_files_created)} cleaned JSON file(s)'))
-        self.stdout.write(self.style.SUCCESS(f'Total Sundays filtered: {total_sundays_filtered}'))
-        self.stdout.write(self.style.SUCCESS('=' * 60))
-        self.stdout.write('')
-        
-        # Step 2: Import from cleaned files
-        self.stdout.write(self.style.SUCCESS('=' * 60))
-        self.stdout.write(self.style.SUCCESS('Step 2: Importing from cleaned JSON files'))
-        self.stdout.write(self.style.SUCCESS('=' * 60))
-        self.stdout.write('')
-        
-        for file_info in cleaned_files_created:
-            self.stdout.write(self.style.WARNING(f'Importing {file_info["name"]} calendar ({file_info["calendar_id"]})...'))
-            self.import_calendar(
-                file_info['cleaned_file'],
-                file_info['calendar_id'],
-                file_info['name'],
-                clear_existing
-            )
-            self.stdout.write('')
+            cleaned_file_path = None
+            if options['write_cleaned']:
+                cleaned_file_path = os.path.join(project_root, 'data', calendar['cleaned_file'])
+            jobs.append({
+                'file_path': calendar['original_file'],
+                'calendar_id': calendar['calendar_id'],
+                'calendar_name': calendar['name'],
+                'clear_existing': clear_existing,
+                'batch_size': options['batch_size'],
+                'cleaned_file_path': cleaned_file_path,
+                'dry_run': options['dry_run'],
+                'restart': options['restart'],
+            })
+        
+        started = time.monotonic()
+        workers = max(1, min(options['workers'], len(jobs)))
+        if workers == 1:
+            summaries = {}
+            for job in jobs:
+                self.stdout.write(self.style.WARNING(f'Importing {job["calendar_name"]} calendar ({job["calendar_id"]})...'))
+                summaries[job['calendar_name']] = self.import_calendar(**job)
+                self.stdout.write('')
+        else:
+            summaries = self.run_workers(jobs, workers)
         
+        self.write_totals(summaries, time.monotonic() - started)
         self.stdout.write('')
         self.stdout.write(self.style.SUCCESS('=' * 60))
         self.stdout.write(self.style.SUCCESS('Transformation and import completed!'))
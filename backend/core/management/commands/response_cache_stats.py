@@ -0,0 +1,32 @@
+"""
+Django management command to report the list response cache hit/miss counters.
+Usage: python manage.py response_cache_stats [--reset]
+
+Counters are kept in the default cache, so they cover every worker sharing it.
+"""
+from django.core.management.base import BaseCommand
+
+from core.response_cache import get_response_cache_stats, reset_response_cache_stats
+
+
+class Command(BaseCommand):
+    help = 'Show hits, misses and hit rate of the GET /api/bookings/ and /api/holidays/ response cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Reset the counters after printing them'
+        )
+
+    def handle(self, *args, **options):
+        stats = get_response_cache_stats()
+        if not stats:
+            self.stdout.write('No response cache activity recorded yet')
+        for name, counts in stats.items():
+            hit_rate = '-' if counts['hit_rate'] is None else f"{counts['hit_rate']:.1%}"
+            self.stdout.write(f"{name}: {counts['hits']} hits, {counts['misses']} misses, hit rate {hit_rate}")
+
+        if options['reset']:
+            reset_response_cache_stats()
+            self.stdout.write(self.style.SUCCESS('Counters reset'))
@@ -0,0 +1,83 @@
+"""
+Django management command to deliver the queued notification emails (OutboxEmail).
+Usage: python manage.py run_outbox_worker [--once] [--batch-size 20] [--poll-interval 5]
+
+Booking and contact views only write OutboxEmail rows; this worker sends them
+through the configured EMAIL_BACKEND (Gmail API in production).
+
+- Failed sends are retried with exponential backoff
+  (OUTBOX_RETRY_BASE_DELAY * 2^(attempt - 1), capped at OUTBOX_RETRY_MAX_DELAY)
+- After OUTBOX_MAX_ATTEMPTS failures the email is dead-lettered (status "dead")
+  and can be re-queued from the Django admin
+- Several workers can run side by side: due emails are claimed with a lease
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.outbox import deliver_due_emails
+
+
+class Command(BaseCommand):
+    help = 'Deliver queued notification emails with retries, exponential backoff and dead-lettering'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Process the due emails once and exit instead of polling forever'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=20,
+            help='Maximum number of emails sent per batch (default: 20)'
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=5.0,
+            help='Seconds to wait when the outbox is empty (default: 5)'
+        )
+        parser.add_argument(
+            '--max-attempts',
+            type=int,
+            default=None,
+            help='Attempts before an email is dead-lettered (default: OUTBOX_MAX_ATTEMPTS)'
+        )
+
+    def run_batch(self, options):
+        summary = deliver_due_emails(
+            batch_size=options['batch_size'],
+            max_attempts=options['max_attempts'],
+        )
+        if any(summary.values()):
+            self.stdout.write(
+                f"Outbox batch: {summary['sent']} sent, {summary['retried']} rescheduled, {summary['dead']} dead-lettered"
+            )
+        return summary
+
+    def handle(self, *args, **options):
+        if options['max_attempts'] is None:
+            options['max_attempts'] = getattr(settings, 'OUTBOX_MAX_ATTEMPTS', 5)
+
+        if options['once']:
+            # Drain everything that is currently due
+            while True:
+                summary = self.run_batch(options)
+                if sum(summary.values()) < options['batch_size']:
+                    break
+            return
+
+        self.stdout.write(self.style.SUCCESS('Outbox worker started (Ctrl+C to stop)'))
+        try:
+            while True:
+                close_old_connections()
+                summary = self.run_batch(options)
+                # Keep draining while batches are full, otherwise wait for new emails
+                if sum(summary.values()) < options['batch_size']:
+                    time.sleep(options['poll_interval'])
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING('Outbox worker stopped'))
@@ -0,0 +1,71 @@
+"""
+Django management command to run the queued booking resets (BookingResetJob).
+Usage: python manage.py run_reset_jobs [--once] [--pause 0.1] [--poll-interval 5]
+
+DELETE /api/bookings/reset/?chunked=1 only queues a job; this worker deletes its
+bookings batch by batch in short transactions (see core.reset_jobs).
+
+- Progress is committed with every batch and can be polled at /api/bookings/reset/jobs/<id>/
+- A job whose worker died is resumed after --lease seconds without progress
+- Failed jobs can be re-queued from the Django admin; they resume where they stopped
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.reset_jobs import claim_reset_job, run_reset_job
+
+
+class Command(BaseCommand):
+    help = 'Run queued chunked booking resets'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Run the queued jobs once and exit instead of polling forever'
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=0.0,
+            help='Seconds to sleep between batches, leaving room for booking writes (default: 0)'
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=5.0,
+            help='Seconds to wait when no job is queued (default: 5)'
+        )
+        parser.add_argument(
+            '--lease',
+            type=int,
+            default=300,
+            help='Seconds without progress after which a running job is taken over (default: 300)'
+        )
+
+    def run_next_job(self, options):
+        job = claim_reset_job(lease_seconds=options['lease'])
+        if job is None:
+            return None
+        self.stdout.write(f"Booking reset #{job.pk} ({job.calendar_id or 'all calendars'}): {job.total} bookings")
+        run_reset_job(job, pause=options['pause'])
+        style = self.style.SUCCESS if job.status == job.STATUS_DONE else self.style.ERROR
+        self.stdout.write(style(f"Booking reset #{job.pk} {job.status}: {job.deleted} deleted"))
+        return job
+
+    def handle(self, *args, **options):
+        if options['once']:
+            while self.run_next_job(options):
+                pass
+            return
+
+        self.stdout.write(self.style.SUCCESS('Reset job worker started (Ctrl+C to stop)'))
+        try:
+            while True:
+                close_old_connections()
+                if self.run_next_job(options) is None:
+                    time.sleep(options['poll_interval'])
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING('Reset job worker stopped'))
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_alter_user_role'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['calendar_id', 'booking_date', 'booking_time'], name='booking_cal_date_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['calendar_id', 'booking_date'], name='booking_cal_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='holiday',
+            index=models.Index(fields=['holiday_date', 'calendar_id'], name='holiday_date_cal_idx'),
+        ),
+    ]
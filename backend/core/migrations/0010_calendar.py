@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_booking_holiday_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Calendar',
+            fields=[
+                ('id', models.PositiveSmallIntegerField(primary_key=True, serialize=False)),
+                ('slug', models.CharField(max_length=100, unique=True)),
+                ('name', models.CharField(max_length=100)),
+            ],
+            options={
+                'verbose_name': 'Calendrier',
+                'verbose_name_plural': 'Calendriers',
+                'ordering': ['id'],
+            },
+        ),
+    ]
@@ -0,0 +1,90 @@
+"""
+Seed the Calendar registry and rewrite legacy calendar_id values
+("1", "2", "3") on Booking and Holiday rows to their canonical slug
+("calendar1", "calendar2", "calendar3").
+
+Rows are rewritten in primary-key chunks, each chunk in its own short
+transaction, so large booking tables are not locked for the whole run.
+"""
+from django.db import migrations, transaction
+
+CALENDARS = [
+    (1, 'calendar1', 'Pose'),
+    (2, 'calendar2', 'Metré'),
+    (3, 'calendar3', 'SAV'),
+]
+
+CHUNK_SIZE = 1000
+
+
+def _legacy_to_canonical():
+    return {str(pk): slug for pk, slug, _ in CALENDARS}
+
+
+def seed_calendars(apps, schema_editor):
+    Calendar = apps.get_model('core', 'Calendar')
+    for pk, slug, name in CALENDARS:
+        Calendar.objects.update_or_create(pk=pk, defaults={'slug': slug, 'name': name})
+
+
+def canonicalize_bookings(apps, schema_editor):
+    Booking = apps.get_model('core', 'Booking')
+    for legacy_id, canonical_id in _legacy_to_canonical().items():
+        last_pk = 0
+        while True:
+            pks = list(
+                Booking.objects.filter(calendar_id=legacy_id, pk__gt=last_pk)
+                .order_by('pk')
+                .values_list('pk', flat=True)[:CHUNK_SIZE]
+            )
+            if not pks:
+                break
+            with transaction.atomic():
+                Booking.objects.filter(pk__in=pks).update(calendar_id=canonical_id)
+            last_pk = pks[-1]
+
+
+def canonicalize_holidays(apps, schema_editor):
+    Holiday = apps.get_model('core', 'Holiday')
+    for legacy_id, canonical_id in _legacy_to_canonical().items():
+        last_pk = 0
+        while True:
+            chunk = list(
+                Holiday.objects.filter(calendar_id=legacy_id, pk__gt=last_pk)
+                .order_by('pk')
+                .values_list('pk', 'holiday_date')[:CHUNK_SIZE]
+            )
+            if not chunk:
+                break
+            pks = [pk for pk, _ in chunk]
+            dates = [holiday_date for _, holiday_date in chunk]
+            with transaction.atomic():
+                # (calendar_id, holiday_date) is unique: drop legacy rows already covered by a canonical one
+                covered_dates = set(
+                    Holiday.objects.filter(calendar_id=canonical_id, holiday_date__in=dates)
+                    .values_list('holiday_date', flat=True)
+                )
+                duplicate_pks = [pk for pk, holiday_date in chunk if holiday_date in covered_dates]
+                if duplicate_pks:
+                    Holiday.objects.filter(pk__in=duplicate_pks).delete()
+                Holiday.objects.filter(pk__in=pks).exclude(pk__in=duplicate_pks).update(calendar_id=canonical_id)
+            last_pk = pks[-1]
+
+
+def forwards(apps, schema_editor):
+    seed_calendars(apps, schema_editor)
+    canonicalize_bookings(apps, schema_editor)
+    canonicalize_holidays(apps, schema_editor)
+
+
+class Migration(migrations.Migration):
+    # Each chunk commits on its own instead of one long migration transaction
+    atomic = False
+
+    dependencies = [
+        ('core', '0010_calendar'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, migrations.RunPython.noop),
+    ]
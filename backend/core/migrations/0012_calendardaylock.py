@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_canonical_calendar_ids'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CalendarDayLock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('calendar_id', models.CharField(max_length=100)),
+                ('day', models.DateField()),
+                ('locked_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'unique_together': {('calendar_id', 'day')},
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:59
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_booking_created_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeLogEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('booking', 'Réservation'), ('holiday', 'Jour férié')], max_length=20)),
+                ('object_id', models.BigIntegerField()),
+                ('calendar_id', models.CharField(max_length=100)),
+                ('action', models.CharField(choices=[('upsert', 'Création/modification'), ('delete', 'Suppression')], max_length=10)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['calendar_id', 'id'], name='changelog_cal_id_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:01
+
+from django.db import migrations, models
+
+
+def upsert_to_update(apps, schema_editor):
+    # Entries logged before create/update were told apart
+    ChangeLogEntry = apps.get_model('core', 'ChangeLogEntry')
+    ChangeLogEntry.objects.filter(action='upsert').update(action='update')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_changelogentry'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='changelogentry',
+            name='action',
+            field=models.CharField(choices=[('create', 'Création'), ('update', 'Modification'), ('delete', 'Suppression')], max_length=10),
+        ),
+        migrations.RunPython(upsert_to_update, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_changelog_create_update_actions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingResetJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('calendar_id', models.CharField(blank=True, help_text='Empty: every calendar', max_length=100)),
+                ('batch_size', models.PositiveIntegerField(default=1000)),
+                ('archive', models.BooleanField(default=False, help_text='Write the rows to archive_path before deleting them')),
+                ('archive_path', models.CharField(blank=True, max_length=500)),
+                ('status', models.CharField(choices=[('pending', 'En attente'), ('running', 'En cours'), ('done', 'Terminé'), ('failed', 'Échoué')], default='pending', max_length=20)),
+                ('max_pk', models.BigIntegerField(default=0)),
+                ('last_pk', models.BigIntegerField(default=0)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('deleted', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['status', 'updated_at'], name='reset_job_status_idx')],
+            },
+        ),
+    ]
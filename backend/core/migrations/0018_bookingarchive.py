@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:26
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_bookingresetjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingArchive',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('calendar_id', models.CharField(max_length=100)),
+                ('booking_date', models.DateField()),
+                ('booking_time', models.CharField(blank=True, max_length=20)),
+                ('client_name', models.CharField(max_length=255)),
+                ('client_phone', models.CharField(max_length=50)),
+                ('designer_name', models.CharField(max_length=255)),
+                ('message', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ['booking_date', 'booking_time', 'id'],
+                'indexes': [models.Index(fields=['calendar_id', 'booking_date', 'booking_time'], name='archive_cal_date_time_idx'), models.Index(fields=['booking_date'], name='archive_date_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:40
+
+from django.db import migrations, models
+
+# Occupancy slots when this migration was written (core.capacity.get_occupancy_slots()), in
+# bit order. Frozen here so that the backfill does not change with the current slot lists;
+# `manage.py rebuild_occupancy` recomputes the rows after they change.
+OCCUPANCY_SLOTS = {
+    'calendar2': ['8:00', '9:30', '11:00', '12:30', '14:00', '15:30', '17:00', '18:30'],
+    'calendar3': ['8:00-11:00', '11:00-14:00', '14:00-17:00'],
+}
+
+
+def slot_mask(calendar_id, booking_time):
+    slot = (booking_time or '').strip().lower()
+    for bit, tracked in enumerate(OCCUPANCY_SLOTS.get(calendar_id, [])):
+        if tracked.lower() == slot:
+            return 1 << bit
+    return 0
+
+
+def backfill_occupancy(apps, schema_editor):
+    # Same computation as core.capacity.refresh_occupancy(), on the historical models
+    Booking = apps.get_model('core', 'Booking')
+    DailyOccupancy = apps.get_model('core', 'DailyOccupancy')
+
+    occupancy = {}
+    rows = Booking.objects.values('calendar_id', 'booking_date', 'booking_time').annotate(
+        count=models.Count('id')
+    ).order_by()
+    for row in rows:
+        key = (row['calendar_id'], row['booking_date'])
+        count, mask = occupancy.get(key, (0, 0))
+        occupancy[key] = (count + row['count'], mask | slot_mask(row['calendar_id'], row['booking_time']))
+
+    existing = {(row.calendar_id, row.day): row for row in DailyOccupancy.objects.all()}
+    to_create = []
+    to_update = []
+    for (calendar_id, day), (count, mask) in occupancy.items():
+        row = existing.get((calendar_id, day))
+        if row is None:
+            to_create.append(DailyOccupancy(calendar_id=calendar_id, day=day, booked_count=count, occupied_slots_bitmask=mask))
+        else:
+            row.booked_count, row.occupied_slots_bitmask = count, mask
+            to_update.append(row)
+    DailyOccupancy.objects.bulk_create(to_create, batch_size=1000)
+    DailyOccupancy.objects.bulk_update(to_update, ['booked_count', 'occupied_slots_bitmask'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_bookingarchive'),
+    ]
+
+    operations = [
+        migrations.RenameModel(
+            old_name='CalendarDayLock',
+            new_name='DailyOccupancy',
+        ),
+        migrations.AlterModelOptions(
+            name='dailyoccupancy',
+            options={'verbose_name_plural': 'Daily occupancies'},
+        ),
+        migrations.AddField(
+            model_name='dailyoccupancy',
+            name='booked_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='dailyoccupancy',
+            name='occupied_slots_bitmask',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_occupancy, migrations.RunPython.noop),
+    ]
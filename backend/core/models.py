@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth.hashers import make_password, check_password
+from django.utils import timezone
 
 
 class User(models.Model):
@@ -53,6 +54,25 @@ class User(models.Model):
         super().save(*args, **kwargs)
 
 
+class Calendar(models.Model):
+    """
+    Registry of the booking calendars.
+    The integer key is the legacy short id ("1", "2", "3") and the slug is the
+    canonical calendar_id stored on Booking and Holiday rows ("calendar1", ...).
+    """
+    id = models.PositiveSmallIntegerField(primary_key=True)
+    slug = models.CharField(max_length=100, unique=True)
+    name = models.CharField(max_length=100)
+
+    class Meta:
+        ordering = ['id']
+        verbose_name = 'Calendrier'
+        verbose_name_plural = 'Calendriers'
+
+    def __str__(self) -> str:
+        return f"{self.name} ({self.slug})"
+
+
 class Booking(models.Model):
     calendar_id = models.CharField(max_length=100)
     booking_date = models.DateField()
@@ -65,11 +85,79 @@ class Booking(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Slot conflict checks and the (date, time, id) ordered listing per calendar
+            models.Index(fields=['calendar_id', 'booking_date', 'booking_time'], name='booking_cal_date_time_idx'),
+            # Daily capacity counts and date-range listings per calendar
+            models.Index(fields=['calendar_id', 'booking_date'], name='booking_cal_date_idx'),
+            # Newest-first listings (dashboard recent bookings)
+            models.Index(fields=['-created_at'], name='booking_created_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Calendar, day and slot as stored, so that a later save can move the booking
+        # out of its previous DailyOccupancy row (see core.signals)
+        instance._stored_occupancy = tuple(
+            instance.__dict__.get(field) for field in ('calendar_id', 'booking_date', 'booking_time')
+        )
+        return instance
 
     def __str__(self) -> str:
         return f"{self.booking_date} - {self.client_name} ({self.calendar_id})"
 
 
+class BookingArchive(models.Model):
+    """
+    Past bookings moved out of Booking by `manage.py archive_bookings --before`,
+    keeping their id. Read-only: listings reach them through core.archive routing.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    calendar_id = models.CharField(max_length=100)
+    booking_date = models.DateField()
+    booking_time = models.CharField(max_length=20, blank=True)
+    client_name = models.CharField(max_length=255)
+    client_phone = models.CharField(max_length=50)
+    designer_name = models.CharField(max_length=255)
+    message = models.TextField(blank=True)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['booking_date', 'booking_time', 'id']
+        indexes = [
+            # Date-range listings per calendar and the newest archived date (routing)
+            models.Index(fields=['calendar_id', 'booking_date', 'booking_time'], name='archive_cal_date_time_idx'),
+            models.Index(fields=['booking_date'], name='archive_date_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.booking_date} - {self.client_name} ({self.calendar_id}, archived)"
+
+
+class DailyOccupancy(models.Model):
+    """
+    One row per (calendar, day): the number of live bookings and their time slots as a
+    bitmask (bit i = i-th slot of core.capacity.get_occupancy_slots()). Updated in the
+    same transaction as every booking create, update and delete, so capacity checks
+    read this row instead of counting bookings. The row is also locked while a booking
+    for that day is validated and saved, so concurrent writes cannot both pass the checks.
+    """
+    calendar_id = models.CharField(max_length=100)
+    day = models.DateField()
+    booked_count = models.PositiveIntegerField(default=0)
+    occupied_slots_bitmask = models.BigIntegerField(default=0)
+    locked_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['calendar_id', 'day']
+        verbose_name_plural = 'Daily occupancies'
+
+    def __str__(self) -> str:
+        return f"{self.calendar_id} - {self.day}: {self.booked_count}"
+
+
 class ContactMessage(models.Model):
     name = models.CharField(max_length=255)
     email = models.EmailField()
@@ -85,6 +173,44 @@ class ContactMessage(models.Model):
         return f"{self.subject} - {self.email}"
 
 
+class OutboxEmail(models.Model):
+    """
+    Notification email written in the same transaction as the booking/contact change
+    that triggers it, and delivered later by `manage.py run_outbox_worker`.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_SENT = 'sent'
+    STATUS_DEAD = 'dead'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'En attente'),
+        (STATUS_SENT, 'Envoyé'),
+        (STATUS_DEAD, 'Abandonné'),
+    ]
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    content_subtype = models.CharField(max_length=20, default='plain')
+    from_email = models.CharField(max_length=255)
+    to = models.TextField(help_text="Comma-separated recipients")
+    reply_to = models.TextField(blank=True, help_text="Comma-separated reply-to addresses")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            # Worker poll: pending emails that are due
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_status_due_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.subject} -> {self.to} ({self.get_status_display()})"
+
+
 class Holiday(models.Model):
     """Model to store invalid/holiday days per calendar"""
     calendar_id = models.CharField(max_length=100)
@@ -95,6 +221,89 @@ class Holiday(models.Model):
     class Meta:
         ordering = ['holiday_date']
         unique_together = ['calendar_id', 'holiday_date']  # Prevent duplicate holidays for same calendar and date
+        indexes = [
+            # Date-range holiday listings, with or without a calendar filter
+            models.Index(fields=['holiday_date', 'calendar_id'], name='holiday_date_cal_idx'),
+        ]
     
     def __str__(self) -> str:
-        return f"{self.calendar_id} - {self.holiday_date} ({self.description or 'Jour férié'})"
\ No newline at end of file
+        return f"{self.calendar_id} - {self.holiday_date} ({self.description or 'Jour férié'})"
+
+class ChangeLogEntry(models.Model):
+    """
+    Append-only log of booking and holiday writes, recorded in the same transaction
+    as the write. The auto-increment id is the cursor of GET /api/changes/?since=.
+    """
+    KIND_BOOKING = 'booking'
+    KIND_HOLIDAY = 'holiday'
+    KIND_CHOICES = [
+        (KIND_BOOKING, 'Réservation'),
+        (KIND_HOLIDAY, 'Jour férié'),
+    ]
+    ACTION_CREATE = 'create'
+    ACTION_UPDATE = 'update'
+    ACTION_DELETE = 'delete'
+    ACTION_CHOICES = [
+        (ACTION_CREATE, 'Création'),
+        (ACTION_UPDATE, 'Modification'),
+        (ACTION_DELETE, 'Suppression'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    calendar_id = models.CharField(max_length=100)
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            # Changes of one calendar after a cursor
+            models.Index(fields=['calendar_id', 'id'], name='changelog_cal_id_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f"#{self.pk} {self.action} {self.kind} {self.object_id}"
+
+
+class BookingResetJob(models.Model):
+    """
+    Chunked deletion of the bookings of one calendar (or all of them), requested with
+    DELETE /api/bookings/reset/?chunked=1 and run by `manage.py run_reset_jobs`.
+    Rows are deleted in pk order, batch_size per transaction; last_pk records the progress.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'En attente'),
+        (STATUS_RUNNING, 'En cours'),
+        (STATUS_DONE, 'Terminé'),
+        (STATUS_FAILED, 'Échoué'),
+    ]
+
+    calendar_id = models.CharField(max_length=100, blank=True, help_text="Empty: every calendar")
+    batch_size = models.PositiveIntegerField(default=1000)
+    archive = models.BooleanField(default=False, help_text="Write the rows to archive_path before deleting them")
+    archive_path = models.CharField(max_length=500, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    # Bookings created after the request (pk above max_pk) are kept
+    max_pk = models.BigIntegerField(default=0)
+    last_pk = models.BigIntegerField(default=0)
+    total = models.PositiveIntegerField(default=0)
+    deleted = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            # Worker poll: oldest pending or stalled job
+            models.Index(fields=['status', 'updated_at'], name='reset_job_status_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f"Reset #{self.pk} {self.calendar_id or 'all'} ({self.get_status_display()})"
@@ -0,0 +1,150 @@
+"""
+Transactional email outbox.
+
+Views never talk to the email backend (Gmail API) during a request: they call
+enqueue_email(), which only inserts an OutboxEmail row in the current
+transaction. `manage.py run_outbox_worker` then delivers the due rows with
+deliver_due_emails(), retrying failures with exponential backoff and
+dead-lettering emails that keep failing.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import OutboxEmail
+
+logger = logging.getLogger(__name__)
+
+
+def get_notification_recipients():
+    """Recipients of booking/contact notifications (CONTACT_EMAIL_RECIPIENTS, comma-separated)"""
+    default_from_email = getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@example.com')
+    recipient_raw = getattr(settings, 'CONTACT_EMAIL_RECIPIENTS', default_from_email) or default_from_email
+    recipients = [email.strip() for email in recipient_raw.split(',') if email.strip()]
+    return recipients or [default_from_email]
+
+
+def enqueue_email(subject, body, to=None, reply_to=None, content_subtype='plain', from_email=None):
+    """Store an email in the outbox; it is sent by the outbox worker once the transaction commits"""
+    return OutboxEmail.objects.create(
+        subject=subject[:255],
+        body=body,
+        content_subtype=content_subtype,
+        from_email=from_email or getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@example.com'),
+        to=','.join(to or get_notification_recipients()),
+        reply_to=','.join(reply_to or []),
+    )
+
+
+def retry_delay(attempts):
+    """Exponential backoff: OUTBOX_RETRY_BASE_DELAY * 2^(attempts - 1), capped at OUTBOX_RETRY_MAX_DELAY"""
+    base_delay = getattr(settings, 'OUTBOX_RETRY_BASE_DELAY', 60)
+    max_delay = getattr(settings, 'OUTBOX_RETRY_MAX_DELAY', 3600)
+    return timedelta(seconds=min(base_delay * (2 ** max(attempts - 1, 0)), max_delay))
+
+
+def _split_addresses(value):
+    return [address.strip() for address in value.split(',') if address.strip()]
+
+
+def build_message(outbox_email):
+    message = EmailMessage(
+        subject=outbox_email.subject,
+        body=outbox_email.body,
+        from_email=outbox_email.from_email,
+        to=_split_addresses(outbox_email.to),
+        reply_to=_split_addresses(outbox_email.reply_to),
+    )
+    message.content_subtype = outbox_email.content_subtype
+    return message
+
+
+def send_messages(email_connection, messages):
+    """
+    Send messages through the email backend and return the error (or None) for each one.
+    Backends that report per-message results (Gmail batch mode) get the whole list in one
+    call; other backends are called once per message.
+    """
+    if len(messages) > 1 and getattr(email_connection, 'supports_batch_send', False):
+        try:
+            email_connection.send_messages(messages)
+        except Exception as e:
+            return [e] * len(messages)
+        return [getattr(message, 'delivery_error', None) for message in messages]
+
+    errors = []
+    for message in messages:
+        try:
+            if not email_connection.send_messages([message]):
+                raise RuntimeError('Email backend reported 0 messages sent')
+            errors.append(None)
+        except Exception as e:
+            errors.append(e)
+    return errors
+
+
+def claim_due_emails(batch_size, lease_seconds=300):
+    """
+    Reserve up to batch_size due emails for this worker.
+    Claimed rows get their next_attempt_at pushed by the lease, so other workers
+    skip them while they are being sent (and pick them up again if this worker dies).
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        queryset = OutboxEmail.objects.filter(
+            status=OutboxEmail.STATUS_PENDING,
+            next_attempt_at__lte=now,
+        ).order_by('next_attempt_at', 'id')
+        if connection.features.has_select_for_update_skip_locked:
+            queryset = queryset.select_for_update(skip_locked=True)
+        claimed = list(queryset[:batch_size])
+        if claimed:
+            OutboxEmail.objects.filter(pk__in=[email.pk for email in claimed]).update(
+                next_attempt_at=now + timedelta(seconds=lease_seconds)
+            )
+    return claimed
+
+
+def deliver_due_emails(batch_size=20, max_attempts=None):
+    """
+    Send one batch of due outbox emails.
+    Returns a dict with the number of emails sent, rescheduled and dead-lettered.
+    """
+    if max_attempts is None:
+        max_attempts = getattr(settings, 'OUTBOX_MAX_ATTEMPTS', 5)
+
+    summary = {'sent': 0, 'retried': 0, 'dead': 0}
+    claimed = claim_due_emails(batch_size)
+    if not claimed:
+        return summary
+
+    # One backend connection for the whole batch
+    email_connection = get_connection(fail_silently=False)
+    errors = send_messages(email_connection, [build_message(outbox_email) for outbox_email in claimed])
+    for outbox_email, error in zip(claimed, errors):
+        outbox_email.attempts += 1
+        if error is not None:
+            outbox_email.last_error = str(error)[:2000]
+            if outbox_email.attempts >= max_attempts:
+                outbox_email.status = OutboxEmail.STATUS_DEAD
+                summary['dead'] += 1
+                logger.error(f"Outbox email #{outbox_email.pk} dead-lettered after {outbox_email.attempts} attempts: {error}")
+            else:
+                outbox_email.next_attempt_at = timezone.now() + retry_delay(outbox_email.attempts)
+                summary['retried'] += 1
+                logger.warning(f"Outbox email #{outbox_email.pk} failed (attempt {outbox_email.attempts}), retrying at {outbox_email.next_attempt_at}: {error}")
+            outbox_email.save(update_fields=['attempts', 'status', 'next_attempt_at', 'last_error'])
+            continue
+
+        outbox_email.status = OutboxEmail.STATUS_SENT
+        outbox_email.sent_at = timezone.now()
+        outbox_email.last_error = ''
+        outbox_email.save(update_fields=['attempts', 'status', 'sent_at', 'last_error'])
+        summary['sent'] += 1
+        logger.info(f"Outbox email #{outbox_email.pk} sent to {outbox_email.to}")
+
+    return summary
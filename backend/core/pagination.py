@@ -0,0 +1,153 @@
+"""
+Keyset (seek) pagination for the booking listing.
+
+Instead of OFFSET/LIMIT, each page is fetched by seeking past the last row of
+the previous page on the listing's ordering tuple
+``(booking_date, booking_time, id)``. The cost of a page therefore does not
+grow with the amount of booking history stored for a calendar.
+
+Pagination is opt-in: it is only applied when the client sends a ``cursor``
+or ``page_size`` query parameter, so existing callers keep receiving the
+plain list response.
+"""
+import base64
+import binascii
+import json
+from collections import OrderedDict
+from datetime import date
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class BookingKeysetPagination(BasePagination):
+    """
+    Opaque cursor pagination seeking on ``(booking_date, booking_time, id)``.
+
+    Query parameters:
+    - page_size: number of bookings per page (default BOOKING_PAGE_SIZE, capped at BOOKING_MAX_PAGE_SIZE)
+    - cursor: opaque value taken from the ``next`` or ``previous`` link of a previous page
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = 'Curseur de pagination invalide.'
+
+    def is_requested(self, request):
+        """Pagination is only applied when the client explicitly asks for it."""
+        params = request.query_params
+        return self.cursor_query_param in params or self.page_size_query_param in params
+
+    def get_page_size(self, request):
+        default_size = getattr(settings, 'BOOKING_PAGE_SIZE', 100)
+        max_size = getattr(settings, 'BOOKING_MAX_PAGE_SIZE', 500)
+        try:
+            page_size = int(request.query_params.get(self.page_size_query_param, default_size))
+        except (TypeError, ValueError):
+            page_size = default_size
+        if page_size <= 0:
+            page_size = default_size
+        return min(page_size, max_size)
+
+    def encode_cursor(self, booking, reverse):
+        position = {
+            'd': booking.booking_date.isoformat(),
+            't': booking.booking_time or '',
+            'i': booking.pk,
+            'r': 1 if reverse else 0,
+        }
+        raw = json.dumps(position, separators=(',', ':')).encode('utf-8')
+        token = base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+        return replace_query_param(self.base_url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            padded = token + '=' * (-len(token) % 4)
+            position = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+            return {
+                'd': date.fromisoformat(position['d']),
+                't': str(position['t']),
+                'i': int(position['i']),
+                'r': bool(position.get('r')),
+            }
+        except (TypeError, ValueError, KeyError, UnicodeError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+
+    @staticmethod
+    def _seek_filter(position, reverse):
+        """Rows strictly after (or before, when reversed) the cursor position."""
+        op = 'lt' if reverse else 'gt'
+        return (
+            Q(**{f'booking_date__{op}': position['d']})
+            | Q(booking_date=position['d'], **{f'booking_time__{op}': position['t']})
+            | Q(booking_date=position['d'], booking_time=position['t'], **{f'id__{op}': position['i']})
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.is_requested(request):
+            return None
+
+        self.base_url = remove_query_param(request.build_absolute_uri(), self.cursor_query_param)
+        self.page_size = self.get_page_size(request)
+        position = self.decode_cursor(request)
+        reverse = bool(position and position['r'])
+
+        if position is not None:
+            queryset = queryset.filter(self._seek_filter(position, reverse))
+
+        if reverse:
+            queryset = queryset.order_by('-booking_date', '-booking_time', '-id')
+        else:
+            queryset = queryset.order_by('booking_date', 'booking_time', 'id')
+
+        # Fetch one extra row to know whether another page exists in this direction
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        if reverse:
+            # We came back from a later page, so there is always a next page
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+
+        self.page = rows
+        return rows
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
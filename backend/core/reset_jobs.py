@@ -0,0 +1,176 @@
+"""
+Chunked booking resets.
+
+QuerySet.delete() on a whole calendar loads every row to delete into memory and,
+on MySQL, keeps the deleted range locked until the single statement commits,
+blocking booking writes meanwhile. A reset job deletes in pk order instead,
+batch_size rows per short transaction, so concurrent writes wait at most for one batch:
+
+- create_reset_job() snapshots the rows to delete (highest pk, count) and queues the job
+- `manage.py run_reset_jobs` claims queued jobs and runs them with run_reset_job()
+- each batch (archive, delete, change log, progress) commits on its own, so a job
+  interrupted by a crash or an error resumes after its last committed batch
+- GET /api/bookings/reset/jobs/<id>/ reports the progress
+
+With archive, the rows of each batch are appended to a JSON Lines file before they
+are deleted. A batch that fails after being archived is written again when it is
+retried, so readers of the archive should keep the last line per id.
+"""
+import json
+import logging
+import os
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+
+from .capacity import lock_occupancy_days, refresh_occupancy
+from .changes import record_changes
+from .events import broadcaster
+from .models import Booking, BookingResetJob, ChangeLogEntry
+from .versions import bump_calendar_version_on_commit
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_FIELDS = (
+    'id', 'calendar_id', 'booking_date', 'booking_time', 'client_name',
+    'client_phone', 'designer_name', 'message', 'created_at',
+)
+
+
+def get_reset_queryset(calendar_id):
+    """Bookings removed by a reset of one calendar ('' for every calendar)"""
+    bookings = Booking.objects.all()
+    if calendar_id:
+        bookings = bookings.filter(calendar_id=calendar_id)
+    return bookings
+
+
+def create_reset_job(calendar_id='', batch_size=None, archive=False):
+    """Queue the deletion of the calendar's current bookings (later bookings are kept)"""
+    snapshot = get_reset_queryset(calendar_id).aggregate(max_pk=Max('pk'), total=Count('pk'))
+    job = BookingResetJob.objects.create(
+        calendar_id=calendar_id,
+        batch_size=batch_size or getattr(settings, 'RESET_BATCH_SIZE', 1000),
+        archive=archive,
+        max_pk=snapshot['max_pk'] or 0,
+        total=snapshot['total'],
+    )
+    if archive:
+        job.archive_path = os.path.join(settings.BOOKING_ARCHIVE_DIR, f'booking-reset-{job.pk}.jsonl')
+        job.save(update_fields=['archive_path'])
+    return job
+
+
+def claim_reset_job(lease_seconds=300):
+    """
+    Reserve the oldest pending job, or a running job whose worker stopped reporting
+    progress for lease_seconds (it resumes from its last committed batch).
+    """
+    stalled = timezone.now() - timedelta(seconds=lease_seconds)
+    with transaction.atomic():
+        queryset = BookingResetJob.objects.filter(
+            Q(status=BookingResetJob.STATUS_PENDING)
+            | Q(status=BookingResetJob.STATUS_RUNNING, updated_at__lt=stalled)
+        ).order_by('created_at', 'id')
+        if connection.features.has_select_for_update_skip_locked:
+            queryset = queryset.select_for_update(skip_locked=True)
+        job = queryset.first()
+        if job is not None:
+            job.status = BookingResetJob.STATUS_RUNNING
+            job.save(update_fields=['status', 'updated_at'])
+    return job
+
+
+def append_to_archive(path, rows):
+    """Append rows as JSON lines, synced to disk before the batch's DELETE commits"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as f:
+        for row in rows:
+            f.write(json.dumps(row, default=str, ensure_ascii=False) + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def delete_booking_rows(rows):
+    """
+    Delete bookings given as rows with id, calendar_id and booking_date, in the caller's
+    transaction: one DELETE, the change log entries, the occupancy of their days and
+    one version bump per calendar.
+    """
+    days = {(row['calendar_id'], row['booking_date']) for row in rows}
+    # Before the DELETE: booking requests on these days wait for the batch
+    lock_occupancy_days(days)
+    # Plain DELETE ... WHERE id IN (...): the deletion collector would fetch the rows
+    # again and send one post_delete signal (change log insert, occupancy update) per row
+    Booking.objects.filter(pk__in=[row['id'] for row in rows])._raw_delete(Booking.objects.db)
+    record_changes(
+        [Booking(pk=row['id'], calendar_id=row['calendar_id']) for row in rows],
+        ChangeLogEntry.ACTION_DELETE,
+    )
+    refresh_occupancy(days=days)
+    for calendar_id in {row['calendar_id'] for row in rows}:
+        bump_calendar_version_on_commit(calendar_id)
+    transaction.on_commit(broadcaster.notify)
+
+
+def delete_bookings(queryset, batch_size=1000):
+    """
+    Delete every booking of a queryset in the current transaction, batch_size rows per
+    DELETE statement (see delete_booking_rows); returns the number of rows deleted.
+    """
+    deleted = 0
+    last_pk = 0
+    with transaction.atomic():
+        while True:
+            rows = list(queryset.filter(pk__gt=last_pk).order_by('pk').values(
+                'id', 'calendar_id', 'booking_date'
+            )[:batch_size])
+            if not rows:
+                return deleted
+            delete_booking_rows(rows)
+            deleted += len(rows)
+            last_pk = rows[-1]['id']
+
+
+def delete_batch(job):
+    """Delete the job's next batch in one transaction; returns the number of rows deleted"""
+    fields = ARCHIVE_FIELDS if job.archive else ('id', 'calendar_id', 'booking_date')
+    with transaction.atomic():
+        rows = list(get_reset_queryset(job.calendar_id).filter(
+            pk__gt=job.last_pk,
+            pk__lte=job.max_pk,
+        ).order_by('pk').values(*fields)[:job.batch_size])
+        if not rows:
+            return 0
+        if job.archive:
+            append_to_archive(job.archive_path, rows)
+
+        delete_booking_rows(rows)
+
+        job.last_pk = rows[-1]['id']
+        job.deleted += len(rows)
+        job.save(update_fields=['last_pk', 'deleted', 'updated_at'])
+    return len(rows)
+
+
+def run_reset_job(job, pause=0):
+    """Delete the job's bookings batch by batch, sleeping `pause` seconds between batches"""
+    try:
+        while delete_batch(job):
+            if pause:
+                time.sleep(pause)
+    except Exception as e:
+        job.status = BookingResetJob.STATUS_FAILED
+        job.error = str(e)[:2000]
+        logger.error(f"Booking reset #{job.pk} failed after {job.deleted} deletions: {e}")
+    else:
+        job.status = BookingResetJob.STATUS_DONE
+        job.error = ''
+        logger.info(f"Booking reset #{job.pk} deleted {job.deleted} bookings")
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'error', 'finished_at', 'updated_at'])
+    return job
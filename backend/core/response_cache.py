@@ -0,0 +1,88 @@
+"""
+Server-side cache for list responses.
+
+GET /api/bookings/ and GET /api/holidays/ return the same data to every user
+for the same query, so the serialized payload is cached under the listing's
+ETag (view, normalized query string and calendar data version, see
+core.conditional). A booking or holiday write bumps the calendar version once
+it commits, so the next request for that calendar misses and recomputes, while
+the other calendars keep being served from the cache. Nothing is deleted on
+writes; stale entries simply expire after RESPONSE_CACHE_TTL.
+
+Hits and misses are counted per view in the cache (so every worker sharing the
+cache contributes); see get_response_cache_stats() and
+`manage.py response_cache_stats`.
+"""
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+RESPONSE_KEY = 'response:{etag}'
+STATS_KEY = 'response_cache_stats:{name}:{event}'
+STATS_NAMES_KEY = 'response_cache_stats:names'
+
+
+def get_response_cache_ttl():
+    """Seconds a list response stays cached (0 disables the cache)"""
+    return getattr(settings, 'RESPONSE_CACHE_TTL', 300)
+
+
+def _plain(data):
+    # ReturnList/ReturnDict keep a reference to their serializer: store plain containers
+    if isinstance(data, dict):
+        return OrderedDict((key, _plain(value)) for key, value in data.items())
+    if isinstance(data, list):
+        return [_plain(item) for item in data]
+    return data
+
+
+def get_cached_response(etag):
+    """Cached response data for an ETag, or None"""
+    return cache.get(RESPONSE_KEY.format(etag=etag))
+
+
+def cache_response(etag, data):
+    cache.set(RESPONSE_KEY.format(etag=etag), _plain(data), timeout=get_response_cache_ttl())
+
+
+def _incr(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def record_cache_event(name, hit):
+    """Count a hit or a miss of the named response cache"""
+    _incr(STATS_KEY.format(name=name, event='hits' if hit else 'misses'))
+    names = cache.get(STATS_NAMES_KEY) or ()
+    if name not in names:
+        cache.set(STATS_NAMES_KEY, tuple(sorted(set(names) | {name})), timeout=None)
+
+
+def get_response_cache_stats():
+    """Return {name: {'hits', 'misses', 'hit_rate'}} for every response cache used so far"""
+    names = cache.get(STATS_NAMES_KEY) or ()
+    keys = [STATS_KEY.format(name=name, event=event) for name in names for event in ('hits', 'misses')]
+    counts = cache.get_many(keys)
+    stats = {}
+    for name in names:
+        hits = counts.get(STATS_KEY.format(name=name, event='hits'), 0)
+        misses = counts.get(STATS_KEY.format(name=name, event='misses'), 0)
+        total = hits + misses
+        stats[name] = {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / total, 4) if total else None,
+        }
+    return stats
+
+
+def reset_response_cache_stats():
+    names = cache.get(STATS_NAMES_KEY) or ()
+    cache.delete_many(
+        [STATS_KEY.format(name=name, event=event) for name in names for event in ('hits', 'misses')]
+        + [STATS_NAMES_KEY]
+    )
@@ -1,7 +1,9 @@
 from datetime import date, timedelta
 from rest_framework import serializers
 
-from .models import Booking, ContactMessage, Holiday, User
+from .calendars import resolve_calendar_id
+from .capacity import get_day_occupancy, lock_calendar_day, lock_occupancy_days, normalize_slot
+from .models import Booking, BookingResetJob, ContactMessage, Holiday, User
 
 CALENDAR_DAILY_LIMITS = {
     'calendar1': 2,  # Pose calendar: 2 bookings per day
@@ -10,7 +12,6 @@ CALENDAR_DAILY_LIMITS = {
 TIME_SLOT_CALENDARS = {'calendar2', 'calendar3'}  # SAV and Metré use time slots
 ALLOWED_TIME_SLOTS = {
     'calendar3': ['8:00-11:00', '11:00-14:00', '14:00-17:00'],
-    '3': ['8:00-11:00', '11:00-14:00', '14:00-17:00'],
 }
 
 
@@ -103,11 +104,15 @@ class BookingSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'created_at']
 
+    def validate_calendar_id(self, value):
+        # Accept legacy short ids ("1") and store the canonical slug ("calendar1")
+        return resolve_calendar_id(value)
+
     def validate(self, attrs):
         # For updates, use instance's calendar_id if not provided in attrs
         calendar_id = attrs.get('calendar_id')
         if not calendar_id and self.instance:
-            calendar_id = self.instance.calendar_id
+            calendar_id = resolve_calendar_id(self.instance.calendar_id)
         
         booking_date = attrs.get('booking_date')
         if not booking_date and self.instance:
@@ -119,7 +124,7 @@ class BookingSerializer(serializers.ModelSerializer):
         booking_time = booking_time or ''
         
         # For Pose calendar, set default time if empty
-        if calendar_id and calendar_id in ['calendar1', '1'] and not booking_time:
+        if calendar_id == 'calendar1' and not booking_time:
             booking_time = '21h00'
             attrs['booking_time'] = booking_time
 
@@ -136,92 +141,54 @@ class BookingSerializer(serializers.ModelSerializer):
         
         # For Pose calendar (calendar1): Prevent bookings for today and tomorrow
         # Bookings can only be made from the 3rd day onwards
-        if calendar_id in ['calendar1', '1']:
+        if calendar_id == 'calendar1':
             if booking_date <= tomorrow:
                 raise serializers.ValidationError({
                     'booking_date': 'Pour le calendrier Pose, vous ne pouvez pas réserver pour aujourd\'hui ou demain. Les réservations sont autorisées à partir du surlendemain.'
                 })
         
         # For SAV (calendar2) and Metré (calendar3): Prevent bookings for today and tomorrow
-        if calendar_id in ['calendar2', '2', 'calendar3', '3']:
+        if calendar_id in TIME_SLOT_CALENDARS:
             if booking_date <= tomorrow:
                 raise serializers.ValidationError({
                     'booking_date': 'Pour les calendriers SAV et Metré, vous ne pouvez pas réserver pour aujourd\'hui ou demain. Les réservations sont autorisées à partir du surlendemain.'
                 })
         
-        # Check if the date is marked as a holiday/invalid day
-        # Handle legacy calendar_id formats
-        calendar_ids_to_check = [calendar_id]
-        if calendar_id == 'calendar1':
-            calendar_ids_to_check.append('1')
-        elif calendar_id == 'calendar2':
-            calendar_ids_to_check.append('2')
-        elif calendar_id == 'calendar3':
-            calendar_ids_to_check.append('3')
-        elif calendar_id == '1':
-            calendar_ids_to_check.append('calendar1')
-        elif calendar_id == '2':
-            calendar_ids_to_check.append('calendar2')
-        elif calendar_id == '3':
-            calendar_ids_to_check.append('calendar3')
+        # Booking writes lock the (calendar, day) row so that concurrent requests
+        # are checked one after the other (see BookingListCreateView.create)
+        if self.context.get('reserve_capacity'):
+            stored_day = (self.instance.calendar_id, self.instance.booking_date) if self.instance is not None else None
+            if stored_day is None or stored_day == (calendar_id, booking_date):
+                lock_calendar_day(calendar_id, booking_date)
+            else:
+                # A move also updates the stored day's row once saved: lock both now, in key
+                # order, so that opposite moves (X -> Y and Y -> X) cannot deadlock
+                lock_occupancy_days([stored_day, (calendar_id, booking_date)])
         
-        holiday_exists = Holiday.objects.filter(
-            calendar_id__in=calendar_ids_to_check,
-            holiday_date=booking_date
-        ).exists()
+        # Holiday flag, day's booking count and occupied slots in a single query
+        occupancy = get_day_occupancy(
+            calendar_id,
+            booking_date,
+            exclude=self.instance,
+            booking_time=booking_time.strip() if calendar_id in TIME_SLOT_CALENDARS else None
+        )
         
-        if holiday_exists:
+        # Check if the date is marked as a holiday/invalid day
+        if occupancy.is_holiday:
             raise serializers.ValidationError({
                 'booking_date': 'Cette date est un jour férié ou un jour non disponible. Les réservations ne sont pas autorisées pour cette date.'
             })
 
-        # Handle legacy calendar_id formats: "1" instead of "calendar1", etc.
-        calendar_ids_to_query = [calendar_id]
-        if calendar_id == 'calendar1':
-            calendar_ids_to_query.append('1')
-        elif calendar_id == 'calendar2':
-            calendar_ids_to_query.append('2')
-        elif calendar_id == 'calendar3':
-            calendar_ids_to_query.append('3')
-        elif calendar_id == '1':
-            calendar_ids_to_query.append('calendar1')
-        elif calendar_id == '2':
-            calendar_ids_to_query.append('calendar2')
-        elif calendar_id == '3':
-            calendar_ids_to_query.append('calendar3')
-        
-        # Filter bookings for this calendar and date, excluding past dates
-        # Check all possible calendar_id formats
-        queryset = Booking.objects.filter(
-            calendar_id__in=calendar_ids_to_query,
-            booking_date=booking_date
-        ).filter(booking_date__gte=today)  # Only count future/present dates
-        
-        if self.instance:
-            queryset = queryset.exclude(pk=self.instance.pk)
-
         # For Pose (calendar1): Check total bookings per date
-        if calendar_id in ['calendar1', '1']:
-            max_per_day = CALENDAR_DAILY_LIMITS.get('calendar1')
-            if max_per_day is not None:
-                if queryset.count() >= max_per_day:
-                    raise serializers.ValidationError({
-                        'booking_date': f'Cette date a déjà atteint la limite de {max_per_day} réservations. Veuillez choisir une autre date.'
-                    })
+        max_per_day = CALENDAR_DAILY_LIMITS.get(calendar_id)
+        if max_per_day is not None:
+            if occupancy.booked_count >= max_per_day:
+                raise serializers.ValidationError({
+                    'booking_date': f'Cette date a déjà atteint la limite de {max_per_day} réservations. Veuillez choisir une autre date.'
+                })
 
         # For SAV (calendar2) and Metré (calendar3): Check specific time slot
-        # Also handle legacy calendar_id formats: "2" instead of "calendar2", "3" instead of "calendar3"
-        calendar_ids_to_check = [calendar_id]
-        if calendar_id == 'calendar2':
-            calendar_ids_to_check.append('2')
-        elif calendar_id == 'calendar3':
-            calendar_ids_to_check.append('3')
-        elif calendar_id == '2':
-            calendar_ids_to_check.append('calendar2')
-        elif calendar_id == '3':
-            calendar_ids_to_check.append('calendar3')
-        
-        if calendar_id in TIME_SLOT_CALENDARS or calendar_id in ['2', '3']:
+        if calendar_id in TIME_SLOT_CALENDARS:
             if not booking_time:
                 raise serializers.ValidationError({
                     'booking_time': 'Un créneau horaire est requis pour ce calendrier.'
@@ -240,19 +207,7 @@ class BookingSerializer(serializers.ModelSerializer):
             attrs['booking_time'] = normalized_booking_time
             
             # Check if this exact time slot is already booked for this date
-            # Check all possible calendar_id formats
-            slot_qs = queryset.none()
-            for cid in calendar_ids_to_check:
-                slot_qs = slot_qs | Booking.objects.filter(
-                    calendar_id=cid,
-                    booking_date=booking_date,
-                    booking_date__gte=today
-                ).filter(booking_time__iexact=normalized_booking_time)
-            
-            if self.instance:
-                slot_qs = slot_qs.exclude(pk=self.instance.pk)
-            
-            if slot_qs.exists():
+            if normalize_slot(normalized_booking_time) in occupancy.occupied_slots:
                 raise serializers.ValidationError({
                     'booking_time': f'Ce créneau ({normalized_booking_time}) est déjà réservé pour cette date. Veuillez choisir un autre créneau.'
                 })
@@ -266,6 +221,10 @@ class HolidaySerializer(serializers.ModelSerializer):
         fields = ['id', 'calendar_id', 'holiday_date', 'description', 'created_at']
         read_only_fields = ['id', 'created_at']
     
+    def validate_calendar_id(self, value):
+        # Accept legacy short ids ("1") and store the canonical slug ("calendar1")
+        return resolve_calendar_id(value)
+    
     def validate(self, attrs):
         try:
             calendar_id = attrs.get('calendar_id')
@@ -274,23 +233,8 @@ class HolidaySerializer(serializers.ModelSerializer):
             if not calendar_id or not holiday_date:
                 return attrs
             
-            # Handle legacy calendar_id formats: "1" instead of "calendar1", etc.
-            calendar_ids_to_check = [calendar_id]
-            if calendar_id == 'calendar1':
-                calendar_ids_to_check.append('1')
-            elif calendar_id == 'calendar2':
-                calendar_ids_to_check.append('2')
-            elif calendar_id == 'calendar3':
-                calendar_ids_to_check.append('3')
-            elif calendar_id == '1':
-                calendar_ids_to_check.append('calendar1')
-            elif calendar_id == '2':
-                calendar_ids_to_check.append('calendar2')
-            elif calendar_id == '3':
-                calendar_ids_to_check.append('calendar3')
-            
-            # Check if holiday already exists for this calendar and date (check all possible formats)
-            queryset = Holiday.objects.filter(calendar_id__in=calendar_ids_to_check, holiday_date=holiday_date)
+            # Check if holiday already exists for this calendar and date
+            queryset = Holiday.objects.filter(calendar_id=calendar_id, holiday_date=holiday_date)
             if self.instance:
                 queryset = queryset.exclude(pk=self.instance.pk)
             
@@ -310,3 +254,19 @@ class HolidaySerializer(serializers.ModelSerializer):
                 'non_field_errors': [f'Erreur de validation: {str(e)}']
             })
 
+class BookingResetJobSerializer(serializers.ModelSerializer):
+    progress = serializers.SerializerMethodField()
+
+    class Meta:
+        model = BookingResetJob
+        fields = [
+            'id', 'calendar_id', 'status', 'total', 'deleted', 'progress', 'batch_size',
+            'archive', 'archive_path', 'error', 'created_at', 'updated_at', 'finished_at',
+        ]
+        read_only_fields = fields
+
+    def get_progress(self, job):
+        """Share of the snapshotted bookings deleted so far (1.0 when there were none)"""
+        if not job.total:
+            return 1.0
+        return round(min(job.deleted / job.total, 1.0), 4)
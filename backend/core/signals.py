@@ -0,0 +1,88 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import invalidate_cached_user
+from .calendars import clear_calendar_cache
+from .capacity import refresh_occupancy, update_occupancy
+from .changes import record_change
+from .events import broadcaster
+from .models import Booking, Calendar, ChangeLogEntry, Holiday, User
+from .versions import USERS_SCOPE, bump_calendar_version_on_commit, bump_versions_on_commit
+
+
+@receiver([post_save, post_delete], sender=Calendar)
+def calendar_changed(sender, **kwargs):
+    """Drop the in-process calendar registry so the next lookup reloads it"""
+    clear_calendar_cache()
+
+
+@receiver([post_save, post_delete], sender=User)
+def user_changed(sender, instance, signal, **kwargs):
+    """Move the cached JWT user to the new updated_at (or drop it) so the next request sees the new role/email (or no user)"""
+    user_id = instance.pk
+    updated_at = instance.updated_at if signal is post_save else None
+    invalidate_cached_user(user_id, updated_at)
+    # Again once committed: a request may have cached the previous row meanwhile
+    transaction.on_commit(lambda: invalidate_cached_user(user_id, updated_at))
+    # New ETag for GET /api/users/
+    bump_versions_on_commit(USERS_SCOPE)
+
+
+@receiver([post_save, post_delete], sender=Booking)
+@receiver([post_save, post_delete], sender=Holiday)
+def calendar_data_changed(sender, instance, **kwargs):
+    """Invalidate the calendar's cached availability once the write commits"""
+    bump_calendar_version_on_commit(instance.calendar_id)
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_save, sender=Holiday)
+def log_calendar_data_saved(sender, instance, created=False, raw=False, **kwargs):
+    """Append the write to the change log (same transaction) for GET /api/changes/ and /api/events/"""
+    if not raw:
+        record_change(instance, ChangeLogEntry.ACTION_CREATE if created else ChangeLogEntry.ACTION_UPDATE)
+        # Push to this process' SSE streams as soon as the write is visible
+        transaction.on_commit(broadcaster.notify)
+
+
+@receiver(post_delete, sender=Booking)
+@receiver(post_delete, sender=Holiday)
+def log_calendar_data_deleted(sender, instance, **kwargs):
+    """Append a tombstone to the change log (same transaction) for GET /api/changes/ and /api/events/"""
+    record_change(instance, ChangeLogEntry.ACTION_DELETE)
+    transaction.on_commit(broadcaster.notify)
+
+
+def _occupancy_key(booking):
+    return (booking.calendar_id, booking.booking_date, booking.booking_time)
+
+
+@receiver(post_save, sender=Booking)
+def booking_occupancy_saved(sender, instance, created=False, raw=False, **kwargs):
+    """Count the booking in its day's DailyOccupancy row (same transaction)"""
+    if raw:
+        return
+    current = _occupancy_key(instance)
+    stored = None if created else getattr(instance, '_stored_occupancy', None)
+    if created:
+        update_occupancy(current[0], current[1], count_delta=1, added_time=current[2])
+    elif stored is None or None in stored:
+        # Saved without being loaded first: its previous day is unknown
+        refresh_occupancy(days=[current[:2]])
+    elif stored[:2] == current[:2]:
+        if stored[2] != current[2]:
+            update_occupancy(current[0], current[1], added_time=current[2], removed_time=stored[2])
+    else:
+        update_occupancy(stored[0], stored[1], count_delta=-1, removed_time=stored[2])
+        update_occupancy(current[0], current[1], count_delta=1, added_time=current[2])
+    instance._stored_occupancy = current
+
+
+@receiver(post_delete, sender=Booking)
+def booking_occupancy_deleted(sender, instance, **kwargs):
+    """Remove the booking from its day's DailyOccupancy row (same transaction)"""
+    stored = getattr(instance, '_stored_occupancy', None)
+    if stored is None or None in stored:
+        stored = _occupancy_key(instance)
+    update_occupancy(stored[0], stored[1], count_delta=-1, removed_time=stored[2])
@@ -2,16 +2,21 @@
 Comprehensive unit tests for all API endpoints in the calendar application.
 Tests cover authentication, authorization, CRUD operations, validation, and edge cases.
 """
+import threading
 from datetime import date, timedelta
+from io import StringIO
 from unittest.mock import patch
 
-from django.test import TestCase, override_settings
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APIClient
 from rest_framework_simplejwt.tokens import RefreshToken
 
-from .models import Booking, Holiday, User, ContactMessage
+from .models import Booking, ChangeLogEntry, Holiday, User, ContactMessage
 
 
 # Use SQLite in tests to avoid external DB dependency
@@ -136,6 +141,9 @@ class BookingApiTests(TestCase):
     """Comprehensive tests for Booking APIs"""
     
     def setUp(self):
+        from django.core.cache import cache
+        # Cached list responses would outlive the rolled-back data of other tests
+        cache.clear()
         self.client = APIClient()
         self.list_url = reverse("booking-list-create")
         self.future_date = (date.today() + timedelta(days=3)).isoformat()
@@ -575,136 +583,2776 @@ class BookingApiTests(TestCase):
 
 
 @override_settings(DATABASES=TEST_DATABASES)
-class BookingResetApiTests(TestCase):
-    """Tests for BookingResetView - DELETE (admin only)"""
+class BookingKeysetPaginationApiTests(TestCase):
+    """Tests for the opt-in keyset pagination of GET /api/bookings/"""
     
     def setUp(self):
+        from django.core.cache import cache
+        # Cached list responses would outlive the rolled-back data of other tests
+        cache.clear()
         self.client = APIClient()
-        self.url = reverse("booking-reset")
-        self.future_date = date.today() + timedelta(days=3)
+        self.list_url = reverse("booking-list-create")
+        create_authenticated_user(self.client)
+        base_date = date.today() + timedelta(days=3)
+        # 3 dates x 2 slots, inserted out of order to check the seek ordering
+        self.bookings = []
+        for day_offset in (2, 0, 1):
+            for slot in ("14:00-17:00", "8:00-11:00"):
+                self.bookings.append(Booking.objects.create(
+                    calendar_id="calendar3",
+                    booking_date=base_date + timedelta(days=day_offset),
+                    booking_time=slot,
+                    client_name=f"Client {day_offset} {slot}",
+                    client_phone="111",
+                    designer_name="Designer"
+                ))
+        self.expected_ids = [
+            b.id for b in sorted(self.bookings, key=lambda b: (b.booking_date, b.booking_time, b.id))
+        ]
     
-    def test_reset_bookings_requires_authentication(self):
-        """Test that reset requires authentication"""
-        response = self.client.delete(self.url, format="json")
-        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+    def test_list_is_not_paginated_by_default(self):
+        """Test that the plain list response is kept without pagination params"""
+        response = self.client.get(self.list_url, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsInstance(response.data, list)
+        self.assertEqual(len(response.data), 6)
     
-    def test_reset_bookings_requires_admin(self):
-        """Test that reset requires admin role"""
-        create_authenticated_user(self.client, role='concepteur')
-        response = self.client.delete(self.url, format="json")
-        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+    def test_paginate_forward_through_all_pages(self):
+        """Test following next links returns every booking once, in order"""
+        seen_ids = []
+        response = self.client.get(self.list_url, {"page_size": 4}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(response.data["previous"])
+        seen_ids.extend(b["id"] for b in response.data["results"])
+        self.assertEqual(len(response.data["results"]), 4)
+        
+        response = self.client.get(response.data["next"], format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        seen_ids.extend(b["id"] for b in response.data["results"])
+        self.assertIsNone(response.data["next"])
+        self.assertIsNotNone(response.data["previous"])
+        
+        self.assertEqual(seen_ids, self.expected_ids)
     
-    def test_reset_all_bookings(self):
-        """Test resetting all bookings"""
-        admin_user, _ = create_authenticated_user(self.client, role='admin')
+    def test_paginate_backward_with_previous_link(self):
+        """Test that the previous link returns the preceding page"""
+        first = self.client.get(self.list_url, {"page_size": 2}, format="json")
+        second = self.client.get(first.data["next"], format="json")
+        back = self.client.get(second.data["previous"], format="json")
+        
+        self.assertEqual(back.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [b["id"] for b in back.data["results"]],
+            [b["id"] for b in first.data["results"]]
+        )
+        self.assertIsNone(back.data["previous"])
+        self.assertIsNotNone(back.data["next"])
+    
+    def test_paginate_respects_filters(self):
+        """Test that pagination applies on top of the calendar/date filters"""
         Booking.objects.create(
             calendar_id="calendar1",
-            booking_date=self.future_date,
-            client_name="Client 1",
-            client_phone="111",
-            designer_name="Designer 1"
+            booking_date=date.today() + timedelta(days=3),
+            client_name="Other",
+            client_phone="222",
+            designer_name="Designer"
+        )
+        response = self.client.get(
+            self.list_url, {"calendar_id": "calendar1", "page_size": 10}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertIsNone(response.data["next"])
+    
+    @override_settings(BOOKING_MAX_PAGE_SIZE=3)
+    def test_page_size_is_capped(self):
+        """Test that page_size cannot exceed BOOKING_MAX_PAGE_SIZE"""
+        response = self.client.get(self.list_url, {"page_size": 1000}, format="json")
+        self.assertEqual(len(response.data["results"]), 3)
+    
+    def test_invalid_cursor_rejected(self):
+        """Test that a tampered cursor returns 404"""
+        response = self.client.get(self.list_url, {"cursor": "not-a-cursor"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+@override_settings(DATABASES=TEST_DATABASES)
+class CalendarRegistryTests(TestCase):
+    """Tests for the canonical calendar registry and legacy id resolution"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        create_authenticated_user(self.client)
+        self.future_date = date.today() + timedelta(days=3)
+    
+    def test_resolve_calendar_id_accepts_both_spellings(self):
+        """Test that legacy short ids resolve to the canonical slug"""
+        from .calendars import resolve_calendar_id
+        self.assertEqual(resolve_calendar_id("1"), "calendar1")
+        self.assertEqual(resolve_calendar_id("calendar2"), "calendar2")
+        self.assertEqual(resolve_calendar_id(" 3 "), "calendar3")
+        self.assertEqual(resolve_calendar_id("unknown"), "unknown")
+    
+    def test_registry_is_seeded(self):
+        """Test that the migration seeds the three calendars"""
+        from .models import Calendar
+        self.assertEqual(
+            list(Calendar.objects.values_list("id", "slug")),
+            [(1, "calendar1"), (2, "calendar2"), (3, "calendar3")]
         )
+    
+    def test_calendar_change_clears_registry_cache(self):
+        """Test that saving a Calendar is picked up by the resolver"""
+        from .calendars import clear_calendar_cache, get_calendar_label, resolve_calendar_id
+        from .models import Calendar
+        # The rollback at the end of the test does not fire signals
+        self.addCleanup(clear_calendar_cache)
+        self.assertEqual(resolve_calendar_id("4"), "4")
+        Calendar.objects.create(id=4, slug="calendar4", name="Atelier")
+        self.assertEqual(resolve_calendar_id("4"), "calendar4")
+        self.assertEqual(get_calendar_label("4"), "Atelier")
+    
+    def test_booking_created_with_legacy_id_is_stored_canonical(self):
+        """Test that POSTing calendar_id=1 stores calendar1"""
+        response = self.client.post(reverse("booking-list-create"), {
+            "calendar_id": "1",
+            "booking_date": self.future_date.isoformat(),
+            "client_name": "John",
+            "client_phone": "0123456789",
+            "designer_name": "Jane",
+        }, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["calendar_id"], "calendar1")
+        self.assertEqual(Booking.objects.get().calendar_id, "calendar1")
+    
+    def test_list_bookings_filter_by_legacy_id(self):
+        """Test that ?calendar_id=2 matches canonical calendar2 rows"""
         Booking.objects.create(
             calendar_id="calendar2",
             booking_date=self.future_date,
             booking_time="10h00",
-            client_name="Client 2",
-            client_phone="222",
-            designer_name="Designer 2"
+            client_name="Client",
+            client_phone="111",
+            designer_name="Designer"
         )
+        response = self.client.get(reverse("booking-list-create"), {"calendar_id": "2"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 1)
+    
+    def test_migration_rewrites_legacy_rows(self):
+        """Test that the data migration canonicalizes bookings and merges duplicate holidays"""
+        import importlib
+        from django.apps import apps
+        migration = importlib.import_module("core.migrations.0011_canonical_calendar_ids")
         
-        response = self.client.delete(self.url, format="json")
+        legacy_booking = Booking.objects.create(
+            calendar_id="3",
+            booking_date=self.future_date,
+            booking_time="8:00-11:00",
+            client_name="Client",
+            client_phone="111",
+            designer_name="Designer"
+        )
+        Holiday.objects.create(calendar_id="calendar1", holiday_date=self.future_date)
+        Holiday.objects.create(calendar_id="1", holiday_date=self.future_date)
+        Holiday.objects.create(calendar_id="1", holiday_date=self.future_date + timedelta(days=1))
         
-        self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data["deleted"], 2)
-        self.assertEqual(Booking.objects.count(), 0)
+        migration.forwards(apps, None)
+        
+        legacy_booking.refresh_from_db()
+        self.assertEqual(legacy_booking.calendar_id, "calendar3")
+        self.assertFalse(Holiday.objects.filter(calendar_id="1").exists())
+        self.assertEqual(Holiday.objects.filter(calendar_id="calendar1").count(), 2)
+
+
+@override_settings(DATABASES=TEST_DATABASES)
+class BookingWriteQueryCountTests(TestCase):
+    """Query-count regression tests pinning the round-trips of booking writes"""
     
-    def test_reset_bookings_by_calendar(self):
-        """Test resetting bookings for specific calendar"""
-        admin_user, _ = create_authenticated_user(self.client, role='admin')
+    # The view's transaction.atomic() runs as a savepoint inside the test transaction,
+    # so every write also counts SAVEPOINT + RELEASE SAVEPOINT (BEGIN/COMMIT in production),
+    # plus the outbox INSERT's own SAVEPOINT + RELEASE SAVEPOINT.
+    # Authentication user lookup + capacity row lock + occupancy query + INSERT + occupancy UPDATE
+    # + change log INSERT + outbox INSERT
+    CREATE_QUERIES = 7 + 2 + 2
+    # Authentication user lookup + object lookup + capacity row lock + occupancy query + UPDATE
+    # + occupancy UPDATE + change log INSERT + outbox INSERT
+    UPDATE_QUERIES = 8 + 2 + 2
+    
+    def setUp(self):
+        from .models import DailyOccupancy
+        self.client = APIClient()
+        self.list_url = reverse("booking-list-create")
+        self.future_date = date.today() + timedelta(days=3)
+        create_authenticated_user(self.client)
+        # Steady state: the capacity rows already exist for the days being booked
+        for calendar_id in ("calendar2", "calendar3"):
+            DailyOccupancy.objects.create(calendar_id=calendar_id, day=self.future_date)
+    
+    def _payload(self, **overrides):
+        payload = {
+            "calendar_id": "calendar3",
+            "booking_date": self.future_date.isoformat(),
+            "booking_time": "8:00-11:00",
+            "client_name": "John Doe",
+            "client_phone": "0123456789",
+            "designer_name": "Jane Designer",
+        }
+        payload.update(overrides)
+        return payload
+    
+    def test_get_day_occupancy_single_query(self):
+        """Test that holiday flag, count and occupied slots come from one query"""
+        from .capacity import get_day_occupancy
+        Holiday.objects.create(calendar_id="calendar3", holiday_date=self.future_date)
         Booking.objects.create(
-            calendar_id="calendar1",
+            calendar_id="calendar3",
             booking_date=self.future_date,
-            client_name="Client 1",
+            booking_time=" 11:00-14:00 ",
+            client_name="Client",
             client_phone="111",
-            designer_name="Designer 1"
+            designer_name="Designer"
+        )
+        with self.assertNumQueries(1):
+            occupancy = get_day_occupancy("calendar3", self.future_date)
+        self.assertTrue(occupancy.is_holiday)
+        self.assertEqual(occupancy.booked_count, 1)
+        self.assertEqual(occupancy.occupied_slots, {"11:00-14:00"})
+    
+    def test_create_booking_query_count(self):
+        """Test that creating a booking costs a fixed number of queries"""
+        with self.assertNumQueries(self.CREATE_QUERIES):
+            response = self.client.post(self.list_url, self._payload(), format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+    
+    def test_create_booking_query_count_does_not_grow_with_bookings(self):
+        """Test that existing bookings on the day do not add queries"""
+        for slot in ("11:00-14:00", "14:00-17:00"):
+            Booking.objects.create(
+                calendar_id="calendar3",
+                booking_date=self.future_date,
+                booking_time=slot,
+                client_name="Client",
+                client_phone="111",
+                designer_name="Designer"
+            )
+        with self.assertNumQueries(self.CREATE_QUERIES):
+            response = self.client.post(self.list_url, self._payload(), format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+    
+    def test_update_booking_query_count(self):
+        """Test that updating a booking costs a fixed number of queries"""
+        booking = Booking.objects.create(
+            calendar_id="calendar3",
+            booking_date=self.future_date,
+            booking_time="8:00-11:00",
+            client_name="Client",
+            client_phone="111",
+            designer_name="Designer"
         )
+        detail_url = reverse("booking-detail", args=[booking.id])
+        with self.assertNumQueries(self.UPDATE_QUERIES):
+            response = self.client.patch(detail_url, {"booking_time": "14:00-17:00"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+    
+    def test_rejected_slot_conflict_query_count(self):
+        """Test that a slot conflict is detected case-insensitively without extra queries"""
         Booking.objects.create(
             calendar_id="calendar2",
             booking_date=self.future_date,
-            booking_time="10h00",
-            client_name="Client 2",
-            client_phone="222",
-            designer_name="Designer 2"
+            booking_time="10H00",
+            client_name="Client",
+            client_phone="111",
+            designer_name="Designer"
         )
+        # Authentication user lookup + capacity row lock + occupancy query,
+        # plus SAVEPOINT + ROLLBACK TO SAVEPOINT + RELEASE SAVEPOINT
+        with self.assertNumQueries(3 + 3):
+            response = self.client.post(
+                self.list_url, self._payload(calendar_id="calendar2", booking_time="10h00"), format="json"
+            )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("booking_time", response.data)
+
+
+@override_settings(DATABASES=TEST_DATABASES)
+class BookingConcurrencyStressTests(TransactionTestCase):
+    """Multi-threaded stress tests: parallel POSTs must never exceed a day's capacity"""
+    
+    # Keep the seeded Calendar rows for the tests that run afterwards
+    serialized_rollback = True
+    THREADS = 8
+    
+    def setUp(self):
+        if connection.vendor == "sqlite" and connection.is_in_memory_db():
+            self.skipTest("Shared in-memory SQLite cannot run concurrent writers (use MySQL or a file database)")
+        from .calendars import resolve_calendar_id
+        self.list_url = reverse("booking-list-create")
+        self.future_date = (date.today() + timedelta(days=3)).isoformat()
+        _, self.token = create_authenticated_user(APIClient())
+        # Load the calendar registry up front, as in a warmed-up worker
+        resolve_calendar_id("calendar1")
+    
+    def _payload(self, index, **overrides):
+        payload = {
+            "calendar_id": "calendar1",
+            "booking_date": self.future_date,
+            "booking_time": "",
+            "client_name": f"Client {index}",
+            "client_phone": "0123456789",
+            "designer_name": "Designer",
+        }
+        payload.update(overrides)
+        return payload
+    
+    def _fire_concurrently(self, payloads):
+        """POST every payload from its own thread, all released at the same time"""
+        barrier = threading.Barrier(len(payloads))
+        status_codes = []
+        results_lock = threading.Lock()
         
-        response = self.client.delete(f"{self.url}?calendar_id=calendar1", format="json")
+        def worker(payload):
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.token}")
+            try:
+                barrier.wait()
+                response = client.post(self.list_url, payload, format="json")
+                with results_lock:
+                    status_codes.append(response.status_code)
+            finally:
+                connection.close()
         
-        self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data["deleted"], 1)
-        self.assertEqual(Booking.objects.count(), 1)
-        self.assertEqual(Booking.objects.first().calendar_id, "calendar2")
+        threads = [threading.Thread(target=worker, args=(payload,)) for payload in payloads]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return status_codes
+    
+    def test_pose_daily_limit_never_exceeded(self):
+        """Test that parallel Pose bookings stop at CALENDAR_DAILY_LIMITS"""
+        from .serializers import CALENDAR_DAILY_LIMITS
+        limit = CALENDAR_DAILY_LIMITS["calendar1"]
+        status_codes = self._fire_concurrently([self._payload(i) for i in range(self.THREADS)])
+        
+        self.assertEqual(status_codes.count(status.HTTP_201_CREATED), limit)
+        self.assertEqual(status_codes.count(status.HTTP_400_BAD_REQUEST), self.THREADS - limit)
+        self.assertEqual(Booking.objects.filter(calendar_id="calendar1").count(), limit)
+    
+    def test_time_slot_booked_only_once(self):
+        """Test that parallel bookings of the same SAV/Metré slot produce a single booking"""
+        payloads = [
+            self._payload(i, calendar_id="calendar3", booking_time="8:00-11:00")
+            for i in range(self.THREADS)
+        ]
+        status_codes = self._fire_concurrently(payloads)
+        
+        self.assertEqual(status_codes.count(status.HTTP_201_CREATED), 1)
+        self.assertEqual(status_codes.count(status.HTTP_400_BAD_REQUEST), self.THREADS - 1)
+        self.assertEqual(Booking.objects.filter(calendar_id="calendar3").count(), 1)
 
 
 @override_settings(DATABASES=TEST_DATABASES)
-class BookingDebugApiTests(TestCase):
-    """Tests for BookingDebugView - GET (admin only)"""
+class OutboxEmailTests(TestCase):
+    """Tests for the notification email outbox and run_outbox_worker"""
     
     def setUp(self):
         self.client = APIClient()
-        self.url = reverse("booking-debug")
         self.future_date = date.today() + timedelta(days=3)
     
-    def test_debug_requires_authentication(self):
-        """Test that debug requires authentication"""
-        response = self.client.get(self.url, format="json")
-        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+    def _create_booking(self):
+        create_authenticated_user(self.client)
+        return self.client.post(reverse("booking-list-create"), {
+            "calendar_id": "calendar1",
+            "booking_date": self.future_date.isoformat(),
+            "client_name": "John Doe",
+            "client_phone": "0123456789",
+            "designer_name": "Jane",
+        }, format="json")
     
-    def test_debug_requires_admin(self):
-        """Test that debug requires admin role"""
-        create_authenticated_user(self.client, role='concepteur')
-        response = self.client.get(self.url, format="json")
-        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+    def test_booking_create_queues_email_without_sending(self):
+        """Test that creating a booking writes an outbox row and sends nothing inline"""
+        from django.core import mail
+        from .models import OutboxEmail
+        response = self._create_booking()
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(mail.outbox), 0)
+        outbox_email = OutboxEmail.objects.get()
+        self.assertEqual(outbox_email.status, OutboxEmail.STATUS_PENDING)
+        self.assertEqual(outbox_email.content_subtype, "html")
+        self.assertIn("Pose", outbox_email.subject)
     
-    def test_debug_returns_summary(self):
-        """Test that debug returns booking summary"""
-        admin_user, _ = create_authenticated_user(self.client, role='admin')
-        Booking.objects.create(
-            calendar_id="calendar1",
-            booking_date=self.future_date,
-            client_name="Client 1",
-            client_phone="111",
-            designer_name="Designer 1"
-        )
-        Booking.objects.create(
-            calendar_id="calendar1",
-            booking_date=self.future_date,
-            client_name="Client 2",
-            client_phone="222",
-            designer_name="Designer 2"
+    def test_failed_enqueue_keeps_the_booking(self):
+        """Test that an outbox INSERT error is rolled back to its savepoint, not with the booking"""
+        from django.db import DatabaseError
+        from .models import OutboxEmail
+        with patch.object(OutboxEmail.objects, "create", side_effect=DatabaseError("outbox down")):
+            response = self._create_booking()
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(Booking.objects.filter(pk=response.data["id"]).exists())
+        self.assertFalse(OutboxEmail.objects.exists())
+    
+    def test_booking_delete_and_contact_queue_emails(self):
+        """Test that booking deletion and contact messages are queued too"""
+        from .models import OutboxEmail
+        booking_id = self._create_booking().data["id"]
+        self.client.delete(reverse("booking-detail", args=[booking_id]))
+        self.client.post(reverse("contact-email"), {
+            "name": "Jane",
+            "email": "jane@example.com",
+            "subject": "Question",
+            "message": "Hello",
+        }, format="json")
+        
+        subjects = list(OutboxEmail.objects.values_list("subject", flat=True))
+        self.assertEqual(len(subjects), 3)
+        self.assertIn("Question", subjects)
+        self.assertEqual(OutboxEmail.objects.get(subject="Question").reply_to, "jane@example.com")
+    
+    def test_worker_sends_due_emails(self):
+        """Test that the worker delivers pending emails and marks them sent"""
+        from django.core import mail
+        from .models import OutboxEmail
+        self._create_booking()
+        
+        call_command("run_outbox_worker", "--once", stdout=StringIO())
+        
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].content_subtype, "html")
+        outbox_email = OutboxEmail.objects.get()
+        self.assertEqual(outbox_email.status, OutboxEmail.STATUS_SENT)
+        self.assertEqual(outbox_email.attempts, 1)
+        self.assertIsNotNone(outbox_email.sent_at)
+    
+    def test_worker_retries_with_backoff_then_dead_letters(self):
+        """Test exponential backoff on failures and dead-lettering after max attempts"""
+        from django.utils import timezone
+        from .models import OutboxEmail
+        from .outbox import deliver_due_emails
+        outbox_email = OutboxEmail.objects.create(subject="S", body="B", from_email="a@b.c", to="x@y.z")
+        
+        with patch("django.core.mail.backends.locmem.EmailBackend.send_messages", side_effect=RuntimeError("Gmail down")):
+            summary = deliver_due_emails(max_attempts=2)
+            self.assertEqual(summary, {"sent": 0, "retried": 1, "dead": 0})
+            outbox_email.refresh_from_db()
+            self.assertEqual(outbox_email.status, OutboxEmail.STATUS_PENDING)
+            self.assertEqual(outbox_email.last_error, "Gmail down")
+            self.assertGreater(outbox_email.next_attempt_at, timezone.now())
+            
+            # Not due yet: nothing is claimed
+            self.assertEqual(deliver_due_emails(max_attempts=2), {"sent": 0, "retried": 0, "dead": 0})
+            
+            OutboxEmail.objects.filter(pk=outbox_email.pk).update(next_attempt_at=timezone.now())
+            summary = deliver_due_emails(max_attempts=2)
+            self.assertEqual(summary, {"sent": 0, "retried": 0, "dead": 1})
+        
+        outbox_email.refresh_from_db()
+        self.assertEqual(outbox_email.status, OutboxEmail.STATUS_DEAD)
+        self.assertEqual(outbox_email.attempts, 2)
+    
+    @override_settings(OUTBOX_RETRY_BASE_DELAY=10, OUTBOX_RETRY_MAX_DELAY=60)
+    def test_retry_delay_is_exponential_and_capped(self):
+        """Test the backoff schedule"""
+        from .outbox import retry_delay
+        self.assertEqual(
+            [retry_delay(attempt).total_seconds() for attempt in range(1, 6)],
+            [10, 20, 40, 60, 60]
         )
+
+
+class GmailBackendTestCase(TestCase):
+    """Base class for GmailOAuth2Backend tests: temporary token file, no GMAIL_TOKEN_JSON, patched build()"""
+    
+    def setUp(self):
+        import os
+        import tempfile
+        from datetime import datetime, timezone
+        from google.oauth2.credentials import Credentials
+        from . import gmail_oauth
+        self.gmail_oauth = gmail_oauth
+        self.Credentials = Credentials
+        # google-auth expiries are naive UTC datetimes
+        self.utcnow = lambda: datetime.now(timezone.utc).replace(tzinfo=None)
         
-        response = self.client.get(self.url, {"calendar_id": "calendar1"}, format="json")
+        self.token_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.token_dir.cleanup)
+        self.token_file = os.path.join(self.token_dir.name, "gmail_token.json")
+        settings_override = override_settings(GMAIL_TOKEN_FILE=self.token_file)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        env_patch = patch.dict(os.environ, {}, clear=False)
+        env_patch.start()
+        self.addCleanup(env_patch.stop)
+        os.environ.pop("GMAIL_TOKEN_JSON", None)
         
-        self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data["calendar_id"], "calendar1")
-        self.assertGreaterEqual(response.data["total_bookings"], 2)
-        self.assertIn("dates_with_2_or_more_bookings", response.data)
-        self.assertIn("future_dates_with_2_or_more_bookings", response.data)
+        gmail_oauth.gmail_client_cache.reset()
+        self.addCleanup(gmail_oauth.gmail_client_cache.reset)
+        build_patch = patch.object(gmail_oauth, "build")
+        self.build = build_patch.start()
+        self.addCleanup(build_patch.stop)
+    
+    def _write_token(self, token, expires_in):
+        import json
+        expiry = self.utcnow() + timedelta(seconds=expires_in)
+        with open(self.token_file, "w") as f:
+            json.dump({
+                "token": token,
+                "refresh_token": "refresh-token",
+                "token_uri": "https://oauth2.googleapis.com/token",
+                "client_id": "client-id",
+                "client_secret": "client-secret",
+                "scopes": self.gmail_oauth.SCOPES,
+                "expiry": expiry.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            }, f)
+    
+    def _fake_refresh(self, credentials, request):
+        credentials.token = "refreshed-token"
+        credentials.expiry = self.utcnow() + timedelta(hours=1)
+    
+    def _send(self, count):
+        from django.core.mail import EmailMessage
+        backend = self.gmail_oauth.GmailOAuth2Backend(batch_size=1)
+        messages = [EmailMessage("Subject", "Body", "from@example.com", ["to@example.com"]) for _ in range(count)]
+        return backend.send_messages(messages)
     
-    def test_debug_default_calendar_id(self):
-        """Test that debug defaults to calendar_id=1"""
-        admin_user, _ = create_authenticated_user(self.client, role='admin')
-        response = self.client.get(self.url, format="json")
-        self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data["calendar_id"], "1")
 
 
 @override_settings(DATABASES=TEST_DATABASES)
-class HolidayApiTests(TestCase):
-    """Comprehensive tests for Holiday APIs"""
+class GmailClientCacheTests(GmailBackendTestCase):
+    """Tests for the process-wide Gmail API client used by GmailOAuth2Backend"""
+    
+    def test_service_is_built_once_for_all_messages(self):
+        """Test that N messages cost N API calls, one build and no refresh while the token is fresh"""
+        self._write_token("fresh-token", expires_in=3600)
+        
+        with patch.object(self.Credentials, "refresh") as refresh:
+            self.assertEqual(self._send(3), 3)
+            self.assertEqual(self._send(2), 2)
+        
+        self.assertEqual(self.build.call_count, 1)
+        refresh.assert_not_called()
+        send = self.build.return_value.users.return_value.messages.return_value.send
+        self.assertEqual(send.call_count, 5)
+    
+    def test_token_refreshed_once_when_expiring(self):
+        """Test that an expiring token is refreshed once, saved with its expiry and reused"""
+        import json
+        self._write_token("old-token", expires_in=60)
+        
+        with patch.object(self.Credentials, "refresh", autospec=True, side_effect=self._fake_refresh) as refresh:
+            self.assertEqual(self._send(3), 3)
+        
+        self.assertEqual(refresh.call_count, 1)
+        self.assertEqual(self.build.call_count, 1)
+        with open(self.token_file) as f:
+            saved = json.load(f)
+        self.assertEqual(saved["token"], "refreshed-token")
+        self.assertIn("expiry", saved)
+        self.assertEqual(self.gmail_oauth.gmail_client_cache.credentials.token, "refreshed-token")
+    
+    def test_token_refreshed_by_another_process_is_reused(self):
+        """Test that a token saved by another worker process is picked up instead of refreshing again"""
+        self._write_token("old-token", expires_in=3600)
+        self.gmail_oauth.GmailOAuth2Backend()
+        credentials = self.gmail_oauth.gmail_client_cache.credentials
+        # Time passes: the cached token is about to expire, and another process already refreshed it
+        credentials.expiry = self.utcnow() + timedelta(seconds=60)
+        self._write_token("other-process-token", expires_in=3600)
+        
+        with patch.object(self.Credentials, "refresh") as refresh:
+            self.assertEqual(self._send(1), 1)
+        
+        refresh.assert_not_called()
+        self.assertIs(self.gmail_oauth.gmail_client_cache.credentials, credentials)
+        self.assertEqual(credentials.token, "other-process-token")
+
+
+class FakeGmailHttp:
+    """
+    Local stand-in for httplib2.Http answering Gmail batch requests.
+    `failures` maps an email subject to the HTTP statuses returned for it, in order,
+    before it succeeds; `batches` records the subjects of every batch request received.
+    """
+    
+    def __init__(self, failures=None):
+        self.failures = {subject: list(statuses) for subject, statuses in (failures or {}).items()}
+        self.batches = []
+    
+    def request(self, uri, method="GET", body=None, headers=None, **kwargs):
+        import base64
+        import email
+        import json
+        from email.parser import FeedParser
+        import httplib2
+        
+        parser = FeedParser()
+        parser.feed(f"content-type: {headers['content-type']}\r\n\r\n{body}")
+        parts = []
+        subjects = []
+        for part in parser.close().get_payload():
+            request_body = json.loads(part.get_payload().replace("\r\n", "\n").split("\n\n", 1)[1])
+            subject = email.message_from_bytes(base64.urlsafe_b64decode(request_body["raw"]))["subject"]
+            subjects.append(subject)
+            statuses = self.failures.get(subject)
+            code = statuses.pop(0) if statuses else 200
+            content = json.dumps({"id": f"id-{subject}"} if code == 200 else {"error": {"code": code, "message": "fake error"}})
+            parts.append(
+                "--fake_boundary\r\nContent-Type: application/http\r\n"
+                f"Content-ID: <response-{part['Content-ID'][1:-1]}>\r\n\r\n"
+                f"HTTP/1.1 {code} {'OK' if code == 200 else 'Error'}\r\nContent-Type: application/json\r\n\r\n{content}\r\n"
+            )
+        self.batches.append(subjects)
+        response = httplib2.Response({"status": "200", "content-type": 'multipart/mixed; boundary="fake_boundary"'})
+        return response, ("".join(parts) + "--fake_boundary--\r\n").encode("utf-8")
+
+
+@override_settings(DATABASES=TEST_DATABASES, GMAIL_BATCH_RETRY_DELAY=0)
+class GmailBatchSendTests(GmailBackendTestCase):
+    """Tests for GmailOAuth2Backend batch mode against a fake HTTP transport"""
+    
+    def _use_fake_http(self, **kwargs):
+        from googleapiclient.discovery import build
+        self.http = FakeGmailHttp(**kwargs)
+        self.build.side_effect = lambda *args, **kw: build("gmail", "v1", http=self.http, static_discovery=True)
+        self._write_token("fresh-token", expires_in=3600)
+    
+    def _messages(self, *subjects):
+        from django.core.mail import EmailMessage
+        return [EmailMessage(subject, "Body", "from@example.com", ["to@example.com"]) for subject in subjects]
+    
+    def test_messages_grouped_into_batches(self):
+        """Test that messages are sent in HTTP batches of batch_size"""
+        self._use_fake_http()
+        messages = self._messages("A", "B", "C", "D", "E")
+        
+        sent = self.gmail_oauth.GmailOAuth2Backend(batch_size=2).send_messages(messages)
+        
+        self.assertEqual(sent, 5)
+        self.assertEqual(self.http.batches, [["A", "B"], ["C", "D"], ["E"]])
+        self.assertEqual([message.gmail_message_id for message in messages], ["id-A", "id-B", "id-C", "id-D", "id-E"])
+        self.assertTrue(all(message.delivery_error is None for message in messages))
+    
+    def test_only_retryable_failures_are_retried(self):
+        """Test that rate-limited items are retried alone and permanent failures are reported"""
+        from googleapiclient.errors import HttpError
+        self._use_fake_http(failures={"B": [429], "C": [400]})
+        messages = self._messages("A", "B", "C")
+        
+        sent = self.gmail_oauth.GmailOAuth2Backend(batch_size=10).send_messages(messages)
+        
+        self.assertEqual(sent, 2)
+        self.assertEqual(self.http.batches, [["A", "B", "C"], ["B"]])
+        self.assertIsNone(messages[1].delivery_error)
+        self.assertIsInstance(messages[2].delivery_error, HttpError)
+        self.assertEqual(messages[2].delivery_error.resp.status, 400)
+    
+    @override_settings(GMAIL_BATCH_MAX_RETRIES=1)
+    def test_retries_are_bounded(self):
+        """Test that an item still failing after GMAIL_BATCH_MAX_RETRIES is given up"""
+        self._use_fake_http(failures={"A": [503, 503, 503]})
+        messages = self._messages("A", "B")
+        
+        sent = self.gmail_oauth.GmailOAuth2Backend(batch_size=10).send_messages(messages)
+        
+        self.assertEqual(sent, 1)
+        self.assertEqual(self.http.batches, [["A", "B"], ["A"]])
+        self.assertEqual(messages[0].delivery_error.resp.status, 503)
+    
+    @override_settings(EMAIL_BACKEND="core.gmail_oauth.GmailOAuth2Backend")
+    def test_outbox_worker_uses_batch_results(self):
+        """Test that the outbox sends due emails in one batch and reschedules only the failed one"""
+        from .models import OutboxEmail
+        from .outbox import deliver_due_emails
+        self._use_fake_http(failures={"B": [400]})
+        for subject in ("A", "B", "C"):
+            OutboxEmail.objects.create(subject=subject, body="Body", from_email="from@example.com", to="to@example.com")
+        
+        summary = deliver_due_emails()
+        
+        self.assertEqual(summary, {"sent": 2, "retried": 1, "dead": 0})
+        self.assertEqual(self.http.batches, [["A", "B", "C"]])
+        self.assertEqual(OutboxEmail.objects.get(subject="B").status, OutboxEmail.STATUS_PENDING)
+
+
+@override_settings(DATABASES=TEST_DATABASES)
+class JWTUserCacheTests(TestCase):
+    """Tests for the cached user lookup and claims-only mode of CustomJWTAuthentication"""
     
     def setUp(self):
+        from django.core.cache import cache
+        from .authentication import CustomJWTAuthentication
+        cache.clear()
+        self.client = APIClient()
+        self.authentication = CustomJWTAuthentication()
+        self.user, access_token = create_authenticated_user(self.client)
+        self.token = self.authentication.get_validated_token(access_token)
+        self.url = reverse("booking-list-create") + "?calendar_id=calendar1"
+        # The archive routing boundary is cached too (one query per ARCHIVE_ROUTING_CACHE_TTL)
+        from .archive import get_archived_until
+        get_archived_until("calendar1")
+    
+    def test_steady_state_authentication_costs_no_query(self):
+        """Test that only the first request loads the user from the database"""
+        with self.assertNumQueries(1):
+            self.assertEqual(self.authentication.get_user(self.token).pk, self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.authentication.get_user(self.token).pk, self.user.pk)
+        # Only the bookings query is left on a polling request
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+    
+    def test_user_save_invalidates_cache(self):
+        """Test that a role change is visible on the next request"""
+        self.authentication.get_user(self.token)
+        self.user.role = "admin"
+        self.user.save()
+        
+        self.assertEqual(self.authentication.get_user(self.token).role, "admin")
+
+    def test_cache_is_keyed_on_updated_at(self):
+        """Test that the user is cached under its updated_at and a new updated_at is looked up again"""
+        from django.core.cache import cache
+        from .authentication import get_user_cache_key, invalidate_cached_user
+        self.authentication.get_user(self.token)
+        self.assertIsNotNone(cache.get(get_user_cache_key(self.user.pk, self.user.updated_at)))
+
+        updated_at = timezone.now() + timedelta(seconds=1)
+        User.objects.filter(pk=self.user.pk).update(role="admin", updated_at=updated_at)
+        invalidate_cached_user(self.user.pk, updated_at)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.authentication.get_user(self.token).role, "admin")
+
+    def test_bulk_update_invalidates_with_helper(self):
+        """Test that invalidate_cached_users() makes a queryset update() visible on the next request"""
+        from .authentication import invalidate_cached_users
+        self.authentication.get_user(self.token)
+        User.objects.filter(pk=self.user.pk).update(role="admin")
+        self.assertEqual(self.authentication.get_user(self.token).role, "concepteur")
+
+        invalidate_cached_users([self.user.pk])
+
+        self.assertEqual(self.authentication.get_user(self.token).role, "admin")
+
+    def test_user_delete_invalidates_cache(self):
+        """Test that a deleted user can no longer authenticate"""
+        from rest_framework_simplejwt.exceptions import InvalidToken
+        self.authentication.get_user(self.token)
+        self.user.delete()
+        
+        with self.assertRaises(InvalidToken):
+            self.authentication.get_user(self.token)
+    
+    @override_settings(JWT_USER_CACHE_TTL=0)
+    def test_cache_can_be_disabled(self):
+        """Test that JWT_USER_CACHE_TTL=0 looks the user up on every request"""
+        self.authentication.get_user(self.token)
+        with self.assertNumQueries(1):
+            self.authentication.get_user(self.token)
+    
+    @override_settings(JWT_CLAIMS_ONLY_AUTH=True)
+    def test_claims_only_mode(self):
+        """Test that claims-only mode builds the principal from the token without any query"""
+        from .authentication import ClaimsUser
+        with self.assertNumQueries(0):
+            user = self.authentication.get_user(self.token)
+        self.assertIsInstance(user, ClaimsUser)
+        self.assertEqual((user.pk, user.email, user.role), (self.user.pk, self.user.email, "concepteur"))
+        
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+    
+    @override_settings(JWT_CLAIMS_ONLY_AUTH=True)
+    def test_claims_only_mode_enforces_role_claim(self):
+        """Test that admin-only endpoints still check the role claim"""
+        response = self.client.get(reverse("user-list-create"))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        
+        create_authenticated_user(self.client, role="admin")
+        response = self.client.get(reverse("user-list-create"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+@override_settings(DATABASES=TEST_DATABASES)
+class AvailabilityApiTests(TestCase):
+    """Tests for AvailabilityView - GET /api/availability/"""
+    
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.client = APIClient()
+        create_authenticated_user(self.client)
+        self.url = reverse("availability")
+        target = date.today() + timedelta(days=60)
+        self.month = f"{target.year:04d}-{target.month:02d}"
+        self.day1 = target.replace(day=10)
+        self.day2 = target.replace(day=11)
+        self.day3 = target.replace(day=12)
+    
+    def _booking(self, calendar_id, booking_date, booking_time=""):
+        return Booking.objects.create(
+            calendar_id=calendar_id,
+            booking_date=booking_date,
+            booking_time=booking_time,
+            client_name="Client",
+            client_phone="0123456789",
+            designer_name="Designer",
+        )
+    
+    def _get(self, calendar_id, month=None):
+        return self.client.get(self.url, {"calendar_id": calendar_id, "month": month or self.month})
+    
+    def _day(self, response, day):
+        return next(item for item in response.data["days"] if item["date"] == day.isoformat())
+    
+    def test_daily_limit_calendar(self):
+        """Test remaining capacity and holiday flags for the Pose calendar"""
+        self._booking("calendar1", self.day1)
+        self._booking("calendar1", self.day1)
+        self._booking("calendar1", self.day2)
+        Holiday.objects.create(calendar_id="calendar1", holiday_date=self.day3)
+        
+        response = self._get("calendar1")
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["daily_limit"], 2)
+        self.assertEqual(response.data["days"][0]["date"], self.day1.replace(day=1).isoformat())
+        self.assertIn(len(response.data["days"]), (28, 29, 30, 31))
+        full_day = self._day(response, self.day1)
+        self.assertEqual((full_day["booked_count"], full_day["remaining"], full_day["bookable"]), (2, 0, False))
+        day = self._day(response, self.day2)
+        self.assertEqual((day["booked_count"], day["remaining"], day["bookable"]), (1, 1, True))
+        holiday = self._day(response, self.day3)
+        self.assertTrue(holiday["is_holiday"])
+        self.assertFalse(holiday["bookable"])
+        self.assertIsNone(day["free_slots"])
+    
+    def test_time_slot_calendar(self):
+        """Test free slots for the SAV calendar, with the legacy short id"""
+        self._booking("calendar3", self.day1, "8:00-11:00")
+        self._booking("calendar3", self.day2, "8:00-11:00")
+        self._booking("calendar3", self.day2, "11:00-14:00")
+        self._booking("calendar3", self.day2, "14:00-17:00")
+        
+        response = self._get("3")
+        
+        self.assertEqual(response.data["calendar_id"], "calendar3")
+        day = self._day(response, self.day1)
+        self.assertEqual(day["free_slots"], ["11:00-14:00", "14:00-17:00"])
+        self.assertEqual(day["remaining"], 2)
+        self.assertEqual(day["occupied_slots"], ["8:00-11:00"])
+        self.assertFalse(self._day(response, self.day2)["bookable"])
+    
+    def test_past_month_is_not_bookable(self):
+        """Test that past days are never bookable"""
+        past = date.today() - timedelta(days=60)
+        response = self._get("calendar1", f"{past.year:04d}-{past.month:02d}")
+        
+        self.assertFalse(any(day["bookable"] for day in response.data["days"]))
+    
+    def test_invalid_parameters(self):
+        """Test that calendar_id and a YYYY-MM month are required"""
+        self.assertEqual(self.client.get(self.url, {"month": self.month}).status_code, status.HTTP_400_BAD_REQUEST)
+        for month in ("", "2025", "2025-13", "june"):
+            self.assertEqual(self._get("calendar1", month or "-").status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_requires_authentication(self):
+        """Test that availability requires authentication"""
+        self.client.credentials()
+        self.assertEqual(self._get("calendar1").status_code, status.HTTP_401_UNAUTHORIZED)
+    
+    def test_response_cached_until_calendar_changes(self):
+        """Test that repeated calls hit the cache and a booking/holiday write invalidates it"""
+        with self.assertNumQueries(3):
+            self._get("calendar1")
+        with self.assertNumQueries(0):
+            self._get("calendar1")
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self._booking("calendar1", self.day1)
+        # Another calendar's write does not invalidate this one
+        with self.captureOnCommitCallbacks(execute=True):
+            self._booking("calendar3", self.day1, "8:00-11:00")
+        
+        with self.assertNumQueries(2):
+            response = self._get("calendar1")
+        self.assertEqual(self._day(response, self.day1)["booked_count"], 1)
+        with self.assertNumQueries(0):
+            self._get("calendar1")
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            Holiday.objects.create(calendar_id="calendar1", holiday_date=self.day2)
+        self.assertTrue(self._day(self._get("calendar1"), self.day2)["is_holiday"])
+    
+    def test_booking_moved_to_other_calendar_invalidates_both(self):
+        """Test that moving a booking to another calendar refreshes the old calendar too"""
+        booking = self._booking("calendar2", self.day1, "9h")
+        self.assertEqual(self._day(self._get("calendar2"), self.day1)["booked_count"], 1)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                reverse("booking-detail", args=[booking.id]),
+                {"calendar_id": "calendar3", "booking_time": "8:00-11:00"},
+                format="json"
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        self.assertEqual(self._day(self._get("calendar2"), self.day1)["booked_count"], 0)
+        self.assertEqual(self._day(self._get("calendar3"), self.day1)["booked_count"], 1)
+
+
+@override_settings(DATABASES=TEST_DATABASES)
+class DashboardApiTests(TestCase):
+    """Tests for DashboardView - GET /api/dashboard/"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        create_authenticated_user(self.client)
+        self.url = reverse("dashboard")
+        self.today = date.today()
+    
+    def _booking(self, calendar_id, booking_date, client_name="Client"):
+        return Booking.objects.create(
+            calendar_id=calendar_id,
+            booking_date=booking_date,
+            client_name=client_name,
+            client_phone="0123456789",
+            designer_name="Designer",
+        )
+    
+    def test_summary_counts_and_lists(self):
+        """Test per-calendar counts, recent bookings, top clients and recent holidays"""
+        self._booking("calendar1", self.today + timedelta(days=5))
+        self._booking("calendar1", self.today - timedelta(days=400))
+        for client_name in ("Alice", "Alice", "Bob"):
+            self._booking("calendar3", self.today + timedelta(days=3), client_name)
+        last = self._booking("calendar2", self.today + timedelta(days=3))
+        Holiday.objects.create(calendar_id="calendar1", holiday_date=self.today + timedelta(days=9))
+        
+        response = self.client.get(self.url)
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        calendars = {item["calendar_id"]: item for item in response.data["calendars"]}
+        self.assertEqual(list(calendars), ["calendar1", "calendar2", "calendar3"])
+        self.assertEqual(calendars["calendar1"]["name"], "Pose")
+        self.assertEqual((calendars["calendar1"]["total"], calendars["calendar1"]["upcoming"]), (2, 1))
+        self.assertEqual(calendars["calendar3"]["total"], 3)
+        self.assertEqual(response.data["recent_bookings"][0]["id"], last.id)
+        self.assertEqual(len(response.data["recent_bookings"]), 6)
+        self.assertEqual(
+            [(item["client_name"], item["count"]) for item in response.data["top_clients"]],
+            [("Alice", 2), ("Bob", 1)]
+        )
+        self.assertEqual(len(response.data["recent_holidays"]), 1)
+    
+    def test_limit_and_query_count(self):
+        """Test that lists are LIMITed and the summary costs a constant number of queries"""
+        for day in range(5):
+            self._booking("calendar1", self.today + timedelta(days=day + 3))
+        # Auth user lookup + counts + recent bookings + top clients + recent holidays
+        with self.assertNumQueries(5):
+            response = self.client.get(self.url, {"limit": 2})
+        self.assertEqual(len(response.data["recent_bookings"]), 2)
+        
+        for day in range(20):
+            self._booking("calendar2", self.today + timedelta(days=day + 3))
+        with self.assertNumQueries(4):
+            self.client.get(self.url, {"limit": 2})
+    
+    def test_since_returns_every_recent_booking_with_totals(self):
+        """Test that since lists all bookings created after it (not limit) and returns the totals"""
+        old = self._booking("calendar1", self.today + timedelta(days=3))
+        Booking.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(days=2))
+        for day in range(12):
+            self._booking("calendar2", self.today + timedelta(days=day + 3))
+        since = (timezone.now() - timedelta(days=1)).isoformat()
+
+        response = self.client.get(self.url, {"limit": 2, "since": since})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["recent_bookings"]), 12)
+        self.assertNotIn(old.id, [item["id"] for item in response.data["recent_bookings"]])
+        self.assertEqual(response.data["recent_bookings_total"], 12)
+
+        with patch("core.dashboard.MAX_RECENT_SINCE", 5):
+            response = self.client.get(self.url, {"since": since})
+        self.assertEqual(len(response.data["recent_bookings"]), 5)
+        self.assertEqual(response.data["recent_bookings_total"], 12)
+        self.assertNotIn("recent_bookings_total", self.client.get(self.url).data)
+
+    def test_invalid_limit(self):
+        """Test that a non-numeric limit is rejected"""
+        response = self.client.get(self.url, {"limit": "abc"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_invalid_since(self):
+        """Test that a since that is not an ISO datetime is rejected"""
+        response = self.client.get(self.url, {"since": "yesterday"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_requires_authentication(self):
+        """Test that the dashboard requires authentication"""
+        self.client.credentials()
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+@override_settings(DATABASES=TEST_DATABASES, CHANGES_SETTLE_SECONDS=0)
+class ChangesApiTests(TestCase):
+    """Tests for ChangesView - GET /api/changes/"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        create_authenticated_user(self.client)
+        self.url = reverse("changes")
+        self.future_date = date.today() + timedelta(days=10)
+    
+    def _booking(self, calendar_id="calendar1", client_name="Client"):
+        return Booking.objects.create(
+            calendar_id=calendar_id,
+            booking_date=self.future_date,
+            client_name=client_name,
+            client_phone="0123456789",
+            designer_name="Designer",
+        )
+    
+    def _changes(self, since, **params):
+        response = self.client.get(self.url, {"since": since, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+    
+    def test_without_since_returns_head_cursor(self):
+        """Test that the first call only returns the current cursor"""
+        self._booking()
+        response = self.client.get(self.url)
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["bookings"], [])
+        self.assertEqual(self._changes(response.data["cursor"])["bookings"], [])
+    
+    def test_returns_only_rows_changed_since_cursor(self):
+        """Test inserts and updates since the cursor, then an empty page"""
+        old = self._booking(client_name="Old")
+        cursor = self.client.get(self.url).data["cursor"]
+        new = self._booking(client_name="New")
+        old.client_name = "Old renamed"
+        old.save()
+        
+        data = self._changes(cursor)
+        
+        self.assertEqual(sorted(booking["id"] for booking in data["bookings"]), sorted([old.id, new.id]))
+        self.assertIn("Old renamed", [booking["client_name"] for booking in data["bookings"]])
+        self.assertEqual(data["deleted"], {"bookings": [], "holidays": []})
+        self.assertFalse(data["has_more"])
+        
+        data = self._changes(data["cursor"])
+        self.assertEqual((data["bookings"], data["holidays"]), ([], []))
+    
+    def test_deletes_are_tombstones(self):
+        """Test that a row created and deleted after the cursor is only reported as deleted"""
+        cursor = self.client.get(self.url).data["cursor"]
+        booking = self._booking()
+        holiday = Holiday.objects.create(calendar_id="calendar2", holiday_date=self.future_date)
+        booking_id, holiday_id = booking.id, holiday.id
+        booking.delete()
+        holiday.delete()
+        
+        data = self._changes(cursor)
+        
+        self.assertEqual((data["bookings"], data["holidays"]), ([], []))
+        self.assertEqual(data["deleted"], {"bookings": [booking_id], "holidays": [holiday_id]})
+    
+    def test_moved_rows_are_deleted_from_the_old_calendar(self):
+        """Test that moving a booking or holiday to another calendar is a delete in the old calendar's feed"""
+        create_authenticated_user(self.client, role="admin")
+        booking = self._booking("calendar1")
+        holiday = Holiday.objects.create(calendar_id="calendar1", holiday_date=self.future_date + timedelta(days=1))
+        cursor = self.client.get(self.url).data["cursor"]
+
+        response = self.client.patch(
+            reverse("booking-detail", args=[booking.id]),
+            {"calendar_id": "calendar3", "booking_time": "8:00-11:00"},
+            format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.patch(reverse("holiday-detail", args=[holiday.id]), {"calendar_id": "calendar2"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        data = self._changes(cursor, calendar_id="calendar1")
+        self.assertEqual((data["bookings"], data["holidays"]), ([], []))
+        self.assertEqual(data["deleted"], {"bookings": [booking.id], "holidays": [holiday.id]})
+        data = self._changes(cursor, calendar_id="calendar3")
+        self.assertEqual([item["id"] for item in data["bookings"]], [booking.id])
+        data = self._changes(cursor)
+        self.assertEqual([item["id"] for item in data["bookings"]], [booking.id])
+        self.assertEqual([item["id"] for item in data["holidays"]], [holiday.id])
+        self.assertEqual(data["deleted"], {"bookings": [], "holidays": []})
+
+    def test_calendar_filter(self):
+        """Test that calendar_id (legacy ids accepted) limits the changes to one calendar"""
+        self._booking("calendar1")
+        other = self._booking("calendar3")
+        
+        data = self._changes(0, calendar_id="3")
+        
+        self.assertEqual([booking["id"] for booking in data["bookings"]], [other.id])
+    
+    @override_settings(CHANGES_PAGE_SIZE=2)
+    def test_pages_with_has_more(self):
+        """Test that large change sets are paged with has_more"""
+        bookings = [self._booking(client_name=f"Client {i}") for i in range(3)]
+        
+        first = self._changes(0)
+        second = self._changes(first["cursor"])
+        
+        self.assertTrue(first["has_more"])
+        self.assertFalse(second["has_more"])
+        self.assertEqual(
+            [booking["id"] for booking in first["bookings"] + second["bookings"]],
+            [booking.id for booking in bookings]
+        )
+    
+    def _missing_entry(self, booking):
+        """Remove the log entry of a booking, as if its transaction had not committed yet"""
+        entry = ChangeLogEntry.objects.get(kind="booking", object_id=booking.id)
+        ChangeLogEntry.objects.filter(pk=entry.pk).delete()
+        return entry
+
+    @override_settings(CHANGES_SETTLE_SECONDS=60)
+    def test_cursor_waits_for_a_late_committing_lower_id(self):
+        """Test that the cursor stops before a missing id, however old its entry turns out to be"""
+        from django.utils import timezone
+        self._booking()
+        cursor = self.client.get(self.url).data["cursor"]
+        first, late, last = [self._booking(client_name=f"Client {i}") for i in range(3)]
+        entry = self._missing_entry(late)
+
+        data = self._changes(cursor)
+        self.assertEqual([item["id"] for item in data["bookings"]], [first.id, last.id])
+        self.assertEqual(data["cursor"], str(entry.id - 1))
+
+        # Commits long after it was created (e.g. a slow import batch)
+        entry.created_at = timezone.now() - timedelta(hours=1)
+        entry.save(force_insert=True)
+        data = self._changes(data["cursor"])
+        self.assertEqual([item["id"] for item in data["bookings"]], [late.id, last.id])
+        self.assertEqual(data["cursor"], str(entry.id + 1))
+
+    @override_settings(CHANGES_SETTLE_SECONDS=60)
+    def test_cursor_passes_a_rolled_back_id_after_the_settle_window(self):
+        """Test that an id still missing once the next entry is older than the window is skipped"""
+        from django.utils import timezone
+        self._booking()
+        cursor = self.client.get(self.url).data["cursor"]
+        rolled_back, kept = self._booking(), self._booking()
+        self._missing_entry(rolled_back)
+
+        self.assertEqual(self._changes(cursor)["cursor"], cursor)
+
+        ChangeLogEntry.objects.filter(object_id=kept.id).update(created_at=timezone.now() - timedelta(minutes=5))
+        data = self._changes(cursor)
+        self.assertEqual([item["id"] for item in data["bookings"]], [kept.id])
+        self.assertEqual(data["cursor"], str(ChangeLogEntry.objects.get(object_id=kept.id).id))
+
+    @override_settings(CHANGES_PAGE_SIZE=2)
+    def test_calendar_filter_pages_over_other_calendars(self):
+        """Test that a filtered feed moves its cursor over other calendars' entries, page by page"""
+        self._booking("calendar3")
+        self._booking("calendar3")
+        mine = self._booking("calendar1")
+
+        first = self._changes(0, calendar_id="calendar1")
+        self.assertEqual((first["bookings"], first["has_more"]), ([], True))
+        second = self._changes(first["cursor"], calendar_id="calendar1")
+        self.assertEqual([item["id"] for item in second["bookings"]], [mine.id])
+
+    def test_invalid_cursor(self):
+        """Test that a malformed cursor is rejected"""
+        for since in ("abc", "-1"):
+            response = self.client.get(self.url, {"since": since})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_query_count(self):
+        """Test that a page costs the log query plus one query per changed model"""
+        self._booking()
+        Holiday.objects.create(calendar_id="calendar1", holiday_date=self.future_date)
+        self._changes(0)
+        # Log entries + bookings + holidays (the user is cached after the first request)
+        with self.assertNumQueries(3):
+            self._changes(0)
+
+
+@override_settings(
+    DATABASES=TEST_DATABASES,
+    CHANGES_SETTLE_SECONDS=0,
+    SSE_POLL_INTERVAL=0.05,
+    SSE_HEARTBEAT_SECONDS=0.2,
+)
+class CalendarEventsTests(TestCase):
+    """Tests for the Server-Sent Events stream - GET /api/events/"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.user, self.access_token = create_authenticated_user(self.client)
+        self.url = reverse("calendar-events")
+        self.future_date = date.today() + timedelta(days=10)
+    
+    def _booking(self, calendar_id="calendar1"):
+        return Booking.objects.create(
+            calendar_id=calendar_id,
+            booking_date=self.future_date,
+            client_name="Client",
+            client_phone="0123456789",
+            designer_name="Designer",
+        )
+    
+    async def _next(self, stream):
+        import asyncio
+        return await asyncio.wait_for(stream.__anext__(), timeout=5)
+    
+    def _ticket(self):
+        response = self.client.post(reverse("calendar-events-ticket"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["expires_in"], 60)
+        return response.data["ticket"]
+
+    def test_requires_valid_ticket(self):
+        """Test that the stream rejects missing and invalid tickets, and access tokens in the URL"""
+        self.client.credentials()
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(self.client.get(self.url, {"ticket": "invalid"}).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(self.client.get(self.url, {"ticket": self.access_token}).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(self.client.get(self.url, {"token": self.access_token}).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_ticket_is_short_lived_and_single_purpose(self):
+        """Test that a ticket requires authentication, expires quickly and is not an access token"""
+        from .authentication import authenticate_stream_ticket
+        ticket = self._ticket()
+        self.assertEqual(authenticate_stream_ticket(ticket).pk, self.user.pk)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {ticket}")
+        self.assertEqual(self.client.get(reverse("dashboard")).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(self.client.post(reverse("calendar-events-ticket")).status_code, status.HTTP_401_UNAUTHORIZED)
+
+        with override_settings(SSE_TICKET_LIFETIME=-1):
+            self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.access_token}")
+            expired = self.client.post(reverse("calendar-events-ticket")).data["ticket"]
+        self.assertIsNone(authenticate_stream_ticket(expired))
+
+    async def test_stream_headers(self):
+        """Test that a valid ticket opens an event stream"""
+        from asgiref.sync import sync_to_async
+        from django.test import RequestFactory
+        from .views import calendar_events
+        request = RequestFactory().get(self.url, {"ticket": await sync_to_async(self._ticket)()})
+        
+        response = await calendar_events(request)
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        self.assertEqual(response["Cache-Control"], "no-cache")
+        stream = response.streaming_content
+        self.assertEqual(await self._next(stream), b"retry: 3000\n\n")
+        await stream.aclose()
+    
+    async def test_live_events(self):
+        """Test that writes are pushed as booking.created/updated/deleted events"""
+        from asgiref.sync import sync_to_async
+        from .events import event_stream
+        stream = event_stream()
+        await self._next(stream)
+        
+        booking = await sync_to_async(self._booking)()
+        created = await self._next(stream)
+        self.assertIn("event: booking.created\n", created)
+        self.assertIn(f'"id":{booking.id}', created)
+        self.assertIn('"client_name":"Client"', created)
+        
+        booking.client_name = "Renamed"
+        await sync_to_async(booking.save)()
+        self.assertIn("event: booking.updated\n", await self._next(stream))
+        
+        await sync_to_async(booking.delete)()
+        deleted = await self._next(stream)
+        self.assertIn("event: booking.deleted\n", deleted)
+        self.assertIn('"booking":null', deleted)
+        await stream.aclose()
+    
+    async def test_calendar_filter_and_heartbeat(self):
+        """Test that other calendars are filtered out and idle streams get heartbeats"""
+        from asgiref.sync import sync_to_async
+        from .events import event_stream
+        stream = event_stream(calendar_id="calendar3")
+        await self._next(stream)
+        
+        await sync_to_async(self._booking)("calendar1")
+        self.assertEqual(await self._next(stream), ": heartbeat\n\n")
+        await sync_to_async(Holiday.objects.create)(calendar_id="calendar3", holiday_date=self.future_date)
+        event = await self._next(stream)
+        while event.startswith(":"):
+            event = await self._next(stream)
+        self.assertIn("event: holiday.created\n", event)
+        await stream.aclose()
+
+    async def _next_event(self, stream, heartbeats=25):
+        # Skips heartbeat comments, for at most `heartbeats` of them (SSE_HEARTBEAT_SECONDS each)
+        for _ in range(heartbeats):
+            event = await self._next(stream)
+            if not event.startswith(":"):
+                return event
+        self.fail("No event before the heartbeat limit")
+
+    async def test_moved_booking_is_deleted_from_old_calendar_stream(self):
+        """Test that moving a booking to another calendar sends booking.deleted to the old calendar's streams"""
+        from asgiref.sync import sync_to_async
+        from .events import event_stream
+        old_stream = event_stream(calendar_id="calendar1")
+        new_stream = event_stream(calendar_id="calendar3")
+        await self._next(old_stream)
+        await self._next(new_stream)
+        booking = await sync_to_async(self._booking)("calendar1")
+        self.assertIn("event: booking.created\n", await self._next_event(old_stream))
+
+        response = await sync_to_async(self.client.patch)(
+            reverse("booking-detail", args=[booking.id]),
+            {"calendar_id": "calendar3", "booking_time": "8:00-11:00"},
+            format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        deleted = await self._next_event(old_stream)
+        self.assertIn("event: booking.deleted\n", deleted)
+        self.assertIn(f'"id":{booking.id}', deleted)
+        updated = await self._next_event(new_stream)
+        self.assertIn("event: booking.updated\n", updated)
+        self.assertIn('"calendar_id":"calendar3"', updated)
+        await old_stream.aclose()
+        await new_stream.aclose()
+
+    async def test_replay_after_last_event_id(self):
+        """Test that a reconnecting client gets the events it missed"""
+        from asgiref.sync import sync_to_async
+        from .events import event_stream
+        first = await sync_to_async(self._booking)()
+        second = await sync_to_async(self._booking)()
+        last_event_id = await sync_to_async(
+            lambda: ChangeLogEntry.objects.get(kind="booking", object_id=first.id).id
+        )()
+        stream = event_stream(last_event_id=last_event_id)
+        await self._next(stream)
+        
+        replayed = await self._next(stream)
+        
+        self.assertIn(f'"id":{second.id}', replayed)
+        self.assertTrue(replayed.startswith(f"id: {last_event_id + 1}\n"))
+        await stream.aclose()
+
+
+@override_settings(DATABASES=TEST_DATABASES)
+class ConditionalListTests(TestCase):
+    """Tests for ETag/Last-Modified on the booking, holiday and user listings"""
+    
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.client = APIClient()
+        create_authenticated_user(self.client, role='admin')
+        self.day = date.today() + timedelta(days=30)
+        self.bookings_url = reverse("booking-list-create")
+    
+    def _booking(self, calendar_id, booking_time=""):
+        return Booking.objects.create(
+            calendar_id=calendar_id,
+            booking_date=self.day,
+            booking_time=booking_time,
+            client_name="Client",
+            client_phone="0123456789",
+            designer_name="Designer",
+        )
+    
+    def test_validators_and_not_modified(self):
+        """Test that a matching If-None-Match gets a 304 without touching the database"""
+        self._booking("calendar1")
+        response = self.client.get(self.bookings_url, {"calendar_id": "calendar1"})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response["ETag"]
+        self.assertTrue(etag.startswith('"') and etag.endswith('"'))
+        self.assertIn("Last-Modified", response)
+        self.assertIn("no-cache", response["Cache-Control"])
+        
+        with self.assertNumQueries(0):
+            response = self.client.get(self.bookings_url, {"calendar_id": "calendar1"}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+        self.assertEqual(response.content, b"")
+    
+    def test_equivalent_queries_share_etag(self):
+        """Test that parameter order does not change the ETag but parameter values do"""
+        first = self.client.get(self.bookings_url + "?calendar_id=calendar1&start_date=2020-01-01")
+        second = self.client.get(self.bookings_url + "?start_date=2020-01-01&calendar_id=calendar1")
+        other = self.client.get(self.bookings_url, {"calendar_id": "calendar1", "start_date": "2020-01-02"})
+        
+        self.assertEqual(first["ETag"], second["ETag"])
+        self.assertNotEqual(first["ETag"], other["ETag"])
+    
+    def test_write_changes_etag_of_its_calendar_only(self):
+        """Test that a write changes the ETag of its calendar and of the unfiltered listing"""
+        pose = self.client.get(self.bookings_url, {"calendar_id": "calendar1"})["ETag"]
+        sav = self.client.get(self.bookings_url, {"calendar_id": "calendar3"})["ETag"]
+        everything = self.client.get(self.bookings_url)["ETag"]
+        holidays = self.client.get(reverse("holiday-list-create"), {"calendar_id": "calendar1"})["ETag"]
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self._booking("calendar1")
+        
+        response = self.client.get(self.bookings_url, {"calendar_id": "calendar1"}, HTTP_IF_NONE_MATCH=pose)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(
+            self.client.get(self.bookings_url, {"calendar_id": "calendar3"}, HTTP_IF_NONE_MATCH=sav).status_code,
+            status.HTTP_304_NOT_MODIFIED
+        )
+        self.assertEqual(self.client.get(self.bookings_url, HTTP_IF_NONE_MATCH=everything).status_code, status.HTTP_200_OK)
+        # Holidays share the calendar version
+        self.assertEqual(
+            self.client.get(reverse("holiday-list-create"), {"calendar_id": "calendar1"}, HTTP_IF_NONE_MATCH=holidays).status_code,
+            status.HTTP_200_OK
+        )
+    
+    def test_if_modified_since(self):
+        """Test that If-Modified-Since is answered from the last write time"""
+        response = self.client.get(self.bookings_url, {"calendar_id": "calendar2"})
+        last_modified = response["Last-Modified"]
+        
+        self.assertEqual(
+            self.client.get(self.bookings_url, {"calendar_id": "calendar2"}, HTTP_IF_MODIFIED_SINCE=last_modified).status_code,
+            status.HTTP_304_NOT_MODIFIED
+        )
+        self.assertEqual(
+            self.client.get(
+                self.bookings_url, {"calendar_id": "calendar2"},
+                HTTP_IF_MODIFIED_SINCE="Mon, 01 Jan 2001 00:00:00 GMT"
+            ).status_code,
+            status.HTTP_200_OK
+        )
+    
+    def test_user_listing(self):
+        """Test that user writes change the ETag of GET /api/users/"""
+        url = reverse("user-list-create")
+        etag = self.client.get(url)["ETag"]
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.create(name="New", email="new-user@test.com", phone="0123456789", role="concepteur", password="x")
+        
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+    
+    def test_unauthenticated_never_not_modified(self):
+        """Test that permissions are checked before the conditional response"""
+        etag = self.client.get(self.bookings_url)["ETag"]
+        self.client.credentials()
+        
+        response = self.client.get(self.bookings_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+@override_settings(DATABASES=TEST_DATABASES)
+class ResponseCacheTests(TestCase):
+    """Tests for the server-side booking/holiday list response cache"""
+    
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.client = APIClient()
+        create_authenticated_user(self.client, role='admin')
+        self.day = date.today() + timedelta(days=30)
+        self.url = reverse("booking-list-create")
+    
+    def _booking(self, calendar_id, booking_time=""):
+        return Booking.objects.create(
+            calendar_id=calendar_id,
+            booking_date=self.day,
+            booking_time=booking_time,
+            client_name="Client",
+            client_phone="0123456789",
+            designer_name="Designer",
+        )
+    
+    def test_hit_serves_without_queries(self):
+        """Test that a repeated query is served from the cache, for any user"""
+        self._booking("calendar1")
+        first = self.client.get(self.url, {"calendar_id": "calendar1"})
+        self.assertEqual(first["X-Cache"], "MISS")
+        
+        other_client = APIClient()
+        create_authenticated_user(other_client)
+        other_client.get(reverse("holiday-list-create"))  # warms the user cache
+        with self.assertNumQueries(0):
+            second = other_client.get(self.url, {"calendar_id": "calendar1"})
+        
+        self.assertEqual(second["X-Cache"], "HIT")
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(second["ETag"], first["ETag"])
+    
+    def test_write_invalidates_only_its_calendar(self):
+        """Test that a booking created through the API refreshes its calendar's cached lists"""
+        self.client.get(self.url, {"calendar_id": "calendar1"})
+        self.client.get(self.url, {"calendar_id": "calendar3"})
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, {
+                "calendar_id": "calendar1",
+                "booking_date": self.day.isoformat(),
+                "client_name": "Client",
+                "client_phone": "0123456789",
+                "designer_name": "Designer",
+            }, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        
+        pose = self.client.get(self.url, {"calendar_id": "calendar1"})
+        self.assertEqual(pose["X-Cache"], "MISS")
+        self.assertEqual(len(pose.data), 1)
+        self.assertEqual(self.client.get(self.url, {"calendar_id": "calendar3"})["X-Cache"], "HIT")
+        
+        # Deleting through the API invalidates it again
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(reverse("booking-detail", args=[response.data["id"]]))
+        pose = self.client.get(self.url, {"calendar_id": "calendar1"})
+        self.assertEqual(pose["X-Cache"], "MISS")
+        self.assertEqual(len(pose.data), 0)
+    
+    def test_paginated_response_cached(self):
+        """Test that paginated responses are cached per cursor and page size"""
+        for _ in range(3):
+            self._booking("calendar2", "9h")
+        first = self.client.get(self.url, {"calendar_id": "calendar2", "page_size": 2})
+        second = self.client.get(self.url, {"page_size": 2, "calendar_id": "calendar2"})
+        
+        self.assertEqual(second["X-Cache"], "HIT")
+        self.assertEqual(second.json(), first.json())
+        self.assertIsNotNone(second.data["next"])
+        self.assertEqual(self.client.get(self.url, {"calendar_id": "calendar2", "page_size": 3})["X-Cache"], "MISS")
+    
+    def test_hit_miss_metrics(self):
+        """Test the hit/miss counters and the response_cache_stats command"""
+        from django.core.management import call_command
+        from .response_cache import get_response_cache_stats
+        
+        self.client.get(self.url)
+        self.client.get(self.url)
+        self.client.get(self.url)
+        self.client.get(reverse("holiday-list-create"))
+        
+        stats = get_response_cache_stats()
+        self.assertEqual(stats["bookings"], {"hits": 2, "misses": 1, "hit_rate": 0.6667})
+        self.assertEqual(stats["holidays"], {"hits": 0, "misses": 1, "hit_rate": 0.0})
+        
+        out = StringIO()
+        call_command("response_cache_stats", "--reset", stdout=out)
+        self.assertIn("bookings: 2 hits, 1 misses, hit rate 66.7%", out.getvalue())
+        self.assertEqual(get_response_cache_stats(), {})
+    
+    @override_settings(RESPONSE_CACHE_TTL=0)
+    def test_disabled(self):
+        """Test that RESPONSE_CACHE_TTL=0 disables the cache but keeps conditional GETs"""
+        self.client.get(self.url)
+        response = self.client.get(self.url)
+        
+        self.assertNotIn("X-Cache", response)
+        self.assertIn("ETag", response)
+
+
+def _incr_shared_counter(location, times):
+    """Child process of SQLiteCacheTests.test_incr_is_atomic_across_processes"""
+    from .cache_backends import SQLiteCache
+    cache = SQLiteCache(location, {})
+    for _ in range(times):
+        cache.incr("counter")
+
+
+@override_settings(DATABASES=TEST_DATABASES)
+class SQLiteCacheTests(TestCase):
+    """Tests for core.cache_backends.SQLiteCache, the cache shared by the gunicorn workers"""
+    
+    def setUp(self):
+        import tempfile
+        from .cache_backends import SQLiteCache
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.location = f"{self.directory.name}/cache.sqlite3"
+        self.cache = SQLiteCache(self.location, {"OPTIONS": {"MAX_ENTRIES": 10, "CULL_EVERY": 1}})
+    
+    def test_get_set_delete(self):
+        """Test the basic operations and that another instance on the same file sees the entries"""
+        from .cache_backends import SQLiteCache
+        self.cache.set("booking-list", [{"id": 1, "calendar_id": "calendar1"}])
+        self.cache.set_many({"a": 1, "b": 2})
+        
+        other = SQLiteCache(self.location, {})
+        self.assertEqual(other.get("booking-list"), [{"id": 1, "calendar_id": "calendar1"}])
+        self.assertEqual(other.get_many(["b", "missing", "a"]), {"b": 2, "a": 1})
+        self.assertTrue(other.has_key("a"))
+        self.assertIsNone(other.get("missing"))
+        
+        self.assertTrue(self.cache.delete("a"))
+        self.assertFalse(self.cache.delete("a"))
+        self.cache.delete_many(["b"])
+        self.assertEqual(other.get_many(["a", "b"]), {})
+        self.cache.clear()
+        self.assertIsNone(other.get("booking-list"))
+    
+    def test_expiry(self):
+        """Test that expired entries are not returned and can be added again"""
+        with patch("core.cache_backends.time.time", return_value=1000.0), \
+                patch("django.core.cache.backends.base.time.time", return_value=1000.0):
+            self.cache.set("short", "value", timeout=10)
+            self.cache.set("forever", "value", timeout=None)
+            self.assertFalse(self.cache.add("short", "other"))
+        
+        with patch("core.cache_backends.time.time", return_value=1011.0), \
+                patch("django.core.cache.backends.base.time.time", return_value=1011.0):
+            self.assertIsNone(self.cache.get("short"))
+            self.assertFalse(self.cache.touch("short"))
+            self.assertEqual(self.cache.get("forever"), "value")
+            self.assertTrue(self.cache.add("short", "other"))
+            self.assertEqual(self.cache.get("short"), "other")
+        
+        self.cache.set("gone", "value", timeout=0)
+        self.assertIsNone(self.cache.get("gone"))
+    
+    def test_incr(self):
+        """Test incr/decr and that a missing key raises ValueError like the other backends"""
+        self.cache.set("version", 41, timeout=None)
+        self.assertEqual(self.cache.incr("version"), 42)
+        self.assertEqual(self.cache.decr("version", 2), 40)
+        with self.assertRaises(ValueError):
+            self.cache.incr("missing")
+    
+    def test_incr_is_atomic_across_processes(self):
+        """Test that concurrent worker processes never lose an increment"""
+        import multiprocessing
+        try:
+            context = multiprocessing.get_context("fork")
+        except ValueError:
+            self.skipTest("fork start method not available")
+        self.cache.set("counter", 0, timeout=None)
+        
+        processes = [context.Process(target=_incr_shared_counter, args=(self.location, 50)) for _ in range(4)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join(30)
+            self.assertEqual(process.exitcode, 0)
+        
+        self.assertEqual(self.cache.get("counter"), 200)
+    
+    def test_eviction(self):
+        """Test that the cache is culled down to MAX_ENTRIES, entries without timeout last"""
+        self.cache.set("version", 1, timeout=None)
+        for index in range(20):
+            self.cache.set(f"response:{index}", index, timeout=300 + index)
+        
+        count = len(self.cache.get_many(["version"] + [f"response:{index}" for index in range(20)]))
+        self.assertLessEqual(count, 10)
+        self.assertEqual(self.cache.get("version"), 1)
+        self.assertEqual(self.cache.get("response:19"), 19)
+        self.assertIsNone(self.cache.get("response:0"))
+    
+    def test_application_caches(self):
+        """Test data versions on the shared backend"""
+        from .versions import bump_version, get_versions
+        with override_settings(CACHES={"default": {"BACKEND": "core.cache_backends.SQLiteCache", "LOCATION": self.location}}):
+            version = get_versions(["calendar:calendar1"])[0]["calendar:calendar1"]
+            bump_version("calendar:calendar1")
+        
+        self.assertEqual(self.cache.get("data_version:calendar:calendar1"), version + 1)
+    
+    def test_benchmark_command(self):
+        """Test that the benchmark runs on every local backend"""
+        out = StringIO()
+        call_command("benchmark_cache", "--backends", "locmem,sqlite,file", "--iterations", "5", "--value-size", "500", stdout=out)
+        for name in ("locmem", "sqlite", "file", "get hit", "incr"):
+            self.assertIn(name, out.getvalue())
+        self.assertNotIn("skipped", out.getvalue())
+
+
+@override_settings(DATABASES=TEST_DATABASES)
+class ImportCalendarsTests(TestCase):
+    """Tests for the set-based booking import of import_and_clean_calendars"""
+    
+    def setUp(self):
+        import tempfile
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = f"{self.directory.name}/new_pose.json"
+        self.rows = [
+            {"date": "2024-03-04", "name": "Client A", "phone": "111", "message": "m1", "timestamp": 1709510400000},
+            {"date": "2024-03-05", "time": "10h00", "name": "Client B", "phone": "222", "message": "m2"},
+            {"date": "", "name": "No date"},
+            {"date": "2024-03-06", "name": "Client C", "phone": "333", "message": "m3", "timestamp": 1709683200000},
+        ]
+    
+    def _import(self, rows, batch_size=2, **options):
+        import json
+        from .management.commands.import_and_clean_calendars import Command
+        if rows is not None:
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump({"bookings": rows}, f)
+        out = StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            Command(stdout=out).import_calendar(self.path, "calendar1", "Pose", False, batch_size, **options)
+        return out.getvalue()
+    
+    def test_import_creates_bookings_and_logs_changes(self):
+        """Test that rows are bulk-created with their timestamps and logged for the sync API"""
+        from datetime import datetime, timezone as dt_timezone
+        from .versions import get_calendar_version
+        version = get_calendar_version("calendar1")
+        
+        output = self._import(self.rows)
+        
+        self.assertIn("Created: 3", output)
+        self.assertIn("Skipped: 1", output)
+        self.assertIn("rows/s", output)
+        bookings = Booking.objects.filter(calendar_id="calendar1").order_by("booking_date")
+        self.assertEqual([b.client_name for b in bookings], ["Client A", "Client B", "Client C"])
+        self.assertEqual(bookings[0].booking_time, "21h00")
+        self.assertEqual(bookings[0].designer_name, "ancien_rdv")
+        self.assertEqual(bookings[0].created_at, datetime(2024, 3, 4, tzinfo=dt_timezone.utc))
+        self.assertEqual(
+            sorted(ChangeLogEntry.objects.values_list("object_id", "action")),
+            sorted((b.pk, ChangeLogEntry.ACTION_CREATE) for b in bookings)
+        )
+        self.assertGreater(get_calendar_version("calendar1"), version)
+    
+    def test_reimport_only_writes_changes(self):
+        """Test that re-importing unchanged rows writes nothing and changed rows are updated in place"""
+        self._import(self.rows)
+        ChangeLogEntry.objects.all().delete()
+        
+        with self.assertNumQueries(1):
+            output = self._import(self.rows)
+        self.assertIn("Unchanged: 3", output)
+        
+        self.rows[1]["message"] = "changed"
+        output = self._import(self.rows)
+        
+        self.assertIn("Updated: 1", output)
+        self.assertEqual(Booking.objects.count(), 3)
+        self.assertEqual(Booking.objects.get(client_name="Client B").message, "changed")
+        self.assertEqual(list(ChangeLogEntry.objects.values_list("action", flat=True)), [ChangeLogEntry.ACTION_UPDATE])
+    
+    def test_backend_without_returning_ids(self):
+        """Test that ids are read back when bulk inserts do not return them (MySQL)"""
+        with patch.object(type(connection.features), "can_return_rows_from_bulk_insert", False):
+            self._import(self.rows)
+        
+        bookings = Booking.objects.all()
+        self.assertEqual(
+            sorted(ChangeLogEntry.objects.values_list("object_id", flat=True)),
+            sorted(b.pk for b in bookings)
+        )
+        self.assertEqual(bookings.get(client_name="Client C").created_at.date(), date(2024, 3, 6))
+    
+    def test_duplicate_rows_in_file(self):
+        """Test that a booking listed twice in the file is created once with the last values"""
+        rows = self.rows + [dict(self.rows[0], message="last")]
+        
+        output = self._import(rows, batch_size=10)
+        
+        self.assertIn("Created: 3", output)
+        self.assertEqual(Booking.objects.filter(client_name="Client A").get().message, "last")
+    
+    def test_duplicate_rows_across_batches_keep_only_the_batch_in_memory(self):
+        """Test that committed batches are reduced to tuples and still match later duplicates"""
+        from .management.commands.import_and_clean_calendars import Command
+        rows = self.rows + [dict(self.rows[0], message="last"), dict(self.rows[1])]
+        sizes = []
+        original_remember = Command.remember_batch
+        
+        def remember_batch(imported, existing, committed=True):
+            sizes.append(len(imported))
+            return original_remember(imported, existing, committed)
+        
+        with patch.object(Command, "remember_batch", staticmethod(remember_batch)):
+            output = self._import(rows, batch_size=1)
+        
+        self.assertIn("Created: 3", output)
+        self.assertIn("Updated: 1", output)
+        self.assertIn("Unchanged: 1", output)
+        self.assertLessEqual(max(sizes), 1)
+        self.assertEqual(Booking.objects.count(), 3)
+        self.assertEqual(Booking.objects.get(client_name="Client A").message, "last")
+    
+    def test_command_streams_exports(self):
+        """Test the whole command: Sundays removed, imported directly, cleaned file only on request"""
+        import json
+        import os
+        from .management.commands.import_and_clean_calendars import Command
+        os.makedirs(f"{self.directory.name}/data")
+        rows = self.rows + [{"date": "2024-03-10", "name": "Sunday", "phone": "444"}]
+        with open(f"{self.directory.name}/data/pose.json", "w", encoding="utf-8") as f:
+            json.dump({"bookings": rows}, f)
+        
+        with patch.object(Command, "get_project_root", return_value=self.directory.name):
+            out = StringIO()
+            call_command("import_and_clean_calendars", "--file", "pose.json", stdout=out)
+            self.assertIn("Total Sundays filtered: 1", out.getvalue())
+            self.assertFalse(os.path.exists(f"{self.directory.name}/data/new_pose.json"))
+            self.assertEqual(Booking.objects.filter(calendar_id="calendar1").count(), 3)
+            
+            call_command("import_and_clean_calendars", "--file", "pose.json", "--write-cleaned", stdout=StringIO())
+        
+        with open(f"{self.directory.name}/data/new_pose.json", encoding="utf-8") as f:
+            cleaned = f.read()
+        cleaned_rows = [row for row in rows if row["name"] != "Sunday"]
+        self.assertEqual(cleaned, json.dumps({"bookings": cleaned_rows}, ensure_ascii=False, indent=2))
+        self.assertEqual(Booking.objects.count(), 3)
+    
+    def test_cleaned_file_dry_run_with_clear_writes_nothing(self):
+        """Test that --file new_* honours --dry-run, even with --clear"""
+        import json
+        import os
+        from .management.commands.import_and_clean_calendars import Command
+        self._import(self.rows[:2])
+        os.makedirs(f"{self.directory.name}/data")
+        with open(f"{self.directory.name}/data/new_pose.json", "w", encoding="utf-8") as f:
+            json.dump({"bookings": self.rows}, f)
+        bookings = sorted(Booking.objects.values_list("id", "client_name", "message"))
+        ChangeLogEntry.objects.all().delete()
+        
+        out = StringIO()
+        with patch.object(Command, "get_project_root", return_value=self.directory.name):
+            call_command("import_and_clean_calendars", "--file", "new_pose.json", "--dry-run", "--clear", stdout=out)
+        
+        self.assertIn("Would clear 2 existing Pose calendar bookings", out.getvalue())
+        self.assertIn("Dry Run (nothing written)", out.getvalue())
+        self.assertEqual(sorted(Booking.objects.values_list("id", "client_name", "message")), bookings)
+        self.assertFalse(ChangeLogEntry.objects.exists())
+        self.assertEqual([name for name in os.listdir(f"{self.directory.name}/data") if "checkpoint" in name], [])
+    
+    def test_existing_row_without_time_is_matched(self):
+        """Test that rows without a time match the bookings stored with the default 21h00 slot"""
+        self._import(self.rows[:1])
+        self._import(self.rows[:1])
+        
+        self.assertEqual(Booking.objects.filter(client_name="Client A").count(), 1)
+    
+    def test_dry_run_reports_diff_without_writing(self):
+        """Test that --dry-run counts created, updated and unchanged rows but writes nothing"""
+        import os
+        self._import(self.rows[:2])
+        ChangeLogEntry.objects.all().delete()
+        rows = [self.rows[0], dict(self.rows[1], message="changed"), self.rows[3]]
+        
+        with self.assertNumQueries(1):
+            output = self._import(rows, dry_run=True)
+        
+        self.assertIn("Dry Run (nothing written)", output)
+        self.assertIn("Created: 1", output)
+        self.assertIn("Updated: 1", output)
+        self.assertIn("Unchanged: 1", output)
+        self.assertEqual(Booking.objects.count(), 2)
+        self.assertEqual(Booking.objects.get(client_name="Client B").message, "m2")
+        self.assertFalse(ChangeLogEntry.objects.exists())
+        self.assertEqual([name for name in os.listdir(self.directory.name) if "checkpoint" in name], [])
+    
+    def test_interrupted_import_resumes_from_checkpoint(self):
+        """Test that a re-run skips the batches committed before a failure, and --restart ignores the checkpoint"""
+        import os
+        from django.db import DatabaseError
+        from .management.commands.import_and_clean_calendars import Command, ImportCheckpoint
+        rows = [
+            {"date": f"2024-03-{day:02d}", "name": f"Client {day}", "phone": str(day), "timestamp": 1709510400000}
+            for day in range(4, 10)
+        ]
+        original_write_batch = Command.write_batch
+        calls = []
+        
+        def failing_second_batch(command, *args):
+            calls.append(args)
+            if len(calls) == 2:
+                with patch.object(Booking.objects, "bulk_create", side_effect=DatabaseError("disk full")):
+                    return original_write_batch(command, *args)
+            return original_write_batch(command, *args)
+        
+        with patch.object(Command, "write_batch", failing_second_batch):
+            output = self._import(rows)
+        self.assertIn("Errors: 2", output)
+        self.assertEqual(Booking.objects.count(), 4)
+        checkpoint = ImportCheckpoint(self.path, "calendar1")
+        self.assertEqual(checkpoint.load(), 2)
+        
+        output = self._import(None)
+        self.assertIn("Resuming after row 2", output)
+        self.assertIn("Created: 2", output)
+        self.assertIn("Unchanged: 2", output)
+        self.assertEqual(Booking.objects.count(), 6)
+        self.assertFalse(os.path.exists(checkpoint.path))
+        
+        checkpoint.save(4)
+        output = self._import(None, restart=True)
+        self.assertNotIn("Resuming", output)
+        self.assertIn("Unchanged: 6", output)
+    
+    def test_checkpoint_of_another_file_is_ignored(self):
+        """Test that a checkpoint left by a different version of the file does not skip rows"""
+        from .management.commands.import_and_clean_calendars import ImportCheckpoint
+        self._import(self.rows)
+        ImportCheckpoint(self.path, "calendar1").save(2)
+        
+        output = self._import(self.rows + [dict(self.rows[0], name="Client D")])
+        
+        self.assertNotIn("Resuming", output)
+        self.assertIn("Created: 1", output)
+        self.assertIn("Unchanged: 3", output)
+
+
+@override_settings(DATABASES=TEST_DATABASES)
+class JsonStreamTests(TestCase):
+    """Tests for core.json_stream.iter_json_array"""
+    
+    def _stream(self, text, key="bookings", chunk_size=3):
+        from .json_stream import iter_json_array
+        return list(iter_json_array(StringIO(text), key, chunk_size=chunk_size))
+    
+    def test_elements_across_chunk_boundaries(self):
+        """Test that values split over several chunks, numbers included, are decoded whole"""
+        import json
+        rows = [{"date": "2024-03-04", "name": "A \"]}, é", "n": 12345}, 678.5, "text", [1, [2]], None]
+        text = json.dumps({"meta": {"a": [1, 2]}, "bookings": rows, "after": 1}, indent=2)
+        
+        for chunk_size in (1, 2, 7, 4096):
+            self.assertEqual(self._stream(text, chunk_size=chunk_size), rows)
+    
+    def test_missing_or_empty(self):
+        """Test that a missing key, an empty array or a non-array value yield nothing"""
+        self.assertEqual(self._stream('{"other": [1]}'), [])
+        self.assertEqual(self._stream('{}'), [])
+        self.assertEqual(self._stream('{"bookings": [ ]}'), [])
+        self.assertEqual(self._stream('{"bookings": 5}'), [])
+    
+    def test_malformed(self):
+        """Test that malformed input raises JSONDecodeError"""
+        import json
+        for text in ('[1, 2]', '{"bookings": [1, 2', '{"bookings": [1 2]}', '{"bookings": [{"a": }]}'):
+            with self.assertRaises(json.JSONDecodeError):
+                self._stream(text)
+    
+    def test_constant_memory(self):
+        """Test that the reader keeps a bounded window of a large export"""
+        from .json_stream import _Reader
+        import json
+        rows = [{"date": "2024-03-04", "name": f"Client {i}"} for i in range(2000)]
+        text = StringIO(json.dumps({"bookings": rows}))
+        sizes = []
+        original_fill = _Reader.fill
+        
+        def fill(reader):
+            sizes.append(len(reader.buffer))
+            return original_fill(reader)
+        
+        from .json_stream import iter_json_array
+        with patch.object(_Reader, "fill", fill):
+            self.assertEqual(sum(1 for _ in iter_json_array(text, "bookings", chunk_size=1024)), 2000)
+        self.assertLess(max(sizes), 2048)
+
+
+@override_settings(DATABASES=TEST_DATABASES)
+class ParallelImportTests(TransactionTestCase):
+    """import_and_clean_calendars --workers: one process per calendar"""
+    
+    serialized_rollback = True
+    
+    def setUp(self):
+        import json
+        import os
+        import tempfile
+        if connection.vendor == "sqlite" and connection.is_in_memory_db():
+            self.skipTest("Worker processes cannot share an in-memory SQLite database (use MySQL or a file database)")
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        os.makedirs(f"{self.directory.name}/data")
+        for name in ("pose.json", "sav.json", "metré.json"):
+            rows = [
+                {"date": (date(2024, 3, 4) + timedelta(days=i % 5)).isoformat(), "time": f"{i}h", "name": f"{name} {i}", "phone": str(i)}
+                for i in range(50)
+            ]
+            with open(f"{self.directory.name}/data/{name}", "w", encoding="utf-8") as f:
+                json.dump({"bookings": rows}, f)
+    
+    def test_workers_import_every_calendar(self):
+        """Test that each calendar is imported by its own worker and the summaries are added up"""
+        from .management.commands.import_and_clean_calendars import Command
+        out = StringIO()
+        with patch.object(Command, "get_project_root", return_value=self.directory.name):
+            call_command("import_and_clean_calendars", "--workers", "3", "--batch-size", "20", stdout=out)
+        
+        self.assertIn("with 3 workers", out.getvalue())
+        self.assertIn("Created: 150, Updated: 0", out.getvalue())
+        self.assertEqual(
+            {calendar_id: Booking.objects.filter(calendar_id=calendar_id).count() for calendar_id in ("calendar1", "calendar2", "calendar3")},
+            {"calendar1": 50, "calendar2": 50, "calendar3": 50}
+        )
+        self.assertEqual(ChangeLogEntry.objects.count(), 150)
+
+
+@override_settings(DATABASES=TEST_DATABASES)
+class BookingResetJobTests(TestCase):
+    """Tests for chunked booking resets (core.reset_jobs and DELETE /api/bookings/reset/?chunked=1)"""
+    
+    def setUp(self):
+        import tempfile
+        self.client = APIClient()
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        future_date = date.today() + timedelta(days=3)
+        Booking.objects.bulk_create([
+            Booking(calendar_id="calendar1" if index % 2 else "calendar2", booking_date=future_date,
+                    booking_time=f"{8 + index}h00", client_name=f"Client {index}", client_phone="111",
+                    designer_name="Designer")
+            for index in range(7)
+        ])
+    
+    def _run(self, job, **kwargs):
+        from .reset_jobs import run_reset_job
+        with self.captureOnCommitCallbacks(execute=True):
+            return run_reset_job(job, **kwargs)
+    
+    def test_chunked_reset_queues_job_and_reports_progress(self):
+        """Test that the API queues a job, the worker deletes in batches and the job can be polled"""
+        from . import reset_jobs
+        from .models import BookingResetJob
+        from .versions import get_calendar_version
+        create_authenticated_user(self.client, role='admin')
+        version = get_calendar_version("calendar1")
+        
+        response = self.client.delete(f'{reverse("booking-reset")}?calendar_id=1&chunked=1&batch_size=2')
+        
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data["status"], "pending")
+        self.assertEqual(response.data["total"], 3)
+        self.assertEqual(Booking.objects.count(), 7)
+        
+        job = BookingResetJob.objects.get(pk=response.data["id"])
+        with patch("core.reset_jobs.delete_batch", wraps=reset_jobs.delete_batch) as delete_batch:
+            self._run(job)
+        self.assertEqual(delete_batch.call_count, 3)  # 2 + 1 rows, then an empty batch
+        
+        response = self.client.get(reverse("booking-reset-job", args=[job.pk]), format="json")
+        self.assertEqual(response.data["status"], "done")
+        self.assertEqual(response.data["deleted"], 3)
+        self.assertEqual(response.data["progress"], 1.0)
+        self.assertFalse(Booking.objects.filter(calendar_id="calendar1").exists())
+        self.assertEqual(Booking.objects.count(), 4)
+        self.assertEqual(
+            ChangeLogEntry.objects.filter(action=ChangeLogEntry.ACTION_DELETE, calendar_id="calendar1").count(), 3
+        )
+        self.assertGreater(get_calendar_version("calendar1"), version)
+    
+    def test_failed_job_resumes_after_last_committed_batch(self):
+        """Test that a failure keeps the committed batches and a re-run finishes the rest"""
+        from django.db import DatabaseError
+        from . import reset_jobs
+        from .models import BookingResetJob
+        job = reset_jobs.create_reset_job(batch_size=3)
+        original_record_changes = reset_jobs.record_changes
+        calls = []
+        
+        def fail_second_batch(*args):
+            calls.append(args)
+            if len(calls) == 2:
+                raise DatabaseError("lock wait timeout")
+            return original_record_changes(*args)
+        
+        with patch("core.reset_jobs.record_changes", side_effect=fail_second_batch):
+            self._run(job)
+        
+        job.refresh_from_db()
+        self.assertEqual(job.status, BookingResetJob.STATUS_FAILED)
+        self.assertIn("lock wait timeout", job.error)
+        self.assertEqual(job.deleted, 3)
+        self.assertEqual(Booking.objects.count(), 4)
+        
+        self._run(job)
+        job.refresh_from_db()
+        self.assertEqual(job.status, BookingResetJob.STATUS_DONE)
+        self.assertEqual(job.deleted, 7)
+        self.assertFalse(Booking.objects.exists())
+    
+    def test_bookings_created_after_the_request_are_kept(self):
+        """Test that the job only deletes the bookings that existed when it was queued"""
+        from .reset_jobs import create_reset_job
+        job = create_reset_job("calendar2")
+        later = Booking.objects.create(
+            calendar_id="calendar2", booking_date=date.today() + timedelta(days=5), booking_time="10h00",
+            client_name="Later", client_phone="222", designer_name="Designer"
+        )
+        
+        self._run(job)
+        
+        self.assertEqual(list(Booking.objects.filter(calendar_id="calendar2")), [later])
+    
+    def test_archive_before_delete(self):
+        """Test that archive=1 writes every deleted row to a JSON Lines file"""
+        import json
+        from .reset_jobs import create_reset_job
+        with self.settings(BOOKING_ARCHIVE_DIR=self.directory.name):
+            job = create_reset_job("calendar1", batch_size=2, archive=True)
+        
+        self._run(job)
+        
+        with open(job.archive_path, encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f]
+        self.assertEqual(sorted(row["client_name"] for row in rows), ["Client 1", "Client 3", "Client 5"])
+        self.assertEqual(rows[0]["calendar_id"], "calendar1")
+    
+    def test_worker_command_and_validation(self):
+        """Test that run_reset_jobs --once drains the queue and a bad batch_size is rejected"""
+        from .models import BookingResetJob
+        from .reset_jobs import create_reset_job
+        create_authenticated_user(self.client, role='admin')
+        response = self.client.delete(f'{reverse("booking-reset")}?chunked=1&batch_size=x')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        
+        create_reset_job("calendar1")
+        create_reset_job("calendar2")
+        out = StringIO()
+        call_command("run_reset_jobs", "--once", stdout=out)
+        
+        self.assertEqual(BookingResetJob.objects.filter(status=BookingResetJob.STATUS_DONE).count(), 2)
+        self.assertFalse(Booking.objects.exists())
+        self.assertIn("done: 4 deleted", out.getvalue())
+    
+    def test_job_requires_admin(self):
+        """Test that polling a job requires the admin role"""
+        from .reset_jobs import create_reset_job
+        job = create_reset_job()
+        create_authenticated_user(self.client, role='concepteur')
+        response = self.client.get(reverse("booking-reset-job", args=[job.pk]), format="json")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+@override_settings(DATABASES=TEST_DATABASES)
+class BookingArchiveTests(TestCase):
+    """Tests for the BookingArchive tier: archive_bookings command and routed listings"""
+    
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.client = APIClient()
+        create_authenticated_user(self.client, role="admin")
+        today = date.today()
+        self.old_days = [today - timedelta(days=400), today - timedelta(days=399)]
+        self.recent_day = today - timedelta(days=10)
+        self.future_day = today + timedelta(days=5)
+        for day in self.old_days + [self.recent_day, self.future_day]:
+            for slot in ("14h00", "9h00"):
+                Booking.objects.create(
+                    calendar_id="calendar1", booking_date=day, booking_time=slot,
+                    client_name=f"Client {day} {slot}", client_phone="111", designer_name="Designer"
+                )
+        self.all_ids = list(Booking.objects.order_by("booking_date", "booking_time", "id").values_list("id", flat=True))
+    
+    def _archive(self, *args):
+        out = StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("archive_bookings", *args, stdout=out)
+        return out.getvalue()
+    
+    def test_command_moves_old_bookings_in_chunks(self):
+        """Test that bookings before --before move to the archive with their ids, in batches"""
+        from .models import BookingArchive
+        output = self._archive("--before", str(self.recent_day), "--batch-size", "3")
+        
+        self.assertIn("Archived 3 bookings...", output)
+        self.assertIn("Archived 4 bookings before", output)
+        self.assertEqual(set(BookingArchive.objects.values_list("id", flat=True)), set(self.all_ids[:4]))
+        self.assertEqual(Booking.objects.count(), 4)
+        self.assertFalse(Booking.objects.filter(booking_date__lt=self.recent_day).exists())
+        self.assertEqual(BookingArchive.objects.get(pk=self.all_ids[0]).client_name, f"Client {self.old_days[0]} 14h00")
+    
+    def test_command_validation_and_dry_run(self):
+        """Test that future dates are refused and --dry-run only counts"""
+        from django.core.management.base import CommandError
+        with self.assertRaises(CommandError):
+            self._archive("--before", str(self.future_day))
+        with self.assertRaises(CommandError):
+            self._archive("--before", "yesterday")
+        
+        output = self._archive("--before", str(self.recent_day), "--dry-run")
+        
+        self.assertIn("4 bookings before", output)
+        self.assertEqual(Booking.objects.count(), 8)
+    
+    def test_listing_routes_by_date_range(self):
+        """Test that listings reaching archived dates merge both tables and later ranges skip the archive"""
+        from django.test.utils import CaptureQueriesContext
+        self._archive("--before", str(self.recent_day))
+        url = reverse("booking-list-create")
+        
+        response = self.client.get(url, {"calendar_id": "calendar1"})
+        self.assertEqual([b["id"] for b in response.data], self.all_ids)
+        
+        response = self.client.get(url, {"calendar_id": "calendar1", "end_date": str(self.old_days[1])})
+        self.assertEqual([b["id"] for b in response.data], self.all_ids[:4])
+        
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {"calendar_id": "calendar1", "start_date": str(self.recent_day)})
+        self.assertEqual([b["id"] for b in response.data], self.all_ids[4:])
+        self.assertFalse([q for q in queries.captured_queries if "core_bookingarchive" in q["sql"]])
+    
+    def test_keyset_pagination_across_tables(self):
+        """Test that cursor pages walk archived then live bookings in order, forwards and backwards"""
+        self._archive("--before", str(self.recent_day))
+        next_url = reverse("booking-list-create") + "?calendar_id=calendar1&page_size=3"
+        pages = []
+        while next_url:
+            response = self.client.get(next_url)
+            pages.append([b["id"] for b in response.data["results"]])
+            next_url = response.data["next"]
+            previous_url = response.data["previous"]
+        
+        self.assertEqual(pages, [self.all_ids[:3], self.all_ids[3:6], self.all_ids[6:]])
+        response = self.client.get(previous_url)
+        self.assertEqual([b["id"] for b in response.data["results"]], self.all_ids[3:6])
+    
+    def test_debug_counts_archived_days(self):
+        """Test that the debug endpoint counts and details archived bookings too"""
+        self._archive("--before", str(self.recent_day))
+        
+        response = self.client.get(reverse("booking-debug"), {"calendar_id": "calendar1", "min_count": 2})
+        
+        self.assertEqual(response.data["total_bookings"], 8)
+        self.assertEqual(response.data["days_with_bookings"], 4)
+        self.assertEqual(
+            [d["date"] for d in response.data["over_capacity_dates"]],
+            [str(day) for day in self.old_days + [self.recent_day, self.future_day]]
+        )
+        self.assertEqual(
+            [b["id"] for b in response.data["over_capacity_dates"][0]["bookings"]], self.all_ids[:2]
+        )
+
+
+@override_settings(DATABASES=TEST_DATABASES)
+class DailyOccupancyTests(TestCase):
+    """Tests for the per-day occupancy rows maintained on booking writes"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        create_authenticated_user(self.client, role="admin")
+        self.day = date.today() + timedelta(days=3)
+        self.other_day = date.today() + timedelta(days=4)
+    
+    def _occupancy(self, calendar_id, day):
+        from .models import DailyOccupancy
+        row = DailyOccupancy.objects.filter(calendar_id=calendar_id, day=day).first()
+        return (row.booked_count, row.occupied_slots_bitmask) if row else None
+    
+    def _create(self, calendar_id="calendar3", day=None, booking_time="8:00-11:00"):
+        return Booking.objects.create(
+            calendar_id=calendar_id, booking_date=day or self.day, booking_time=booking_time,
+            client_name="Client", client_phone="111", designer_name="Designer"
+        )
+    
+    def test_api_writes_keep_occupancy_in_step(self):
+        """Test that creating, moving and deleting bookings updates the count and slot bits"""
+        response = self.client.post(reverse("booking-list-create"), {
+            "calendar_id": "calendar3", "booking_date": self.day.isoformat(), "booking_time": "11:00-14:00",
+            "client_name": "Client", "client_phone": "111", "designer_name": "Designer",
+        }, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self._create(booking_time="8:00-11:00")
+        self.assertEqual(self._occupancy("calendar3", self.day), (2, 0b011))
+        
+        detail_url = reverse("booking-detail", args=[response.data["id"]])
+        response = self.client.patch(detail_url, {"booking_time": "14:00-17:00"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self._occupancy("calendar3", self.day), (2, 0b101))
+        
+        response = self.client.patch(detail_url, {"booking_date": self.other_day.isoformat()}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self._occupancy("calendar3", self.day), (1, 0b001))
+        self.assertEqual(self._occupancy("calendar3", self.other_day), (1, 0b100))
+        
+        response = self.client.delete(detail_url)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self._occupancy("calendar3", self.other_day), (0, 0))
+    
+    def test_slot_bit_kept_while_another_booking_holds_it(self):
+        """Test that deleting one of two bookings of a slot keeps the slot occupied"""
+        first = self._create(calendar_id="calendar2", booking_time="9:30")
+        self._create(calendar_id="calendar2", booking_time=" 9:30 ")
+        first.delete()
+        self.assertEqual(self._occupancy("calendar2", self.day), (1, 0b10))
+    
+    def test_update_of_booking_excludes_its_own_place(self):
+        """Test that a booking on a full day can still be edited without counting itself"""
+        bookings = [self._create(calendar_id="calendar1", booking_time="21h00") for _ in range(2)]
+        response = self.client.patch(
+            reverse("booking-detail", args=[bookings[0].id]), {"client_name": "Renamed"}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self._occupancy("calendar1", self.day), (2, 0))
+    
+    def test_untracked_times_are_counted_and_listed(self):
+        """Test that free-form times have no bit but still show up as occupied"""
+        from .availability import compute_month_availability
+        self._create(calendar_id="calendar2", booking_time="10h00")
+        self._create(calendar_id="calendar2", booking_time="8:00")
+        self.assertEqual(self._occupancy("calendar2", self.day), (2, 0b1))
+        
+        availability = compute_month_availability("calendar2", self.day.year, self.day.month)
+        day = next(day for day in availability["days"] if day["date"] == self.day.isoformat())
+        self.assertEqual(day["booked_count"], 2)
+        self.assertEqual(day["occupied_slots"], ["10h00", "8:00"])
+    
+    def test_bulk_writes_refresh_occupancy(self):
+        """Test that chunked resets, which send no signals, refresh the affected days"""
+        from .reset_jobs import create_reset_job, run_reset_job
+        self._create(booking_time="8:00-11:00")
+        self._create(booking_time="11:00-14:00", day=self.other_day)
+        self._create(calendar_id="calendar2", booking_time="9:30")
+        
+        run_reset_job(create_reset_job("calendar3", batch_size=1))
+        self.assertEqual(self._occupancy("calendar3", self.day), (0, 0))
+        self.assertEqual(self._occupancy("calendar3", self.other_day), (0, 0))
+        self.assertEqual(self._occupancy("calendar2", self.day), (1, 0b10))
+    
+    def test_bulk_writes_lock_days_before_touching_bookings(self):
+        """Test that a reset batch locks the day rows (FOR UPDATE, key order) before deleting and counting"""
+        from django.db.models import QuerySet
+        from django.test.utils import CaptureQueriesContext
+        from .models import DailyOccupancy
+        from .reset_jobs import create_reset_job, delete_batch
+        self._create(booking_time="8:00-11:00", day=self.other_day)
+        self._create(booking_time="11:00-14:00")
+        DailyOccupancy.objects.filter(calendar_id="calendar3", day=self.day).delete()
+        locked = []
+        original_select_for_update = QuerySet.select_for_update
+        
+        def select_for_update(queryset, *args, **kwargs):
+            if queryset.model is DailyOccupancy:
+                locked.append(queryset.query.order_by)
+            return original_select_for_update(queryset, *args, **kwargs)
+        
+        job = create_reset_job("calendar3", batch_size=10)
+        with patch.object(QuerySet, "select_for_update", select_for_update), CaptureQueriesContext(connection) as queries:
+            self.assertEqual(delete_batch(job), 2)
+        
+        self.assertEqual(locked[0], ("calendar_id", "day"))
+        sql = [query["sql"] for query in queries.captured_queries]
+        first_delete = next(i for i, query in enumerate(sql) if query.startswith('DELETE FROM "core_booking"'))
+        missing_created = next(i for i, query in enumerate(sql) if query.startswith('INSERT') and "core_dailyoccupancy" in query)
+        recount = next(i for i, query in enumerate(sql) if "GROUP BY" in query and '"core_booking"' in query)
+        self.assertLess(missing_created, first_delete)
+        self.assertLess(first_delete, recount)
+        self.assertEqual(self._occupancy("calendar3", self.day), (0, 0))
+        self.assertEqual(self._occupancy("calendar3", self.other_day), (0, 0))
+    
+    def test_move_locks_both_days_up_front(self):
+        """Test that moving a booking locks the stored and the new day together, in key order, before saving"""
+        from . import serializers
+        booking = self._create(booking_time="8:00-11:00")
+        calls = []
+
+        def lock_occupancy_days(days):
+            calls.append(sorted(days))
+            # Both rows are locked before the booking is written
+            self.assertEqual(Booking.objects.get(pk=booking.pk).booking_date, self.day)
+            return original(days)
+
+        original = serializers.lock_occupancy_days
+        with patch.object(serializers, "lock_occupancy_days", lock_occupancy_days), \
+                patch.object(serializers, "lock_calendar_day") as lock_calendar_day:
+            response = self.client.patch(
+                reverse("booking-detail", args=[booking.id]), {"booking_date": self.other_day.isoformat()}, format="json"
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(calls, [[("calendar3", self.day), ("calendar3", self.other_day)]])
+        lock_calendar_day.assert_not_called()
+        self.assertEqual(self._occupancy("calendar3", self.day), (0, 0))
+        self.assertEqual(self._occupancy("calendar3", self.other_day), (1, 0b001))
+
+    def test_rebuild_command_checks_and_fixes_drift(self):
+        """Test that --check reports out-of-date rows and a rebuild fixes them"""
+        from django.core.management.base import CommandError
+        from .models import DailyOccupancy
+        self._create(booking_time="8:00-11:00")
+        self._create(calendar_id="calendar2", booking_time="9:30")
+        DailyOccupancy.objects.filter(calendar_id="calendar3").update(booked_count=5, occupied_slots_bitmask=0)
+        DailyOccupancy.objects.filter(calendar_id="calendar2").delete()
+        
+        out = StringIO()
+        with self.assertRaises(CommandError):
+            call_command("rebuild_occupancy", "--check", stdout=out)
+        self.assertIn(f"calendar3 {self.day}: stored 5 bookings (slots 0x0), expected 1 (slots 0x1)", out.getvalue())
+        self.assertEqual(self._occupancy("calendar3", self.day), (5, 0))
+        
+        out = StringIO()
+        call_command("rebuild_occupancy", "--calendar-id", "calendar3", stdout=out)
+        self.assertIn("1 days fixed (calendar3)", out.getvalue())
+        self.assertEqual(self._occupancy("calendar3", self.day), (1, 0b1))
+        self.assertIsNone(self._occupancy("calendar2", self.day))
+        
+        call_command("rebuild_occupancy", stdout=StringIO())
+        call_command("rebuild_occupancy", "--check", stdout=StringIO())
+        self.assertEqual(self._occupancy("calendar2", self.day), (1, 0b10))
+
+
+@override_settings(DATABASES=TEST_DATABASES)
+class NextAvailabilityTests(TestCase):
+    """Tests for the next free slot search - GET /api/availability/next/"""
+    
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.client = APIClient()
+        create_authenticated_user(self.client)
+        self.url = reverse("availability-next")
+        # Wednesday: the first bookable day is Friday 2030-01-04
+        self.today = date(2030, 1, 2)
+    
+    def _booking(self, calendar_id, booking_date, booking_time=""):
+        return Booking.objects.create(
+            calendar_id=calendar_id, booking_date=booking_date, booking_time=booking_time,
+            client_name="Client", client_phone="111", designer_name="Designer"
+        )
+    
+    def _find(self, calendar_id, count, start_date=None):
+        from .availability import find_next_free_slots
+        return find_next_free_slots(calendar_id, start_date, count, today=self.today)
+    
+    def test_slot_calendar_skips_taken_slots_holidays_and_sundays(self):
+        """Test that taken slots, holidays, Sundays and the two-day lead time are honoured"""
+        self._booking("calendar3", date(2030, 1, 4), "8:00-11:00")
+        self._booking("calendar3", date(2030, 1, 4), "14:00-17:00")
+        Holiday.objects.create(calendar_id="calendar3", holiday_date=date(2030, 1, 5))
+        
+        result = self._find("calendar3", 3)
+        self.assertEqual(result["from"], "2030-01-04")
+        self.assertEqual(result["slots"], [
+            {"date": "2030-01-04", "time": "11:00-14:00"},
+            {"date": "2030-01-07", "time": "8:00-11:00"},
+            {"date": "2030-01-07", "time": "11:00-14:00"},
+        ])
+        self.assertFalse(result["exhausted"])
+    
+    def test_daily_limit_calendar_returns_days_with_room(self):
+        """Test that Pose days at their daily limit are skipped"""
+        for _ in range(2):
+            self._booking("calendar1", date(2030, 1, 10), "21h00")
+        self._booking("calendar1", date(2030, 1, 11), "21h00")
+        
+        result = self._find("calendar1", 2, start_date=date(2030, 1, 10))
+        self.assertEqual(result["slots"], [
+            {"date": "2030-01-11", "time": None},
+            {"date": "2030-01-12", "time": None},
+        ])
+    
+    def test_distant_gap_is_found_with_a_few_range_queries(self):
+        """Test that months of full days cost one query pair per search window"""
+        from .models import DailyOccupancy
+        full_days = [date(2030, 1, 4) + timedelta(days=offset) for offset in range(150)]
+        DailyOccupancy.objects.bulk_create([
+            DailyOccupancy(calendar_id="calendar1", day=day, booked_count=2) for day in full_days
+        ])
+        
+        # Windows of 62 and 124 days: two occupancy and two holiday queries
+        with self.assertNumQueries(4):
+            result = self._find("calendar1", 1)
+        first_free = full_days[-1] + timedelta(days=1)
+        if first_free.weekday() == 6:
+            first_free += timedelta(days=1)
+        self.assertEqual(result["slots"], [{"date": first_free.isoformat(), "time": None}])
+    
+    def test_exhausted_when_horizon_reached(self):
+        """Test that a calendar closed for the whole horizon reports exhaustion"""
+        from .availability import NEXT_SLOTS_HORIZON_DAYS
+        from .models import DailyOccupancy
+        DailyOccupancy.objects.bulk_create([
+            DailyOccupancy(calendar_id="calendar3", day=date(2030, 1, 4) + timedelta(days=offset),
+                           booked_count=3, occupied_slots_bitmask=0b111)
+            for offset in range(NEXT_SLOTS_HORIZON_DAYS + 1)
+        ])
+        result = self._find("calendar3", 5)
+        self.assertEqual(result["slots"], [])
+        self.assertTrue(result["exhausted"])
+        self.assertEqual(result["until"], str(date(2030, 1, 4) + timedelta(days=NEXT_SLOTS_HORIZON_DAYS)))
+    
+    def test_api_returns_next_slots_and_validates_parameters(self):
+        """Test the endpoint, its cache invalidation and its 400 responses"""
+        response = self.client.get(self.url, {"calendar_id": "3", "count": "2"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["calendar_id"], "calendar3")
+        first = response.data["slots"][0]
+        self.assertGreaterEqual(first["date"], (date.today() + timedelta(days=2)).isoformat())
+        self.assertEqual(len(response.data["slots"]), 2)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self._booking("calendar3", date.fromisoformat(first["date"]), first["time"])
+        response = self.client.get(self.url, {"calendar_id": "calendar3", "count": "2"})
+        self.assertNotIn(first, response.data["slots"])
+        
+        response = self.client.get(self.url, {"calendar_id": "calendar3", "count": "1000"})
+        self.assertEqual(len(response.data["slots"]), 50)
+        
+        for params in ({}, {"calendar_id": "calendar3", "from": "2030-13-01"}, {"calendar_id": "calendar3", "count": "x"}):
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@override_settings(DATABASES=TEST_DATABASES)
+class BookingResetApiTests(TestCase):
+    """Tests for BookingResetView - DELETE (admin only)"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.url = reverse("booking-reset")
+        self.future_date = date.today() + timedelta(days=3)
+    
+    def test_reset_bookings_requires_authentication(self):
+        """Test that reset requires authentication"""
+        response = self.client.delete(self.url, format="json")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+    
+    def test_reset_bookings_requires_admin(self):
+        """Test that reset requires admin role"""
+        create_authenticated_user(self.client, role='concepteur')
+        response = self.client.delete(self.url, format="json")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+    
+    def test_reset_all_bookings(self):
+        """Test resetting all bookings"""
+        admin_user, _ = create_authenticated_user(self.client, role='admin')
+        Booking.objects.create(
+            calendar_id="calendar1",
+            booking_date=self.future_date,
+            client_name="Client 1",
+            client_phone="111",
+            designer_name="Designer 1"
+        )
+        Booking.objects.create(
+            calendar_id="calendar2",
+            booking_date=self.future_date,
+            booking_time="10h00",
+            client_name="Client 2",
+            client_phone="222",
+            designer_name="Designer 2"
+        )
+        
+        response = self.client.delete(self.url, format="json")
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["deleted"], 2)
+        self.assertEqual(Booking.objects.count(), 0)
+    
+    def test_reset_bookings_by_calendar(self):
+        """Test resetting bookings for specific calendar"""
+        admin_user, _ = create_authenticated_user(self.client, role='admin')
+        Booking.objects.create(
+            calendar_id="calendar1",
+            booking_date=self.future_date,
+            client_name="Client 1",
+            client_phone="111",
+            designer_name="Designer 1"
+        )
+        Booking.objects.create(
+            calendar_id="calendar2",
+            booking_date=self.future_date,
+            booking_time="10h00",
+            client_name="Client 2",
+            client_phone="222",
+            designer_name="Designer 2"
+        )
+        
+        response = self.client.delete(f"{self.url}?calendar_id=calendar1", format="json")
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["deleted"], 1)
+        self.assertEqual(Booking.objects.count(), 1)
+        self.assertEqual(Booking.objects.first().calendar_id, "calendar2")
+    
+    def test_reset_query_count_does_not_grow_with_bookings(self):
+        """Test that the reset deletes in set-based batches, with change log and occupancy kept in step"""
+        from django.test.utils import CaptureQueriesContext
+        from .models import DailyOccupancy
+        create_authenticated_user(self.client, role='admin')
+        Booking.objects.bulk_create([
+            Booking(calendar_id="calendar1", booking_date=self.future_date + timedelta(days=offset % 20),
+                    client_name=f"Client {offset}", client_phone="111", designer_name="Designer")
+            for offset in range(500)
+        ])
+        
+        with CaptureQueriesContext(connection) as queries, self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(f"{self.url}?calendar_id=calendar1", format="json")
+        
+        self.assertEqual(response.data["deleted"], 500)
+        self.assertLess(len(queries), 30)
+        self.assertFalse(Booking.objects.exists())
+        self.assertEqual(ChangeLogEntry.objects.filter(action=ChangeLogEntry.ACTION_DELETE).count(), 500)
+        self.assertEqual(
+            set(DailyOccupancy.objects.filter(calendar_id="calendar1").values_list("booked_count", flat=True)), {0}
+        )
+
+
+@override_settings(DATABASES=TEST_DATABASES)
+class BookingDebugApiTests(TestCase):
+    """Tests for BookingDebugView - GET (admin only)"""
+    
+    def setUp(self):
+        from django.core.cache import cache
+        # The cached archive boundary would outlive the rolled-back data of other tests
+        cache.clear()
+        self.client = APIClient()
+        self.url = reverse("booking-debug")
+        self.future_date = date.today() + timedelta(days=3)
+    
+    def test_debug_requires_authentication(self):
+        """Test that debug requires authentication"""
+        response = self.client.get(self.url, format="json")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+    
+    def test_debug_requires_admin(self):
+        """Test that debug requires admin role"""
+        create_authenticated_user(self.client, role='concepteur')
+        response = self.client.get(self.url, format="json")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+    
+    def test_debug_returns_summary(self):
+        """Test that debug returns booking summary"""
+        admin_user, _ = create_authenticated_user(self.client, role='admin')
+        Booking.objects.create(
+            calendar_id="calendar1",
+            booking_date=self.future_date,
+            client_name="Client 1",
+            client_phone="111",
+            designer_name="Designer 1"
+        )
+        Booking.objects.create(
+            calendar_id="calendar1",
+            booking_date=self.future_date,
+            client_name="Client 2",
+            client_phone="222",
+            designer_name="Designer 2"
+        )
+        
+        response = self.client.get(self.url, {"calendar_id": "calendar1", "min_count": 2}, format="json")
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["calendar_id"], "calendar1")
+        self.assertEqual(response.data["total_bookings"], 2)
+        self.assertEqual(response.data["daily_limit"], 2)
+        self.assertEqual(len(response.data["over_capacity_dates"]), 1)
+        self.assertEqual(response.data["over_capacity_dates"][0]["count"], 2)
+        self.assertEqual(
+            [b["client"] for b in response.data["over_capacity_dates"][0]["bookings"]],
+            ["Client 1", "Client 2"]
+        )
+        self.assertNotIn("all_bookings_by_date", response.data)
+    
+    def test_debug_default_calendar_id(self):
+        """Test that debug defaults to calendar_id=1"""
+        admin_user, _ = create_authenticated_user(self.client, role='admin')
+        response = self.client.get(self.url, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["calendar_id"], "1")
+    
+    def _create_bookings(self, day, count, calendar_id="calendar1"):
+        Booking.objects.bulk_create([
+            Booking(calendar_id=calendar_id, booking_date=day, booking_time=f"{8 + index}h00",
+                    client_name=f"Client {day} {index}", client_phone="111", designer_name="Designer")
+            for index in range(count)
+        ])
+    
+    def test_debug_reports_only_days_above_daily_limit(self):
+        """Test that only days above the daily limit are detailed, counts coming from the database"""
+        create_authenticated_user(self.client, role='admin')
+        first, second, third = (self.future_date + timedelta(days=offset) for offset in (0, 1, 2))
+        self._create_bookings(first, 3)
+        self._create_bookings(second, 2)
+        self._create_bookings(third, 1)
+        
+        from django.test.utils import CaptureQueriesContext
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, {"calendar_id": "calendar1"}, format="json")
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # Totals, over-capacity days, then the bookings of those days only
+        self.assertEqual(len([q for q in queries.captured_queries if '"core_booking"' in q["sql"]]), 3)
+        self.assertEqual(response.data["min_count"], 3)
+        self.assertEqual(response.data["total_bookings"], 6)
+        self.assertEqual(response.data["days_with_bookings"], 3)
+        self.assertEqual([d["date"] for d in response.data["over_capacity_dates"]], [str(first)])
+        self.assertEqual(len(response.data["over_capacity_dates"][0]["bookings"]), 3)
+        self.assertFalse(response.data["truncated"])
+    
+    def test_debug_date_range_and_limit(self):
+        """Test that the date range bounds the scan and the limit pages through over-capacity days"""
+        create_authenticated_user(self.client, role='admin')
+        days = [self.future_date + timedelta(days=offset) for offset in range(4)]
+        for day in days:
+            self._create_bookings(day, 2, calendar_id="calendar3")
+        
+        response = self.client.get(self.url, {
+            "calendar_id": "calendar3", "start_date": str(days[1]), "limit": 2
+        }, format="json")
+        
+        self.assertEqual(response.data["total_bookings"], 6)
+        self.assertEqual([d["date"] for d in response.data["over_capacity_dates"]], [str(days[1]), str(days[2])])
+        self.assertTrue(response.data["truncated"])
+        self.assertEqual(response.data["next_start_date"], str(days[3]))
+        
+        response = self.client.get(self.url, {
+            "calendar_id": "calendar3", "start_date": str(days[0]), "end_date": str(days[0])
+        }, format="json")
+        self.assertEqual(response.data["total_bookings"], 2)
+        self.assertEqual(len(response.data["over_capacity_dates"]), 1)
+        self.assertIsNone(response.data["next_start_date"])
+    
+    def test_debug_rejects_invalid_parameters(self):
+        """Test that malformed dates or limits are rejected with 400"""
+        create_authenticated_user(self.client, role='admin')
+        for params in ({"start_date": "2024-13-01"}, {"end_date": "tomorrow"}, {"limit": "all"}, {"min_count": "x"}):
+            response = self.client.get(self.url, params, format="json")
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+
+@override_settings(DATABASES=TEST_DATABASES)
+class ExplainBookingQueriesCommandTests(TestCase):
+    """Tests for the explain_booking_queries management command"""
+    
+    def test_prints_plans_for_all_code_paths(self):
+        """Test that the command explains the list, validation and holiday queries"""
+        out = StringIO()
+        call_command("explain_booking_queries", "--calendar-id", "calendar3", stdout=out)
+        output = out.getvalue()
+        
+        self.assertIn("BookingListCreateView.get_queryset", output)
+        self.assertIn("BookingSerializer.validate", output)
+        self.assertIn("HolidayListCreateView.get_queryset", output)
+        self.assertIn("core_booking", output)
+        self.assertIn("core_holiday", output)
+    
+    def test_rejects_invalid_date(self):
+        """Test that an invalid --date is reported as a command error"""
+        from django.core.management.base import CommandError
+        with self.assertRaises(CommandError):
+            call_command("explain_booking_queries", "--date", "not-a-date", stdout=StringIO())
+
+
+@override_settings(DATABASES=TEST_DATABASES)
+class HolidayApiTests(TestCase):
+    """Comprehensive tests for Holiday APIs"""
+    
+    def setUp(self):
+        from django.core.cache import cache
+        # Cached list responses would outlive the rolled-back data of other tests
+        cache.clear()
         self.client = APIClient()
         self.list_url = reverse("holiday-list-create")
         self.future_date = (date.today() + timedelta(days=6)).isoformat()
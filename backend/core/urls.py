@@ -1,14 +1,21 @@
 from django.urls import path
 from rest_framework_simplejwt.views import TokenRefreshView, TokenVerifyView
 
-from .views import BookingListCreateView, BookingRetrieveUpdateDestroyView, BookingResetView, BookingDebugView, ContactEmailView, HolidayListCreateView, HolidayRetrieveUpdateDestroyView, UserListCreateView, UserRetrieveUpdateDestroyView, UserLoginView
+from .views import calendar_events, AvailabilityView, NextAvailabilityView, BookingListCreateView, BookingRetrieveUpdateDestroyView, BookingResetView, BookingResetJobView, BookingDebugView, ChangesView, ContactEmailView, DashboardView, EventsTicketView, HolidayListCreateView, HolidayRetrieveUpdateDestroyView, UserListCreateView, UserRetrieveUpdateDestroyView, UserLoginView
 
 urlpatterns = [
     path('contact-email/', ContactEmailView.as_view(), name='contact-email'),
     path('bookings/', BookingListCreateView.as_view(), name='booking-list-create'),
     path('bookings/<int:pk>/', BookingRetrieveUpdateDestroyView.as_view(), name='booking-detail'),
     path('bookings/reset/', BookingResetView.as_view(), name='booking-reset'),
+    path('bookings/reset/jobs/<int:pk>/', BookingResetJobView.as_view(), name='booking-reset-job'),
     path('bookings/debug/', BookingDebugView.as_view(), name='booking-debug'),
+    path('availability/', AvailabilityView.as_view(), name='availability'),
+    path('availability/next/', NextAvailabilityView.as_view(), name='availability-next'),
+    path('changes/', ChangesView.as_view(), name='changes'),
+    path('events/', calendar_events, name='calendar-events'),
+    path('events/ticket/', EventsTicketView.as_view(), name='calendar-events-ticket'),
+    path('dashboard/', DashboardView.as_view(), name='dashboard'),
     path('holidays/', HolidayListCreateView.as_view(), name='holiday-list-create'),
     path('holidays/<int:pk>/', HolidayRetrieveUpdateDestroyView.as_view(), name='holiday-detail'),
     path('users/', UserListCreateView.as_view(), name='user-list-create'),
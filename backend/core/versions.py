@@ -0,0 +1,109 @@
+"""
+Data versions.
+
+Every booking or holiday write on a calendar bumps that calendar's version (and
+the all-calendars version) once the transaction commits; user writes bump the
+users version (see core.signals). Cached responses put the version in their
+cache key, and list views derive their ETag from it, so a write invalidates
+them without knowing or deleting keys.
+
+Each version is stored next to the time of the write that produced it, which
+list views send as Last-Modified.
+"""
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+VERSION_KEY = 'data_version:{scope}'
+MODIFIED_KEY = 'data_modified:{scope}'
+
+ALL_CALENDARS_SCOPE = 'calendars'
+USERS_SCOPE = 'users'
+
+
+def calendar_scope(calendar_id):
+    return f'calendar:{calendar_id}'
+
+
+def _version_key(scope):
+    return VERSION_KEY.format(scope=scope)
+
+
+def _modified_key(scope):
+    return MODIFIED_KEY.format(scope=scope)
+
+
+def _seed_version(scope):
+    # Seeded from the clock so a restarted or evicted cache never hands out an old version again
+    now_ns = time.time_ns()
+    cache.add(_version_key(scope), now_ns, timeout=None)
+    cache.add(_modified_key(scope), now_ns / 1e9, timeout=None)
+    return cache.get(_version_key(scope))
+
+
+def get_versions(scopes):
+    """
+    Return ({scope: version}, last_modified) for several scopes in one cache round-trip.
+    last_modified is the Unix time of the most recent write on any of the scopes.
+    """
+    keys = {}
+    for scope in scopes:
+        keys[scope] = (_version_key(scope), _modified_key(scope))
+    cached = cache.get_many([key for pair in keys.values() for key in pair])
+
+    versions = {}
+    last_modified = 0.0
+    for scope, (version_key, modified_key) in keys.items():
+        version = cached.get(version_key)
+        modified = cached.get(modified_key)
+        if version is None or modified is None:
+            # Evicted: start a new version; "modified now" is the safe answer
+            version = _seed_version(scope) if version is None else version
+            modified = time.time()
+            cache.set(modified_key, modified, timeout=None)
+        versions[scope] = version
+        last_modified = max(last_modified, modified)
+    return versions, last_modified
+
+
+def get_version(scope):
+    """Current data version of a scope"""
+    version = cache.get(_version_key(scope))
+    if version is None:
+        version = _seed_version(scope)
+    return version
+
+
+def bump_version(scope):
+    """Give the scope a new version; responses cached under the old one are no longer used"""
+    cache.set(_modified_key(scope), time.time(), timeout=None)
+    try:
+        return cache.incr(_version_key(scope))
+    except ValueError:
+        # Not cached yet (or evicted): any fresh seed is newer than what was cached
+        return _seed_version(scope)
+
+
+def bump_versions_on_commit(*scopes):
+    """Bump the versions once the current transaction commits (immediately in autocommit mode)"""
+    def bump():
+        for scope in scopes:
+            bump_version(scope)
+    transaction.on_commit(bump)
+
+
+def get_calendar_version(calendar_id):
+    """Current data version of a calendar"""
+    return get_version(calendar_scope(calendar_id))
+
+
+def bump_calendar_version(calendar_id):
+    """New version for the calendar and for the all-calendars listings"""
+    bump_version(ALL_CALENDARS_SCOPE)
+    return bump_version(calendar_scope(calendar_id))
+
+
+def bump_calendar_version_on_commit(calendar_id):
+    """Bump the calendar's version once the current transaction commits"""
+    bump_versions_on_commit(calendar_scope(calendar_id), ALL_CALENDARS_SCOPE)
@@ -1,8 +1,9 @@
-from datetime import date
 import logging
-from django.conf import settings
-from django.core.mail import EmailMessage
-from django.db.models import Count
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from rest_framework import generics, status
 from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser, BasePermission
 from rest_framework.response import Response
@@ -10,8 +11,21 @@ from rest_framework.views import APIView
 from rest_framework.throttling import AnonRateThrottle, SimpleRateThrottle
 from rest_framework_simplejwt.tokens import RefreshToken
 
-from .models import Booking, ContactMessage, Holiday, User
-from .serializers import BookingSerializer, ContactMessageSerializer, HolidaySerializer, UserSerializer
+from .archive import BookingRoute, reaches_archive
+from .authentication import StreamTicket, authenticate_access_token, authenticate_stream_ticket
+from .availability import get_month_availability, get_next_free_slots, parse_month
+from .calendars import get_calendar_label, resolve_calendar_id
+from .changes import get_changes_since, get_head_cursor, parse_cursor, record_move
+from .conditional import CalendarConditionalListMixin, ConditionalListMixin
+from .dashboard import TOP_CLIENTS_CALENDAR_ID, build_dashboard_summary
+from .diagnostics import DEFAULT_LIMIT as DIAGNOSTICS_DEFAULT_LIMIT, MAX_LIMIT as DIAGNOSTICS_MAX_LIMIT, build_booking_diagnostics
+from .events import event_stream
+from .models import Booking, BookingArchive, BookingResetJob, ContactMessage, Holiday, User
+from .outbox import enqueue_email
+from .pagination import BookingKeysetPagination
+from .reset_jobs import create_reset_job, delete_bookings
+from .serializers import TIME_SLOT_CALENDARS, BookingResetJobSerializer, BookingSerializer, ContactMessageSerializer, HolidaySerializer, UserSerializer
+from .versions import USERS_SCOPE, bump_calendar_version_on_commit
 
 logger = logging.getLogger(__name__)
 
@@ -64,27 +78,18 @@ class IsAdminUserCustom(BasePermission):
         # Check if user has admin role
         return request.user.role == 'admin'
 
-CALENDAR_LABELS = {
-    'calendar1': 'Pose',
-    '1': 'Pose',
-    'calendar2': 'Metré',
-    '2': 'Metré',
-    'calendar3': 'SAV',
-    '3': 'SAV',
-}
-
 
 def _notify_booking(booking: Booking, is_update=False):
-    """Send email notification for booking creation or update with beautiful HTML template"""
+    """Queue email notification for booking creation or update with beautiful HTML template"""
     try:
         action = "modifiée" if is_update else "enregistrée"
         action_icon = "✏️" if is_update else "✅"
-        calendar_label = CALENDAR_LABELS.get(booking.calendar_id, booking.calendar_id)
+        calendar_label = get_calendar_label(booking.calendar_id)
         subject = f"{action_icon} Réservation {action} - {calendar_label} - {booking.booking_date}"
 
         # Format time display
         time_display = ""
-        if booking.calendar_id in ['calendar2', 'calendar3', '2', '3']:
+        if resolve_calendar_id(booking.calendar_id) in TIME_SLOT_CALENDARS:
             if booking.booking_time and booking.booking_time.strip():
                 time_display = booking.booking_time.strip()
             else:
@@ -252,64 +257,17 @@ def _notify_booking(booking: Booking, is_update=False):
 </html>
         """
         
-        # Plain text fallback
-        message_section = f'Message/Commentaire:\n{booking.message}' if booking.message else ''
-        
-        text_body = f"""
-Réservation {action} - {calendar_label}
-
-Calendrier: {calendar_label}
-Date: {booking.booking_date}
-{f'Heure: {time_display}' if time_display else ''}
-
-Client: {booking.client_name}
-Téléphone: {booking.client_phone}
-Concepteur: {booking.designer_name or 'Non spécifié'}
-
-{message_section}
-
-ID Réservation: #{booking.id}
-{'Modifiée' if is_update else 'Créée'} le: {formatted_date}
-        """.strip()
-
-        # Safely get email settings with defaults
-        default_from_email = getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@example.com')
-        contact_email_recipients = getattr(settings, 'CONTACT_EMAIL_RECIPIENTS', default_from_email)
-        
-        recipient_raw = contact_email_recipients or default_from_email
-        recipients = [
-            email.strip() for email in recipient_raw.split(',')
-            if email.strip()
-        ]
-
-        logger.info(f"Preparing to send booking notification email for booking #{booking.id}")
-        logger.info(f"From: {default_from_email}")
-        logger.info(f"To: {recipients}")
-
-        email_message = EmailMessage(
-            subject=subject,
-            body=text_body,  # Plain text fallback
-            from_email=default_from_email,
-            to=recipients or [default_from_email],
-        )
-
-        # Set HTML content
-        email_message.content_subtype = "html"
-        email_message.body = html_body
-
-        try:
-            result = email_message.send(fail_silently=True)  # Don't fail if email can't be sent
-            logger.info(f"✅ Booking notification email sent successfully for booking #{booking.id} to {recipients}")
-            if result:
-                logger.info(f"Email backend returned success (sent {result} message(s))")
-            else:
-                logger.warning(f"Email backend returned {result} - email may not have been sent")
-        except Exception as e:
-            logger.error(f"❌ FAILED to send booking notification email for booking #{booking.id}: {e}", exc_info=True)
-            # Don't break booking creation if email fails
+        # Written in the booking's transaction, delivered by run_outbox_worker. The savepoint
+        # keeps a failed INSERT from breaking the booking's transaction
+        with transaction.atomic():
+            outbox_email = enqueue_email(subject=subject, body=html_body, content_subtype='html')
+        logger.info(f"Booking notification email #{outbox_email.id} queued for booking #{booking.id} to {outbox_email.to}")
     except Exception as e:
+        # The booking itself was rolled back (e.g. a deadlock): the request must fail
+        if transaction.get_rollback():
+            raise
         # Log the error but don't break the booking creation
-        logger.error(f"Error sending booking notification email: {e}", exc_info=True)
+        logger.error(f"Error queuing booking notification email: {e}", exc_info=True)
 
 
 class ContactEmailView(generics.ListCreateAPIView):
@@ -318,8 +276,10 @@ class ContactEmailView(generics.ListCreateAPIView):
     queryset = ContactMessage.objects.all().order_by('-created_at')
 
     def perform_create(self, serializer):
-        contact_message = serializer.save()
-        self._send_email(contact_message)
+        # The message and its notification email are stored together
+        with transaction.atomic():
+            contact_message = serializer.save()
+            self._send_email(contact_message)
 
     def _send_email(self, contact_message: ContactMessage):
         try:
@@ -345,45 +305,45 @@ class ContactEmailView(generics.ListCreateAPIView):
 
             body = "\n".join(body_lines)
 
-            # Safely get email settings with defaults
-            default_from_email = getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@example.com')
-            contact_email_recipients = getattr(settings, 'CONTACT_EMAIL_RECIPIENTS', default_from_email)
-            
-            recipient_raw = contact_email_recipients or default_from_email
-            recipients = [
-                email.strip() for email in recipient_raw.split(',')
-                if email.strip()
-            ]
-
-            email_message = EmailMessage(
-                subject=subject,
-                body=body,
-                from_email=default_from_email,
-                to=recipients or [default_from_email],
-                reply_to=[contact_message.email],
-            )
-
-            email_message.send(fail_silently=True)  # Don't fail if email can't be sent
+            with transaction.atomic():
+                enqueue_email(subject=subject, body=body, reply_to=[contact_message.email])
         except Exception as e:
+            if transaction.get_rollback():
+                raise
             # Log the error but don't break the contact message creation
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.error(f"Error sending contact message email: {e}", exc_info=True)
+            logger.error(f"Error queuing contact message email: {e}", exc_info=True)
+
+
+class BookingCapacityMixin:
+    """
+    Runs booking writes in a single transaction: BookingSerializer.validate locks the
+    (calendar, day) capacity row (both days, in key order, when an update moves the
+    booking) and the lock is held until the booking is saved,
+    so concurrent requests cannot overbook a day or a time slot.
+    """
+    
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.request.method in ('POST', 'PUT', 'PATCH'):
+            context['reserve_capacity'] = True
+        return context
 
 
-class BookingListCreateView(generics.ListCreateAPIView):
+class BookingListCreateView(CalendarConditionalListMixin, BookingCapacityMixin, generics.ListCreateAPIView):
     permission_classes = [IsAuthenticatedCustom]
     serializer_class = BookingSerializer
     queryset = Booking.objects.all()
+    # Opt-in: only paginates when ?cursor= or ?page_size= is sent
+    pagination_class = BookingKeysetPagination
+    response_cache_name = 'bookings'
     
-    def get_queryset(self):
-        queryset = super().get_queryset()
+    def filter_bookings(self, queryset):
         calendar_id = self.request.query_params.get('calendar_id')
         start_date = self.request.query_params.get('start_date')
         end_date = self.request.query_params.get('end_date')
 
         if calendar_id:
-            queryset = queryset.filter(calendar_id=calendar_id)
+            queryset = queryset.filter(calendar_id=resolve_calendar_id(calendar_id))
 
         if start_date:
             queryset = queryset.filter(booking_date__gte=start_date)
@@ -393,22 +353,43 @@ class BookingListCreateView(generics.ListCreateAPIView):
 
         return queryset.order_by('booking_date', 'booking_time', 'id')
 
+    def get_queryset(self):
+        queryset = self.filter_bookings(super().get_queryset())
+        if self.request.method != 'GET':
+            return queryset
+        # Ranges reaching archived dates also list the archived bookings
+        calendar_id = self.request.query_params.get('calendar_id')
+        if reaches_archive(resolve_calendar_id(calendar_id), self.request.query_params.get('start_date')):
+            return BookingRoute(queryset, self.filter_bookings(BookingArchive.objects.all()))
+        return queryset
+
+    def create(self, request, *args, **kwargs):
+        with transaction.atomic():
+            return super().create(request, *args, **kwargs)
+
     def perform_create(self, serializer):
         booking = serializer.save()
-        # Refresh from database to ensure we have the latest saved values
-        booking.refresh_from_db()
+        # Queued in the same transaction as the booking
         _notify_booking(booking)
 
 
-class BookingRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
+class BookingRetrieveUpdateDestroyView(BookingCapacityMixin, generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [IsAuthenticatedCustom]
     serializer_class = BookingSerializer
     queryset = Booking.objects.all()
     
+    def update(self, request, *args, **kwargs):
+        with transaction.atomic():
+            return super().update(request, *args, **kwargs)
+    
     def perform_update(self, serializer):
+        previous_calendar_id = serializer.instance.calendar_id
+        record_move(serializer.instance, serializer.validated_data.get('calendar_id', previous_calendar_id))
         booking = serializer.save()
-        # Refresh from database to ensure we have the latest saved values
-        booking.refresh_from_db()
+        if booking.calendar_id != previous_calendar_id:
+            # The save signal only invalidates the new calendar
+            bump_calendar_version_on_commit(previous_calendar_id)
+        # Queued in the same transaction as the booking
         _notify_booking(booking, is_update=True)
     
     def perform_destroy(self, instance):
@@ -418,13 +399,14 @@ class BookingRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
             'booking_date': instance.booking_date,
             'client_name': instance.client_name
         }
-        instance.delete()
-        self._notify_booking_deletion(booking_info)
+        with transaction.atomic():
+            instance.delete()
+            self._notify_booking_deletion(booking_info)
     
     def _notify_booking_deletion(self, booking_info):
-        """Send email notification when a booking is deleted"""
+        """Queue email notification when a booking is deleted"""
         try:
-            calendar_label = CALENDAR_LABELS.get(booking_info['calendar_id'], booking_info['calendar_id'])
+            calendar_label = get_calendar_label(booking_info['calendar_id'])
             subject = f"Réservation supprimée pour {calendar_label} le {booking_info['booking_date']}"
             body_lines = [
                 "Une réservation a été supprimée :",
@@ -438,99 +420,307 @@ class BookingRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
 
             body = "\n".join(body_lines)
 
-            # Safely get email settings with defaults
-            default_from_email = getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@example.com')
-            contact_email_recipients = getattr(settings, 'CONTACT_EMAIL_RECIPIENTS', default_from_email)
-            
-            recipient_raw = contact_email_recipients or default_from_email
-            recipients = [
-                email.strip() for email in recipient_raw.split(',')
-                if email.strip()
-            ]
-
-            email_message = EmailMessage(
-                subject=subject,
-                body=body,
-                from_email=default_from_email,
-                to=recipients or [default_from_email],
-            )
-
-            email_message.send(fail_silently=True)  # Don't fail if email can't be sent
+            with transaction.atomic():
+                enqueue_email(subject=subject, body=body)
         except Exception as e:
+            if transaction.get_rollback():
+                raise
             # Log the error but don't break the booking deletion
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.error(f"Error sending booking deletion notification email: {e}", exc_info=True)
+            logger.error(f"Error queuing booking deletion notification email: {e}", exc_info=True)
 
 
 class BookingResetView(APIView):
+    """
+    DELETE /api/bookings/reset/[?calendar_id=calendar1]
+    Deletes the bookings of one calendar (or all of them) in a single transaction.
+    With chunked=1 (and optionally batch_size=1000, archive=1), queues a BookingResetJob
+    instead and answers 202 with the job to poll at /api/bookings/reset/jobs/<id>/.
+    """
     permission_classes = [IsAdminUserCustom]
+    max_batch_size = 10000
 
     def delete(self, request):
         calendar_id = request.query_params.get('calendar_id')
 
+        if request.query_params.get('chunked') in ('1', 'true'):
+            try:
+                batch_size = int(request.query_params.get('batch_size') or 0) or None
+            except ValueError:
+                return Response(
+                    {'detail': 'Le paramètre batch_size doit être un entier.'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            if batch_size is not None:
+                batch_size = max(1, min(batch_size, self.max_batch_size))
+            job = create_reset_job(
+                resolve_calendar_id(calendar_id) if calendar_id else '',
+                batch_size=batch_size,
+                archive=request.query_params.get('archive') in ('1', 'true'),
+            )
+            return Response(BookingResetJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
         queryset = Booking.objects.all()
         if calendar_id:
-            queryset = queryset.filter(calendar_id=calendar_id)
+            queryset = queryset.filter(calendar_id=resolve_calendar_id(calendar_id))
 
-        deleted_count, _ = queryset.delete()
+        # One DELETE per 1000 rows instead of per-row signals, in a single transaction
+        deleted_count = delete_bookings(queryset)
 
         return Response({'deleted': deleted_count}, status=status.HTTP_200_OK)
 
 
+class BookingResetJobView(generics.RetrieveAPIView):
+    """GET /api/bookings/reset/jobs/<id>/: status and progress of a chunked reset"""
+    permission_classes = [IsAdminUserCustom]
+    serializer_class = BookingResetJobSerializer
+    queryset = BookingResetJob.objects.all()
+
+
+class AvailabilityView(APIView):
+    """
+    GET /api/availability/?calendar_id=calendar3&month=2025-06
+    Per-day remaining capacity, free time slots and holiday flags for one calendar month,
+    so the calendar pages do not need the full booking and holiday lists.
+    """
+    permission_classes = [IsAuthenticatedCustom]
+
+    def get(self, request):
+        calendar_id = request.query_params.get('calendar_id')
+        if not calendar_id:
+            return Response(
+                {'detail': 'Le paramètre calendar_id est requis.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            year, month = parse_month(request.query_params.get('month'))
+        except ValueError:
+            return Response(
+                {'detail': 'Le paramètre month doit être au format AAAA-MM.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        availability = get_month_availability(resolve_calendar_id(calendar_id), year, month)
+        return Response(availability, status=status.HTTP_200_OK)
+
+
+class NextAvailabilityView(APIView):
+    """
+    GET /api/availability/next/?calendar_id=calendar3&from=2025-06-01&count=5
+    The next free (date, time) pairs of a calendar, so booking forms can offer the
+    first free dates without paging through months. `from` defaults to today.
+    """
+    permission_classes = [IsAuthenticatedCustom]
+    max_count = 50
+
+    def get(self, request):
+        calendar_id = request.query_params.get('calendar_id')
+        if not calendar_id:
+            return Response(
+                {'detail': 'Le paramètre calendar_id est requis.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        start_date = None
+        if request.query_params.get('from'):
+            try:
+                start_date = parse_date(request.query_params['from'])
+            except ValueError:
+                start_date = None
+            if start_date is None:
+                return Response(
+                    {'detail': 'Le paramètre from doit être une date au format AAAA-MM-JJ.'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        try:
+            count = int(request.query_params.get('count', 5))
+        except ValueError:
+            return Response(
+                {'detail': 'Le paramètre count doit être un entier.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        count = max(1, min(count, self.max_count))
+
+        result = get_next_free_slots(resolve_calendar_id(calendar_id), start_date, count)
+        return Response(result, status=status.HTTP_200_OK)
+
+
+class DashboardView(APIView):
+    """
+    GET /api/dashboard/?limit=10[&since=<ISO datetime>]
+    Per-calendar booking counts, recent bookings, top clients and recent holidays
+    in one small payload that the admin dashboard can poll.
+    With `since`, the recent lists hold everything created since then (bounded, with
+    their totals) instead of the `limit` newest (see build_dashboard_summary).
+    """
+    permission_classes = [IsAuthenticatedCustom]
+    max_limit = 50
+
+    def get(self, request):
+        try:
+            limit = int(request.query_params.get('limit', 10))
+        except ValueError:
+            return Response(
+                {'detail': 'Le paramètre limit doit être un entier.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        limit = max(1, min(limit, self.max_limit))
+        since = request.query_params.get('since')
+        if since:
+            try:
+                since = parse_datetime(since)
+            except ValueError:
+                since = None
+            if since is None:
+                return Response(
+                    {'detail': 'Le paramètre since doit être une date et heure ISO 8601.'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            if timezone.is_naive(since):
+                since = timezone.make_aware(since)
+        else:
+            since = None
+        top_clients_calendar_id = resolve_calendar_id(
+            request.query_params.get('top_clients_calendar_id') or TOP_CLIENTS_CALENDAR_ID
+        )
+
+        summary = build_dashboard_summary(limit=limit, top_clients_calendar_id=top_clients_calendar_id, since=since)
+        return Response(summary, status=status.HTTP_200_OK)
+
+
+class ChangesView(APIView):
+    """
+    GET /api/changes/?since=<cursor>[&calendar_id=calendar1]
+    Bookings and holidays created, updated or deleted after the cursor, and the next cursor.
+    Without `since`, only the current cursor is returned (load the full lists once, then poll).
+    """
+    permission_classes = [IsAuthenticatedCustom]
+
+    def get(self, request):
+        calendar_id = request.query_params.get('calendar_id')
+        if calendar_id:
+            calendar_id = resolve_calendar_id(calendar_id)
+
+        since = request.query_params.get('since')
+        if since in (None, ''):
+            return Response({
+                'cursor': str(get_head_cursor(calendar_id)),
+                'has_more': False,
+                'bookings': [],
+                'holidays': [],
+                'deleted': {'bookings': [], 'holidays': []},
+            }, status=status.HTTP_200_OK)
+
+        try:
+            since = parse_cursor(since)
+        except ValueError:
+            return Response(
+                {'detail': 'Curseur de synchronisation invalide.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response(get_changes_since(since, calendar_id=calendar_id), status=status.HTTP_200_OK)
+
+
+class EventsTicketView(APIView):
+    """
+    POST /api/events/ticket/
+    Short-lived ticket for GET /api/events/?ticket=<ticket> (see StreamTicket), so that
+    the access token never ends up in a URL (and in the access logs).
+    """
+    permission_classes = [IsAuthenticatedCustom]
+
+    def post(self, request):
+        ticket = StreamTicket.for_user(request.user)
+        return Response(
+            {'ticket': str(ticket), 'expires_in': int(ticket.lifetime.total_seconds())},
+            status=status.HTTP_200_OK
+        )
+
+
+async def calendar_events(request):
+    """
+    GET /api/events/?ticket=<stream ticket>[&calendar_id=calendar1]
+    Server-Sent Events stream of booking.created/updated/deleted and holiday.* events.
+    EventSource cannot send headers, so it passes a ticket from POST /api/events/ticket/
+    (clients that can send headers use the Authorization header instead); the access
+    token is not accepted in the URL. Needs the ASGI server (backend.asgi).
+    """
+    raw_ticket = request.GET.get('ticket')
+    auth_header = request.headers.get('Authorization', '')
+    if raw_ticket:
+        user = await sync_to_async(authenticate_stream_ticket)(raw_ticket)
+    elif auth_header.startswith('Bearer '):
+        user = await sync_to_async(authenticate_access_token)(auth_header[len('Bearer '):])
+    else:
+        user = None
+    if user is None:
+        return JsonResponse({'detail': 'Authentification requise.'}, status=status.HTTP_401_UNAUTHORIZED)
+
+    calendar_id = request.GET.get('calendar_id')
+    if calendar_id:
+        calendar_id = await sync_to_async(resolve_calendar_id)(calendar_id)
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    try:
+        last_event_id = parse_cursor(last_event_id) if last_event_id else None
+    except ValueError:
+        last_event_id = None
+
+    response = StreamingHttpResponse(
+        event_stream(calendar_id=calendar_id, last_event_id=last_event_id),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    # Disable proxy buffering (nginx) so events are delivered immediately
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
 class BookingDebugView(APIView):
+    """
+    GET /api/bookings/debug/?calendar_id=calendar1[&start_date=2024-01-01&end_date=2024-12-31&limit=100&min_count=3]
+    Over-capacity days of a calendar (min_count or more bookings, by default above the
+    daily limit) with their bookings, at most `limit` days per response; continue from
+    `next_start_date` when `truncated`. Counts are aggregated by the database.
+    """
     permission_classes = [IsAdminUserCustom]
 
     def get(self, request):
-        """Debug endpoint to find dates with 2+ bookings for a calendar_id"""
         calendar_id = request.query_params.get('calendar_id', '1')
-        
-        # Get all bookings for this calendar_id
-        bookings = Booking.objects.filter(calendar_id=calendar_id).order_by('booking_date')
-        
-        # Group by date and count
-        from collections import defaultdict
-        date_counts = defaultdict(list)
-        
-        for booking in bookings:
-            date_counts[str(booking.booking_date)].append({
-                'id': booking.id,
-                'date': str(booking.booking_date),
-                'time': booking.booking_time,
-                'client': booking.client_name,
-                'calendar_id': booking.calendar_id
-            })
-        
-        # Find dates with 2+ bookings
-        dates_with_multiple = {}
-        for booking_date, booking_list in date_counts.items():
-            if len(booking_list) >= 2:
-                dates_with_multiple[booking_date] = {
-                    'count': len(booking_list),
-                    'bookings': booking_list
-                }
-        
-        # Also check using Django aggregation
-        today = date.today()
-        aggregated = Booking.objects.filter(
-            calendar_id=calendar_id,
-            booking_date__gte=today  # Only future dates
-        ).values('booking_date').annotate(
-            booking_count=Count('id')
-        ).filter(booking_count__gte=2).order_by('booking_date')
-        
-        return Response({
-            'calendar_id': calendar_id,
-            'total_bookings': bookings.count(),
-            'dates_with_2_or_more_bookings': dates_with_multiple,
-            'future_dates_with_2_or_more_bookings': list(aggregated),
-            'all_bookings_by_date': {k: {'count': len(v), 'bookings': v} for k, v in date_counts.items()}
-        }, status=status.HTTP_200_OK)
+        canonical_id = resolve_calendar_id(calendar_id)
+
+        dates = {}
+        for param in ('start_date', 'end_date'):
+            value = request.query_params.get(param)
+            try:
+                dates[param] = parse_date(value) if value else None
+            except ValueError:
+                dates[param] = None
+            if value and dates[param] is None:
+                return Response(
+                    {'detail': f'Le paramètre {param} doit être au format AAAA-MM-JJ.'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
 
+        try:
+            limit = int(request.query_params.get('limit', DIAGNOSTICS_DEFAULT_LIMIT))
+            min_count = request.query_params.get('min_count')
+            min_count = int(min_count) if min_count else None
+        except ValueError:
+            return Response(
+                {'detail': 'Les paramètres limit et min_count doivent être des entiers.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        limit = max(1, min(limit, DIAGNOSTICS_MAX_LIMIT))
+        if min_count is not None:
+            min_count = max(1, min_count)
+
+        diagnostics = build_booking_diagnostics(canonical_id, limit=limit, min_count=min_count, **dates)
+        return Response({'calendar_id': calendar_id, **diagnostics}, status=status.HTTP_200_OK)
 
-class HolidayListCreateView(generics.ListCreateAPIView):
+
+class HolidayListCreateView(CalendarConditionalListMixin, generics.ListCreateAPIView):
     serializer_class = HolidaySerializer
     queryset = Holiday.objects.all()
+    response_cache_name = 'holidays'
     
     def get_permissions(self):
         if self.request.method == 'GET':
@@ -545,21 +735,7 @@ class HolidayListCreateView(generics.ListCreateAPIView):
             end_date = self.request.query_params.get('end_date')
 
             if calendar_id:
-                # Handle legacy calendar_id formats: "1" instead of "calendar1", etc.
-                calendar_ids_to_check = [calendar_id]
-                if calendar_id == 'calendar1':
-                    calendar_ids_to_check.append('1')
-                elif calendar_id == 'calendar2':
-                    calendar_ids_to_check.append('2')
-                elif calendar_id == 'calendar3':
-                    calendar_ids_to_check.append('3')
-                elif calendar_id == '1':
-                    calendar_ids_to_check.append('calendar1')
-                elif calendar_id == '2':
-                    calendar_ids_to_check.append('calendar2')
-                elif calendar_id == '3':
-                    calendar_ids_to_check.append('calendar3')
-                queryset = queryset.filter(calendar_id__in=calendar_ids_to_check)
+                queryset = queryset.filter(calendar_id=resolve_calendar_id(calendar_id))
 
             if start_date:
                 queryset = queryset.filter(holiday_date__gte=start_date)
@@ -625,13 +801,25 @@ class HolidayRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
         if self.request.method == 'GET':
             return [IsAuthenticatedCustom()]
         return [IsAdminUserCustom()]
+    
+    def perform_update(self, serializer):
+        previous_calendar_id = serializer.instance.calendar_id
+        with transaction.atomic():
+            record_move(serializer.instance, serializer.validated_data.get('calendar_id', previous_calendar_id))
+            holiday = serializer.save()
+        if holiday.calendar_id != previous_calendar_id:
+            # The save signal only invalidates the new calendar
+            bump_calendar_version_on_commit(previous_calendar_id)
 
 
-class UserListCreateView(generics.ListCreateAPIView):
+class UserListCreateView(ConditionalListMixin, generics.ListCreateAPIView):
     permission_classes = [IsAdminUserCustom]
     serializer_class = UserSerializer
     queryset = User.objects.all()
     
+    def get_version_scopes(self):
+        return [USERS_SCOPE]
+
     def get_queryset(self):
         queryset = super().get_queryset()
         role = self.request.query_params.get('role')
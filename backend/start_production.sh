@@ -21,9 +21,24 @@ mkdir -p logs
 # Run migrations
 /usr/bin/python3 manage.py migrate --noinput
 
+# Start the notification email worker (views only queue emails in the outbox)
+nohup /usr/bin/python3 manage.py run_outbox_worker >> logs/outbox.log 2>&1 &
+
+# Start the booking reset worker (chunked resets are queued by DELETE /api/bookings/reset/?chunked=1)
+nohup /usr/bin/python3 manage.py run_reset_jobs >> logs/reset_jobs.log 2>&1 &
+
 # Find gunicorn (try user install first, then system)
 GUNICORN_CMD=$(which gunicorn 2>/dev/null || echo "$HOME/.local/bin/gunicorn")
 
+# Serve through ASGI with uvicorn workers (needed by the /api/events/ SSE stream);
+# fall back to WSGI when the uvicorn-worker package is not installed
+if /usr/bin/python3 -c "import uvicorn_worker" 2>/dev/null; then
+    APP_ARGS="--worker-class uvicorn_worker.UvicornWorker backend.asgi:application"
+else
+    echo "uvicorn-worker not installed: serving WSGI, /api/events/ streams will hold a worker each"
+    APP_ARGS="backend.wsgi:application"
+fi
+
 # Start Gunicorn
 exec $GUNICORN_CMD \
     --bind 127.0.0.1:8000 \
@@ -32,5 +47,5 @@ exec $GUNICORN_CMD \
     --access-logfile logs/access.log \
     --error-logfile logs/error.log \
     --log-level info \
-    backend.wsgi:application
+    $APP_ARGS
 
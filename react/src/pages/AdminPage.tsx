@@ -1,7 +1,7 @@
 import { useState, useEffect } from 'react'
 import { useNavigate, useLocation } from 'react-router-dom'
 import { getAllBookings, BookingRecord, getCalendarName, CALENDAR_CONFIGS, updateBooking, deleteBooking, addBooking } from '../services/bookingService'
-import { getAllNotifications, NotificationItem, getTimeAgo as getNotificationTimeAgo } from '../services/notificationService'
+import { getAllNotifications, NotificationItem, getTimeAgo as getNotificationTimeAgo, subscribeToCalendarEvents } from '../services/notificationService'
 import { getAllUsers, UserRecord } from '../services/userService'
 import AdminBookingModal, { AdminBookingFormData } from '../components/AdminBookingModal'
 import {
@@ -149,9 +149,10 @@ function AdminPage() {
   // Load all notifications
   const loadNotifications = async () => {
     try {
-      const notifications = await getAllNotifications()
+      const { notifications, moreCount } = await getAllNotifications()
       setAllNotifications(notifications)
-      setUnreadCount(notifications.length)
+      // Counts the notifications the server left out of its bounded lists as well
+      setUnreadCount(notifications.length + moreCount)
     } catch (error) {
       console.error('Error loading notifications:', error)
     }
@@ -159,13 +160,13 @@ function AdminPage() {
 
   useEffect(() => {
     loadNotifications()
-    // Refresh notifications every 60 seconds (reduced from 30s to lower API load)
-    const interval = setInterval(loadNotifications, 60000)
+    // Refresh notifications when the server pushes a booking/holiday change (polls only as a fallback)
+    const unsubscribe = subscribeToCalendarEvents(loadNotifications)
     // Listen for custom refresh events
     const handleRefresh = () => loadNotifications()
     window.addEventListener('notificationRefresh', handleRefresh)
     return () => {
-      clearInterval(interval)
+      unsubscribe()
       window.removeEventListener('notificationRefresh', handleRefresh)
     }
   }, [bookings])
@@ -6,7 +6,7 @@ import Calendar3Page from './Calendar3Page'
 import Calendar1Page from './Calendar1Page'
 import Calendar2Page from './Calendar2Page'
 import { getAllBookings, BookingRecord, CALENDAR_NAMES, getCalendarName } from '../services/bookingService'
-import { getAllNotifications, NotificationItem, getTimeAgo as getNotificationTimeAgo } from '../services/notificationService'
+import { getAllNotifications, NotificationItem, getTimeAgo as getNotificationTimeAgo, subscribeToCalendarEvents } from '../services/notificationService'
 import { getAllUsers } from '../services/userService'
 import {
   Calendar,
@@ -464,9 +464,10 @@ function DashbordPage() {
   // Load all notifications
   const loadNotifications = async () => {
     try {
-      const notifications = await getAllNotifications()
+      const { notifications, moreCount } = await getAllNotifications()
       setAllNotifications(notifications)
-      setUnreadCount(notifications.length)
+      // Counts the notifications the server left out of its bounded lists as well
+      setUnreadCount(notifications.length + moreCount)
     } catch (error) {
       console.error('Error loading notifications:', error)
     }
@@ -474,13 +475,13 @@ function DashbordPage() {
 
   useEffect(() => {
     loadNotifications()
-    // Refresh notifications every 60 seconds (reduced from 30s to lower API load)
-    const interval = setInterval(loadNotifications, 60000)
+    // Refresh notifications when the server pushes a booking/holiday change (polls only as a fallback)
+    const unsubscribe = subscribeToCalendarEvents(loadNotifications)
     // Listen for custom refresh events
     const handleRefresh = () => loadNotifications()
     window.addEventListener('notificationRefresh', handleRefresh)
     return () => {
-      clearInterval(interval)
+      unsubscribe()
       window.removeEventListener('notificationRefresh', handleRefresh)
     }
   }, []) // Remove recentBookings dependency - notifications should load independently
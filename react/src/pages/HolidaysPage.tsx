@@ -247,9 +247,10 @@ function HolidaysPage() {
 
   const loadNotifications = async () => {
     try {
-      const notifications = await getAllNotifications()
+      const { notifications, moreCount } = await getAllNotifications()
       setAllNotifications(notifications)
-      setUnreadCount(notifications.length)
+      // Counts the notifications the server left out of its bounded lists as well
+      setUnreadCount(notifications.length + moreCount)
     } catch (error) {
       console.error('Error loading notifications:', error)
     }
@@ -109,7 +109,7 @@ function UtilisateursPage() {
   // Load all notifications
   const loadNotifications = async () => {
     try {
-      const notifications = await getAllNotifications()
+      const { notifications, moreCount } = await getAllNotifications()
       // Add user notifications - map UserRecord to expected format
       const usersForNotifications = users.map(user => ({
         id: user.id,
@@ -121,7 +121,8 @@ function UtilisateursPage() {
       const userNotifications = getRecentUsersNotifications(usersForNotifications)
       const combined = [...notifications, ...userNotifications].sort((a, b) => b.timestamp - a.timestamp)
       setAllNotifications(combined)
-      setUnreadCount(combined.length)
+      // Counts the notifications the server left out of its bounded lists as well
+      setUnreadCount(combined.length + moreCount)
     } catch (error) {
       console.error('Error loading notifications:', error)
     }
@@ -209,7 +209,7 @@ const CACHE_DURATION = 30000 // 30 seconds cache to reduce API load
 export const clearBookingsCache = (calendarId?: string) => {
   const keysToDelete: string[] = []
   requestCache.forEach((_, key) => {
-    if (key.startsWith('bookings_')) {
+    if (key.startsWith('bookings_') || key.startsWith('availability_')) {
       if (!calendarId || key.includes(calendarId)) {
         keysToDelete.push(key)
       }
@@ -222,7 +222,7 @@ export const clearBookingsCache = (calendarId?: string) => {
 export const clearHolidaysCache = (calendarId?: string) => {
   const keysToDelete: string[] = []
   requestCache.forEach((_, key) => {
-    if (key.startsWith('holidays_')) {
+    if (key.startsWith('holidays_') || key.startsWith('availability_')) {
       if (!calendarId || key.includes(calendarId)) {
         keysToDelete.push(key)
       }
@@ -292,6 +292,85 @@ export const getAllBookings = async (
   return requestPromise
 }
 
+export interface AvailabilityDay {
+  date: string
+  is_holiday: boolean
+  bookable: boolean
+  booked_count: number
+  remaining: number | null
+  free_slots: string[] | null
+  occupied_slots: string[] | null
+}
+
+export interface MonthAvailability {
+  calendar_id: string
+  month: string
+  daily_limit: number | null
+  time_slots: string[] | null
+  days: AvailabilityDay[]
+}
+
+// Get the per-day booking counts of one month (YYYY-MM), read from the server's occupancy table
+export const getMonthAvailability = async (month: string, binId?: string): Promise<MonthAvailability | null> => {
+  const targetBinId = resolveBinId(binId)
+  const params = new URLSearchParams({ calendar_id: targetBinId, month })
+
+  const cacheKey = `availability_${targetBinId}_${month}`
+  const cached = requestCache.get(cacheKey)
+  if (cached && Date.now() - cached.timestamp < CACHE_DURATION) {
+    return cached.promise
+  }
+
+  const requestPromise = (async () => {
+    try {
+      return await apiRequest<MonthAvailability>(`/availability/?${params.toString()}`)
+    } catch (error) {
+      console.warn(`[getMonthAvailability] Failed to fetch availability for calendar_id: ${targetBinId}`, error)
+      return null
+    } finally {
+      // Remove from cache after a delay to allow for legitimate refreshes
+      setTimeout(() => {
+        requestCache.delete(cacheKey)
+      }, CACHE_DURATION)
+    }
+  })()
+
+  requestCache.set(cacheKey, { promise: requestPromise, timestamp: Date.now() })
+
+  return requestPromise
+}
+
+export interface NextAvailableSlots {
+  calendar_id: string
+  from: string
+  slots: { date: string; time: string | null }[]
+  exhausted: boolean
+  until: string
+}
+
+// Get the next free (date, time) pairs of a calendar, searched server-side
+export const getNextAvailableSlots = async (
+  binId?: string,
+  options?: { from?: string; count?: number }
+): Promise<NextAvailableSlots | null> => {
+  const targetBinId = resolveBinId(binId)
+  const params = new URLSearchParams({ calendar_id: targetBinId })
+  if (options?.from) params.append('from', options.from)
+  if (options?.count) params.append('count', String(options.count))
+
+  try {
+    return await apiRequest<NextAvailableSlots>(`/availability/next/?${params.toString()}`)
+  } catch (error) {
+    console.warn(`[getNextAvailableSlots] Failed to fetch next slots for calendar_id: ${targetBinId}`, error)
+    return null
+  }
+}
+
+const getAvailabilityDay = async (date: string, binId?: string): Promise<AvailabilityDay | undefined> => {
+  const availability = await getMonthAvailability(date.slice(0, 7), binId)
+  return availability?.days.find(day => day.date === date)
+}
+
 // Get max bookings per day for a calendar (default: 3, calendar1: 2)
 const MAX_BOOKINGS_PER_DAY_BY_BIN: { [key: string]: number } = {
   [CALENDAR_CONFIGS['calendar1']]: 2, // Pose calendar (per-day bookings)
@@ -324,16 +403,11 @@ export const isDateFullyBooked = async (date: string, binId?: string, maxBooking
       return false
     }
     
-    const allBookings = await getAllBookings(binId);
-    // Only count bookings for future dates
-    const dateBookings = allBookings.filter(booking => {
-      const bookingDate = new Date(booking.date + 'T00:00:00')
-      bookingDate.setHours(0, 0, 0, 0)
-      return booking.date === date && bookingDate >= today
-    });
+    // Day's booking count from the server instead of recounting every booking
+    const day = await getAvailabilityDay(date, binId);
     const limit = maxBookings ?? getMaxBookingsPerDay(binId);
     
-    return dateBookings.length >= limit;
+    return (day?.booked_count ?? 0) >= limit;
   } catch (error) {
     console.error('Error checking booking limit:', error);
     return false; // Allow booking if we can't check
@@ -439,9 +513,8 @@ export const addBooking = async (bookingData: BookingData, binId?: string, maxBo
 // Get bookings count for a specific date
 export const getBookingsCountForDate = async (date: string, binId?: string): Promise<number> => {
   try {
-    const allBookings = await getAllBookings(binId);
-    const dateBookings = allBookings.filter(booking => booking.date === date);
-    return dateBookings.length;
+    const day = await getAvailabilityDay(date, binId);
+    return day?.booked_count ?? 0;
   } catch (error) {
     console.error('Error getting bookings count:', error);
     return 0;
@@ -705,3 +778,43 @@ export const isHoliday = async (date: string, binId?: string): Promise<boolean>
   }
 }
 
+
+// Dashboard summary (counts, recent bookings, top clients, recent holidays) in one request
+export interface DashboardSummary {
+  month: string // YYYY-MM
+  days_in_month: number
+  calendars: Array<{ calendar_id: string; name: string; total: number; this_month: number; upcoming: number }>
+  recent_bookings: Array<{
+    id: number
+    calendar_id: string
+    booking_date: string
+    booking_time: string
+    client_name: string
+    designer_name: string
+    created_at: string
+  }>
+  top_clients_calendar_id: string
+  top_clients: Array<{ client_name: string; count: number }>
+  recent_holidays: HolidayRecord[]
+  // Only with `since`: number of bookings / holidays in the (possibly cut) recent lists' range
+  recent_bookings_total?: number
+  recent_holidays_total?: number
+}
+
+// With `since`, the recent lists hold everything created since then (bounded server-side) instead of the `limit` newest
+export const getDashboardSummary = async (limit: number = 10, since?: Date): Promise<DashboardSummary> => {
+  const params = new URLSearchParams({ limit: String(limit) })
+  if (since) params.append('since', since.toISOString())
+  return apiRequest<DashboardSummary>(`/dashboard/?${params.toString()}`)
+}
+
+// Server-Sent Events stream of booking/holiday changes. EventSource cannot send headers, so the URL
+// carries a short-lived stream ticket (never the access token): get a new URL for every (re)connection
+export const getCalendarEventsUrl = async (calendarId?: string, lastEventId?: string): Promise<string | null> => {
+  if (!sessionStorage.getItem('access_token')) return null
+  const { ticket } = await apiRequest<{ ticket: string; expires_in: number }>('/events/ticket/', { method: 'POST' })
+  const params = new URLSearchParams({ ticket })
+  if (calendarId) params.append('calendar_id', calendarId)
+  if (lastEventId) params.append('last_event_id', lastEventId)
+  return `${API_BASE_URL}/events/?${params.toString()}`
+}
@@ -1,5 +1,4 @@
-import { getAllBookings, CALENDAR_CONFIGS, getCalendarName } from './bookingService'
-import { getAllHolidays } from './bookingService'
+import { clearBookingsCache, clearHolidaysCache, getCalendarEventsUrl, getCalendarName, getDashboardSummary } from './bookingService'
 
 export interface NotificationItem {
   id: string
@@ -10,72 +9,151 @@ export interface NotificationItem {
   data?: any
 }
 
+export interface NotificationFeed {
+  notifications: NotificationItem[]
+  // Bookings/holidays in range that the server left out of its bounded lists (add it to the unread count)
+  moreCount: number
+}
+
 // Get all notifications from different sources
-export const getAllNotifications = async (): Promise<NotificationItem[]> => {
+// A single /dashboard/?since= request returns the bookings of the last 24 hours and the holidays
+// of the last 7 days of every calendar (up to a server-side maximum, with their totals)
+export const getAllNotifications = async (): Promise<NotificationFeed> => {
   const notifications: NotificationItem[] = []
+  let moreCount = 0
   const now = Date.now()
   const oneDayAgo = now - (24 * 60 * 60 * 1000)
   const sevenDaysAgo = now - (7 * 24 * 60 * 60 * 1000)
 
   try {
-    // Get recent bookings (last 24 hours)
-    const allCalendars = Object.values(CALENDAR_CONFIGS)
-    const allBookingsPromises = allCalendars.map(calendarId => 
-      getAllBookings(calendarId).then(bookings => ({ calendarId, bookings }))
-    )
-    const bookingResults = await Promise.all(allBookingsPromises)
-    
-    bookingResults.forEach(({ calendarId, bookings }) => {
-      bookings.forEach(booking => {
-        if (booking.timestamp > oneDayAgo) {
-          const calendarName = getCalendarName(calendarId)
-          notifications.push({
-            id: `booking-${booking.id}`,
-            type: 'booking',
-            title: 'Nouvelle réservation',
-            message: `${booking.name} - ${calendarName}`,
-            timestamp: booking.timestamp,
-            data: { ...booking, calendarId }
-          })
-        }
-      })
+    const summary = await getDashboardSummary(10, new Date(oneDayAgo))
+    moreCount = Math.max(0, (summary.recent_bookings_total ?? 0) - summary.recent_bookings.length)
+      + Math.max(0, (summary.recent_holidays_total ?? 0) - summary.recent_holidays.length)
+
+    // Recent bookings (last 24 hours)
+    summary.recent_bookings.forEach(booking => {
+      const timestamp = new Date(booking.created_at).getTime()
+      if (timestamp > oneDayAgo) {
+        const calendarName = getCalendarName(booking.calendar_id)
+        notifications.push({
+          id: `booking-${booking.id}`,
+          type: 'booking',
+          title: 'Nouvelle réservation',
+          message: `${booking.client_name} - ${calendarName}`,
+          timestamp,
+          data: {
+            id: String(booking.id),
+            date: booking.booking_date,
+            name: booking.client_name,
+            designer: booking.designer_name,
+            time: booking.booking_time || '21h00',
+            timestamp,
+            calendarId: booking.calendar_id
+          }
+        })
+      }
     })
-  } catch (error) {
-    console.error('Error loading booking notifications:', error)
-  }
 
-  try {
-    // Get recent holidays (last 7 days)
-    const allCalendars = Object.values(CALENDAR_CONFIGS)
-    const allHolidaysPromises = allCalendars.map(calendarId => 
-      getAllHolidays(calendarId).then(holidays => ({ calendarId, holidays }))
-    )
-    const holidayResults = await Promise.all(allHolidaysPromises)
-    
-    holidayResults.forEach(({ calendarId, holidays }) => {
-      holidays.forEach(holiday => {
-        const createdAt = new Date(holiday.created_at).getTime()
-        if (createdAt > sevenDaysAgo) {
-          const calendarName = getCalendarName(calendarId)
-          notifications.push({
-            id: `holiday-${holiday.id}`,
-            type: 'holiday',
-            title: 'Nouveau jour férié',
-            message: `${calendarName} - ${holiday.holiday_date}`,
-            timestamp: createdAt,
-            data: { ...holiday, calendarId }
-          })
-        }
-      })
+    // Recent holidays (last 7 days)
+    summary.recent_holidays.forEach(holiday => {
+      const createdAt = new Date(holiday.created_at).getTime()
+      if (createdAt > sevenDaysAgo) {
+        const calendarName = getCalendarName(holiday.calendar_id)
+        notifications.push({
+          id: `holiday-${holiday.id}`,
+          type: 'holiday',
+          title: 'Nouveau jour férié',
+          message: `${calendarName} - ${holiday.holiday_date}`,
+          timestamp: createdAt,
+          data: { ...holiday, calendarId: holiday.calendar_id }
+        })
+      }
     })
   } catch (error) {
-    console.error('Error loading holiday notifications:', error)
+    console.error('Error loading notifications:', error)
   }
 
   // Sort by timestamp (newest first)
   notifications.sort((a, b) => b.timestamp - a.timestamp)
 
-  return notifications
+  return { notifications, moreCount }
+}
+
+const CALENDAR_EVENT_TYPES = [
+  'booking.created', 'booking.updated', 'booking.deleted',
+  'holiday.created', 'holiday.updated', 'holiday.deleted',
+]
+
+// Subscribe to booking/holiday changes pushed by the server (/api/events/).
+// Calls onChange (debounced) after each burst of changes and returns an unsubscribe function.
+// Falls back to polling every 60 seconds when EventSource is unavailable or the stream keeps failing.
+export const subscribeToCalendarEvents = (onChange: () => void, calendarId?: string): (() => void) => {
+  let debounceTimer: ReturnType<typeof setTimeout> | undefined
+  let fallbackInterval: ReturnType<typeof setInterval> | undefined
+  let source: EventSource | null = null
+  let failures = 0
+  let closed = false
+  let lastEventId: string | undefined
+
+  const notifyChange = (event: Event) => {
+    lastEventId = (event as MessageEvent).lastEventId || lastEventId
+    clearTimeout(debounceTimer)
+    debounceTimer = setTimeout(() => {
+      clearBookingsCache(calendarId)
+      clearHolidaysCache(calendarId)
+      onChange()
+    }, 300)
+  }
+
+  const startPolling = () => {
+    if (!fallbackInterval) {
+      fallbackInterval = setInterval(onChange, 60000)
+    }
+  }
+
+  const connect = async () => {
+    let url: string | null = null
+    try {
+      url = await getCalendarEventsUrl(calendarId, lastEventId)
+    } catch (error) {
+      console.error('Error opening the event stream:', error)
+    }
+    if (closed) return
+    if (!url) {
+      startPolling()
+      return
+    }
+    source = new EventSource(url)
+    CALENDAR_EVENT_TYPES.forEach(type => source?.addEventListener(type, notifyChange))
+    source.onopen = () => {
+      failures = 0
+    }
+    source.onerror = () => {
+      // EventSource reconnects by itself (and replays missed events) with the same URL; once its
+      // ticket has expired the server refuses it and the source closes: reconnect with a new ticket.
+      // Poll if it keeps failing
+      failures += 1
+      if (failures >= 3) {
+        source?.close()
+        startPolling()
+      } else if (source?.readyState === EventSource.CLOSED) {
+        connect()
+      }
+    }
+  }
+
+  if (typeof EventSource === 'undefined') {
+    startPolling()
+  } else {
+    connect()
+  }
+
+  return () => {
+    closed = true
+    clearTimeout(debounceTimer)
+    if (fallbackInterval) clearInterval(fallbackInterval)
+    source?.close()
+  }
 }
 
 // Get recent users (this would need to be fetched from an API)